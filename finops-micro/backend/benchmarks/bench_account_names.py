@@ -0,0 +1,189 @@
+"""Benchmark dos nomes de conta AWS: CASE com um WHEN por conta vs dim_scope.scope_name sincronizado.
+
+Uso (banco descartavel, com schema aplicado):
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_account_names.py --accounts 500 --rows 500000
+
+Gera um tenant isolado com `--accounts` contas (scope_name = id cru, como chega do provider) e `--rows`
+linhas na fact_cost_daily, mais a rollup diaria. Mede o sync dos nomes (sync_scope_names) e, para cada
+fonte (fact, rollup), o melhor de `--repeat` execucoes de top_scopes e top_accounts_with_delta com e
+sem filtro por nome de conta, no formato antigo (CASE montado a partir do mapa) e no novo.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import replace
+from datetime import date
+
+from sqlalchemy import case, delete, func, literal, text
+
+from finops_api.core.config import settings
+from finops_api.db.session import SessionLocal
+from finops_api.models.agg_cost_daily_rollup import CostDailyRollup
+from finops_api.models.dim_scope import DimScope
+from finops_api.models.dim_service import DimService
+from finops_api.models.dim_tenant import DimTenant
+from finops_api.models.fact_cost_daily import FactCostDaily
+from finops_api.repositories.cost_rollup_repo import CostRollupRepository
+from finops_api.repositories.dimension_repo import DimensionRepository
+from finops_api.repositories.fact_cost_repo import FactCostRepository, QueryFilters
+
+PERIOD_START = date(2025, 1, 1)
+PERIOD_END = date(2025, 12, 31)
+SERVICES = 20
+
+
+class LegacyAccountNameRepository(FactCostRepository):
+    """Resolucao antiga: CASE com um WHEN por conta do mapa, avaliado em cada linha."""
+
+    account_names: dict[str, str] = {}
+
+    def _case(self, cloud_col, scope_key_col):
+        whens = [
+            ((cloud_col == "aws") & (scope_key_col == account_id), literal(account_name))
+            for account_id, account_name in self.account_names.items()
+        ]
+        return case(*whens, else_=None)
+
+    def _account_name_expr(self):
+        scope_key = func.coalesce(DimScope.scope_key, FactCostDaily.scope_key)
+        return func.coalesce(self._case(FactCostDaily.cloud, scope_key), DimScope.scope_name, FactCostDaily.scope_key)
+
+    def _rollup_columns(self):
+        return replace(
+            super()._rollup_columns(),
+            account_name=func.coalesce(
+                self._case(CostDailyRollup.cloud, CostDailyRollup.scope_key),
+                CostDailyRollup.scope_name,
+                CostDailyRollup.scope_key,
+            ),
+        )
+
+
+def _seed(db, accounts: int, rows: int) -> tuple[DimTenant, dict[str, str]]:
+    tenant = DimTenant(cloud="aws", tenant_key=f"bench-acct-{uuid.uuid4().hex[:8]}", tenant_name="bench accounts")
+    db.add(tenant)
+    db.flush()
+    names = {f"{100000000000 + idx}": f"Conta Bench {idx:04d}" for idx in range(accounts)}
+    scopes = [
+        DimScope(tenant_id=tenant.tenant_id, cloud="aws", scope_type="account", scope_key=key, scope_name=key)
+        for key in names
+    ]
+    services = [
+        DimService(cloud="aws", service_key=f"bench-acct-svc-{idx}", service_name=f"Bench Acct Service {idx}")
+        for idx in range(SERVICES)
+    ]
+    db.add_all([*scopes, *services])
+    db.flush()
+    db.execute(
+        text(
+            """
+            INSERT INTO fact_cost_daily (
+                fact_id, cost_date, cloud, tenant_id, scope_id, service_id, scope_key, service_key, resource_id,
+                currency, amount, tags, source, raw
+            )
+            SELECT
+                gen_random_uuid(),
+                CAST(:start AS date) + (g % 365),
+                'aws',
+                :tenant_id,
+                (CAST(:scope_ids AS uuid[]))[1 + (g / 365) % :accounts],
+                (CAST(:service_ids AS uuid[]))[1 + (g / (365 * :accounts)) % :services],
+                (CAST(:scope_keys AS text[]))[1 + (g / 365) % :accounts],
+                'bench-acct-svc-' || ((g / (365 * :accounts)) % :services),
+                :resource_prefix || g,
+                'USD',
+                round((random() * 100)::numeric, 6),
+                '{}'::jsonb,
+                'aws_ce_account_cli',
+                '{}'::jsonb
+            FROM generate_series(0, :rows - 1) AS g
+            """
+        ),
+        {
+            "start": PERIOD_START,
+            "tenant_id": tenant.tenant_id,
+            "scope_ids": [str(scope.scope_id) for scope in scopes],
+            "scope_keys": [scope.scope_key for scope in scopes],
+            "service_ids": [str(service.service_id) for service in services],
+            "accounts": accounts,
+            "services": SERVICES,
+            "rows": rows,
+            "resource_prefix": f"{tenant.tenant_key}-r",
+        },
+    )
+    CostRollupRepository(db).refresh(tenant.tenant_id, "aws", PERIOD_START, PERIOD_END)
+    db.commit()
+    db.execute(text("ANALYZE fact_cost_daily"))
+    db.execute(text("ANALYZE agg_cost_daily_rollup"))
+    db.execute(text("ANALYZE dim_scope"))
+    db.commit()
+    return tenant, names
+
+
+def _drop(db, tenant: DimTenant) -> None:
+    db.rollback()
+    db.execute(delete(FactCostDaily).where(FactCostDaily.tenant_id == tenant.tenant_id))
+    db.execute(text("DELETE FROM agg_cost_daily_rollup WHERE tenant_id = :tenant_id"), {"tenant_id": tenant.tenant_id})
+    db.execute(text("DELETE FROM agg_cost_monthly_rollup WHERE tenant_id = :tenant_id"), {"tenant_id": tenant.tenant_id})
+    db.execute(delete(DimScope).where(DimScope.tenant_id == tenant.tenant_id))
+    db.execute(delete(DimService).where(DimService.service_key.like("bench-acct-svc-%")))
+    db.execute(delete(DimTenant).where(DimTenant.tenant_id == tenant.tenant_id))
+    db.commit()
+
+
+def _best_of(repeat: int, fn: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dos nomes de conta AWS (CASE vs dim_scope)")
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    original = settings.cost_rollup_enabled
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        tenant, names = _seed(db, args.accounts, args.rows)
+        print(f"seed accounts={args.accounts} rows={args.rows} elapsed={time.perf_counter() - started:.1f}s")
+        try:
+            LegacyAccountNameRepository.account_names = names
+            started = time.perf_counter()
+            changed = DimensionRepository(db).sync_scope_names("aws", names)
+            db.commit()
+            print(f"sync_scope_names alterados={changed} elapsed={(time.perf_counter() - started) * 1000:.1f}ms")
+
+            period = QueryFilters(cloud="aws", start=PERIOD_START, end=PERIOD_END, currency="USD", tenant_id=tenant.tenant_id)
+            selected = list(names.values())[:: max(1, args.accounts // 20)]
+            filtered = replace(period, accounts=selected)
+            for rollup in (False, True):
+                settings.cost_rollup_enabled = rollup
+                source = "rollup" if rollup else "fact"
+                for label, repo_cls in (("case", LegacyAccountNameRepository), ("dim", FactCostRepository)):
+                    # Repositorio novo a cada chamada: o memo por requisicao nao pode mascarar o tempo.
+                    top_s = _best_of(args.repeat, lambda: repo_cls(db).top_scopes(period, 10))
+                    top_filtered_s = _best_of(args.repeat, lambda: repo_cls(db).top_scopes(filtered, 10))
+                    delta_s = _best_of(args.repeat, lambda: repo_cls(db).top_accounts_with_delta(filtered, 10))
+                    print(
+                        f"{source:<6} {label:<4} top_scopes={top_s * 1000:8.1f}ms "
+                        f"top_scopes_filtro={top_filtered_s * 1000:8.1f}ms "
+                        f"top_accounts_with_delta_filtro={delta_s * 1000:8.1f}ms"
+                    )
+        finally:
+            settings.cost_rollup_enabled = original
+            _drop(db, tenant)
+
+
+if __name__ == "__main__":
+    main()
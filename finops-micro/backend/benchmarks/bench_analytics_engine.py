@@ -0,0 +1,231 @@
+"""Benchmark dos agregados do dashboard: ANALYTICS_ENGINE=sql (group-bys no Postgres) vs numpy (fatia em memoria).
+
+Uso (banco descartavel, com schema aplicado e o extra `analytics`):
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_analytics_engine.py --rows 1000000
+
+Gera um tenant AWS isolado com `--rows` linhas na fact_cost_daily (um ano, metade pela source de
+servicos e metade pela de contas, moedas misturadas e amount_brl parcial), cotacoes em dias uteis e
+a rollup diaria. Para cada fonte (fact, rollup), moeda e periodo mede o melhor de `--repeat` execucoes
+do conjunto de agregados de uma requisicao do dashboard (summary, top servicos, daily, breakdown e
+trend por servico e por conta), cada execucao com um repositorio novo, conta as consultas enviadas
+ao banco e confere que os dois motores devolvem exatamente o mesmo resultado.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import uuid
+from collections.abc import Callable
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, event, text
+
+from finops_api.core.config import settings
+from finops_api.db.session import SessionLocal, engine
+from finops_api.models.dim_currency_rate import DimCurrencyRate
+from finops_api.models.dim_scope import DimScope
+from finops_api.models.dim_service import DimService
+from finops_api.models.dim_tenant import DimTenant
+from finops_api.models.fact_cost_daily import FactCostDaily
+from finops_api.repositories.cost_rollup_repo import CostRollupRepository
+from finops_api.repositories.fact_cost_frame_repo import FactCostFrameRepository
+from finops_api.repositories.fact_cost_repo import FactCostRepository, QueryFilters
+
+YEAR_START = date(2025, 1, 1)
+YEAR_END = date(2025, 12, 31)
+SERVICES = 40
+SCOPES = 12
+TOP = 8
+
+
+def _seed(db, rows: int) -> tuple[DimTenant, list[uuid.UUID]]:
+    tenant = DimTenant(cloud="aws", tenant_key=f"bench-engine-{uuid.uuid4().hex[:8]}", tenant_name="bench engine")
+    db.add(tenant)
+    db.flush()
+    services = [
+        DimService(cloud="aws", service_key=f"bench-engine-svc-{idx}", service_name=f"Bench Engine Service {idx}")
+        for idx in range(SERVICES)
+    ]
+    scopes = [
+        DimScope(
+            tenant_id=tenant.tenant_id,
+            cloud="aws",
+            scope_type="account",
+            scope_key=f"bench-engine-acct-{idx}",
+            scope_name=f"Conta {idx}",
+        )
+        for idx in range(SCOPES)
+    ]
+    db.add_all([*services, *scopes])
+    db.flush()
+
+    # Linhas pares pela source de servicos, impares pela de contas (como o Cost Explorer grava cada visao).
+    db.execute(
+        text(
+            """
+            INSERT INTO fact_cost_daily (
+                fact_id, cost_date, cloud, tenant_id, scope_id, service_id, scope_key, service_key, resource_id,
+                currency, amount, amount_brl, tags, source, raw
+            )
+            SELECT
+                gen_random_uuid(),
+                CAST(:start AS date) + (g % 365),
+                'aws',
+                :tenant_id,
+                (CAST(:scope_ids AS uuid[]))[1 + (g / 365) % :scopes],
+                CASE WHEN g % 2 = 0 THEN (CAST(:service_ids AS uuid[]))[1 + (g / (365 * :scopes)) % :services] END,
+                'bench-engine-acct-' || ((g / 365) % :scopes),
+                CASE WHEN g % 2 = 0 THEN 'bench-engine-svc-' || ((g / (365 * :scopes)) % :services) ELSE '__ALL__' END,
+                :resource_prefix || g,
+                CASE WHEN g % 20 < 17 THEN 'USD' ELSE 'BRL' END,
+                round((random() * 100)::numeric, 6),
+                CASE WHEN g % 20 BETWEEN 12 AND 16 THEN round((random() * 500)::numeric, 6) END,
+                '{}'::jsonb,
+                CASE WHEN g % 2 = 0 THEN 'aws_ce_service_cli' ELSE 'aws_ce_account_cli' END,
+                '{}'::jsonb
+            FROM generate_series(0, :rows - 1) AS g
+            """
+        ),
+        {
+            "start": YEAR_START,
+            "tenant_id": tenant.tenant_id,
+            "scope_ids": [str(scope.scope_id) for scope in scopes],
+            "service_ids": [str(service.service_id) for service in services],
+            "scopes": SCOPES,
+            "services": SERVICES,
+            "rows": rows,
+            "resource_prefix": f"{tenant.tenant_key}-r",
+        },
+    )
+
+    # Cotacoes com 8 casas so em dias uteis; nao sobrescreve cotacoes existentes.
+    rng = random.Random(42)
+    rate = 5.0
+    rate_ids: list[uuid.UUID] = []
+    day = YEAR_START - timedelta(days=7)
+    while day <= YEAR_END:
+        rate = max(4.0, rate + rng.uniform(-0.05, 0.05))
+        if day.weekday() < 5:
+            rate_id = db.execute(
+                text(
+                    """
+                    INSERT INTO dim_currency_rate (rate_id, rate_date, from_currency, to_currency, rate)
+                    VALUES (gen_random_uuid(), :rate_date, 'USD', 'BRL', :rate)
+                    ON CONFLICT DO NOTHING RETURNING rate_id
+                    """
+                ),
+                {"rate_date": day, "rate": Decimal(str(round(rate, 8)))},
+            ).scalar_one_or_none()
+            if rate_id is not None:
+                rate_ids.append(rate_id)
+        day += timedelta(days=1)
+
+    CostRollupRepository(db).refresh(tenant.tenant_id, "aws", YEAR_START, YEAR_END)
+    db.commit()
+    db.execute(text("ANALYZE fact_cost_daily"))
+    db.execute(text("ANALYZE agg_cost_daily_rollup"))
+    db.commit()
+    return tenant, rate_ids
+
+
+def _drop(db, tenant: DimTenant, rate_ids: list[uuid.UUID]) -> None:
+    db.rollback()
+    db.execute(delete(FactCostDaily).where(FactCostDaily.tenant_id == tenant.tenant_id))
+    db.execute(text("DELETE FROM agg_cost_daily_rollup WHERE tenant_id = :tenant_id"), {"tenant_id": tenant.tenant_id})
+    db.execute(text("DELETE FROM agg_cost_monthly_rollup WHERE tenant_id = :tenant_id"), {"tenant_id": tenant.tenant_id})
+    db.execute(delete(DimScope).where(DimScope.tenant_id == tenant.tenant_id))
+    db.execute(delete(DimService).where(DimService.service_key.like("bench-engine-svc-%")))
+    if rate_ids:
+        db.execute(delete(DimCurrencyRate).where(DimCurrencyRate.rate_id.in_(rate_ids)))
+    db.execute(delete(DimTenant).where(DimTenant.tenant_id == tenant.tenant_id))
+    db.commit()
+
+
+def _dashboard(repo: FactCostRepository, filters: QueryFilters) -> list[object]:
+    """Agregados que summary-v2, top-services-v2, daily-v2, breakdown e trend pedem ao repositorio."""
+    return [
+        repo.window_totals(filters),
+        repo.top_services_ranked(filters, TOP),
+        repo.top_services_with_delta(filters, TOP),
+        repo.top_accounts_with_delta(filters, TOP),
+        repo.daily_with_service_breakdown(filters, TOP),
+        repo.cost_explorer_breakdown(filters, TOP, "service"),
+        repo.cost_explorer_breakdown(filters, TOP, "account"),
+        repo.cost_explorer_trend(filters, "service", None, TOP),
+        repo.cost_explorer_trend(filters, "account", None, TOP),
+        repo.cost_explorer_trend(filters, "service", "Bench Engine Service 3", TOP),
+    ]
+
+
+def _best_of(repeat: int, fn: Callable[[], object]) -> tuple[float, object]:
+    best = float("inf")
+    result: object = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _count_queries(fn: Callable[[], object]) -> int:
+    count = 0
+
+    def capture(*_args) -> None:
+        nonlocal count
+        count += 1
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dos agregados do dashboard (sql vs numpy)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    original = (settings.cost_rollup_enabled, settings.fx_conversion_mode)
+    settings.fx_conversion_mode = "as_of"
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        tenant, rate_ids = _seed(db, args.rows)
+        print(f"seed rows={args.rows} elapsed={time.perf_counter() - started:.1f}s")
+        try:
+            periods = {
+                "semana": (date(2025, 12, 15), date(2025, 12, 21)),
+                "mes": (date(2025, 11, 1), date(2025, 11, 30)),
+                "trimestre": (date(2025, 7, 1), date(2025, 9, 30)),
+            }
+            for rollup in (False, True):
+                settings.cost_rollup_enabled = rollup
+                source = "rollup" if rollup else "fact"
+                for currency in ("USD", "BRL"):
+                    for label, (start, end) in periods.items():
+                        filters = QueryFilters(cloud="aws", start=start, end=end, currency=currency, tenant_id=tenant.tenant_id)
+                        timings: dict[str, float] = {}
+                        results: dict[str, object] = {}
+                        queries: dict[str, int] = {}
+                        for name, repo_class in (("sql", FactCostRepository), ("numpy", FactCostFrameRepository)):
+                            # Repositorio novo a cada execucao: o memo e as fatias valem por requisicao.
+                            timings[name], results[name] = _best_of(args.repeat, lambda: _dashboard(repo_class(db), filters))
+                            queries[name] = _count_queries(lambda: _dashboard(repo_class(db), filters))
+                        print(
+                            f"{source:<6} {currency} {label:<9} sql={timings['sql'] * 1000:8.1f}ms ({queries['sql']:2d} consultas) "
+                            f"numpy={timings['numpy'] * 1000:8.1f}ms ({queries['numpy']:2d} consultas) "
+                            f"speedup={timings['sql'] / timings['numpy']:5.2f}x iguais={results['sql'] == results['numpy']}"
+                        )
+        finally:
+            settings.cost_rollup_enabled, settings.fx_conversion_mode = original
+            _drop(db, tenant, rate_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Benchmark da exportacao crua: formatos de texto vs colunares, e stream vs carregar o periodo inteiro.
+
+Uso (banco descartavel, com schema aplicado):
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_export.py --rows 1000000
+
+Gera um tenant isolado com `--rows` linhas na fact_cost_daily (um ano, metadata com sku) e
+exporta o ano inteiro em NDJSON e CSV e, com pyarrow instalado, em Arrow IPC e Parquet particionado
+por cloud/mes (num diretorio temporario). Mede tempo, linhas/s e tamanho da saida e, numa segunda
+passada com tracemalloc (que deixa o Python bem mais lento, por isso fica fora do tempo), o pico de
+memoria Python do stream e de um `.all()` da mesma consulta sem paginacao. `--explain` imprime o
+plano de uma pagina retomada no meio do periodo.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections.abc import Callable
+from datetime import date
+
+from sqlalchemy import delete, text
+
+from finops_api.db.session import SessionLocal
+from finops_api.models.dim_scope import DimScope
+from finops_api.models.dim_service import DimService
+from finops_api.models.dim_tenant import DimTenant
+from finops_api.models.fact_cost_daily import FactCostDaily
+from finops_api.repositories.fact_cost_export_repo import ExportCursor, FactCostExportRepository
+from finops_api.repositories.fact_cost_repo import QueryFilters
+from finops_api.services.cost_columnar_export_service import arrow_available, stream_arrow, write_parquet_dataset
+from finops_api.services.cost_export_service import stream_export
+
+YEAR_START = date(2025, 1, 1)
+YEAR_END = date(2025, 12, 31)
+SERVICES = 40
+SCOPES = 12
+
+
+def _seed(db, rows: int) -> DimTenant:
+    tenant = DimTenant(cloud="aws", tenant_key=f"bench-export-{uuid.uuid4().hex[:8]}", tenant_name="bench export")
+    db.add(tenant)
+    db.flush()
+    services = [
+        DimService(cloud="aws", service_key=f"bench-export-svc-{idx}", service_name=f"Bench Export Service {idx}")
+        for idx in range(SERVICES)
+    ]
+    scopes = [
+        DimScope(
+            tenant_id=tenant.tenant_id,
+            cloud="aws",
+            scope_type="account",
+            scope_key=f"bench-export-acct-{idx}",
+            scope_name=f"Conta {idx}",
+        )
+        for idx in range(SCOPES)
+    ]
+    db.add_all([*services, *scopes])
+    db.flush()
+    db.execute(
+        text(
+            """
+            INSERT INTO fact_cost_daily (
+                fact_id, cost_date, cloud, tenant_id, scope_id, service_id, scope_key, service_key, resource_id,
+                currency, amount, tags, source, raw
+            )
+            SELECT
+                gen_random_uuid(),
+                CAST(:start AS date) + (g % 365),
+                'aws',
+                :tenant_id,
+                (CAST(:scope_ids AS uuid[]))[1 + (g / 365) % :scopes],
+                (CAST(:service_ids AS uuid[]))[1 + (g / (365 * :scopes)) % :services],
+                'bench-export-acct-' || ((g / 365) % :scopes),
+                'bench-export-svc-' || ((g / (365 * :scopes)) % :services),
+                :resource_prefix || g,
+                'USD',
+                round((random() * 100)::numeric, 6),
+                jsonb_build_object('env', CASE WHEN g % 3 = 0 THEN 'prod' ELSE 'dev' END),
+                'aws_ce_service_cli',
+                jsonb_build_object('sku', 'SKU-' || (g % 997), 'usage_type', 'BoxUsage:m5.large')
+            FROM generate_series(0, :rows - 1) AS g
+            """
+        ),
+        {
+            "start": YEAR_START,
+            "tenant_id": tenant.tenant_id,
+            "scope_ids": [str(scope.scope_id) for scope in scopes],
+            "service_ids": [str(service.service_id) for service in services],
+            "scopes": SCOPES,
+            "services": SERVICES,
+            "rows": rows,
+            "resource_prefix": f"{tenant.tenant_key}-r",
+        },
+    )
+    db.commit()
+    db.execute(text("ANALYZE fact_cost_daily"))
+    db.commit()
+    return tenant
+
+
+def _drop(db, tenant: DimTenant) -> None:
+    db.rollback()
+    db.execute(delete(FactCostDaily).where(FactCostDaily.tenant_id == tenant.tenant_id))
+    db.execute(delete(DimScope).where(DimScope.tenant_id == tenant.tenant_id))
+    db.execute(delete(DimService).where(DimService.service_key.like("bench-export-svc-%")))
+    db.execute(delete(DimTenant).where(DimTenant.tenant_id == tenant.tenant_id))
+    db.commit()
+
+
+def _timed(fn: Callable[[], int]) -> tuple[float, int]:
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def _peak_memory(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _explain_resumed_page(db, filters: QueryFilters) -> None:
+    middle = db.execute(
+        text(
+            "SELECT cost_date, fact_id FROM fact_cost_daily WHERE tenant_id = :tenant_id "
+            "AND cost_date = :day ORDER BY fact_id LIMIT 1"
+        ),
+        {"tenant_id": filters.tenant_id, "day": date(2025, 7, 1)},
+    ).one()
+    repo = FactCostExportRepository(db)
+    stmt = repo._page_stmt(filters, ExportCursor(cost_date=middle.cost_date, fact_id=middle.fact_id))
+    compiled = stmt.compile(db.get_bind())
+    cursor = db.connection().connection.cursor()
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + str(compiled), compiled.params)
+    print("\n".join(row[0] for row in cursor.fetchall()))
+    cursor.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da exportacao crua (stream vs .all())")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--explain", action="store_true")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        tenant = _seed(db, args.rows)
+        print(f"seed rows={args.rows} elapsed={time.perf_counter() - started:.1f}s")
+        try:
+            year = QueryFilters(cloud="aws", start=YEAR_START, end=YEAR_END, currency="USD", tenant_id=tenant.tenant_id)
+            for export_format in ("ndjson", "csv"):
+                elapsed, size = _timed(lambda: sum(len(chunk) for chunk in stream_export(year, export_format)))
+                print(
+                    f"stream {export_format:<6} tempo={elapsed:6.1f}s rows/s={args.rows / elapsed:9.0f} "
+                    f"saida={size / 1_048_576:7.1f}MB"
+                )
+            if arrow_available():
+                elapsed, size = _timed(lambda: sum(len(chunk) for chunk in stream_arrow(year)))
+                print(
+                    f"stream arrow  tempo={elapsed:6.1f}s rows/s={args.rows / elapsed:9.0f} "
+                    f"saida={size / 1_048_576:7.1f}MB"
+                )
+                with tempfile.TemporaryDirectory(prefix="bench-export-") as base_dir:
+                    elapsed, report = _timed(lambda: write_parquet_dataset(year, base_dir))
+                    print(
+                        f"parquet       tempo={elapsed:6.1f}s rows/s={args.rows / elapsed:9.0f} "
+                        f"saida={report.bytes_written / 1_048_576:7.1f}MB arquivos={len(report.files)}"
+                    )
+            else:
+                print("pyarrow nao instalado: formatos arrow/parquet fora do benchmark")
+
+            def load_all() -> int:
+                repo = FactCostExportRepository(db, page_size=args.rows + 1)
+                return len(db.execute(repo._page_stmt(year, None)).all())
+
+            elapsed, _ = _timed(load_all)
+            print(f"all()  sem stream tempo={elapsed:6.1f}s")
+            stream_peak = _peak_memory(lambda: sum(len(chunk) for chunk in stream_export(year, "ndjson")))
+            all_peak = _peak_memory(load_all)
+            print(f"pico memoria python: stream={stream_peak / 1_048_576:6.1f}MB all()={all_peak / 1_048_576:6.1f}MB")
+            if arrow_available():
+                # Buffers Arrow sao alocados fora do tracemalloc; o pico aqui e o lado Python (tuplas do cursor).
+                arrow_peak = _peak_memory(lambda: sum(len(chunk) for chunk in stream_arrow(year)))
+                print(f"pico memoria python: arrow={arrow_peak / 1_048_576:6.1f}MB")
+            if args.explain:
+                _explain_resumed_page(db, year)
+        finally:
+            _drop(db, tenant)
+
+
+if __name__ == "__main__":
+    main()
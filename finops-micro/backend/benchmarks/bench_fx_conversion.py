@@ -0,0 +1,210 @@
+"""Benchmark da conversao USD->BRL: cotacao unica as-of (literal) vs serie diaria juntada em SQL.
+
+Uso (banco descartavel, com schema aplicado):
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_fx_conversion.py --rows 1000000
+
+Gera um tenant isolado com `--rows` linhas na fact_cost_daily (um ano, moedas misturadas,
+amount_brl parcial), cotacoes so em dias uteis (a serie diaria preenche os buracos) e a rollup
+diaria. Para cada fonte (fact, rollup) e modo (as_of, daily) mede o melhor de `--repeat`
+execucoes de total anual, window_totals e timeseries em BRL, e a diferenca do total anual
+entre os modos. `--explain` imprime o plano do total anual no modo daily sobre a fact.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import uuid
+from collections.abc import Callable
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, event, text
+
+from finops_api.core.config import settings
+from finops_api.db.session import SessionLocal, engine
+from finops_api.models.dim_currency_rate import DimCurrencyRate
+from finops_api.models.dim_scope import DimScope
+from finops_api.models.dim_service import DimService
+from finops_api.models.dim_tenant import DimTenant
+from finops_api.models.fact_cost_daily import FactCostDaily
+from finops_api.repositories.cost_rollup_repo import CostRollupRepository
+from finops_api.repositories.fact_cost_repo import FactCostRepository, QueryFilters
+
+YEAR_START = date(2025, 1, 1)
+YEAR_END = date(2025, 12, 31)
+SERVICES = 40
+SCOPES = 12
+
+
+def _seed(db, rows: int) -> tuple[DimTenant, list[uuid.UUID]]:
+    tenant = DimTenant(cloud="aws", tenant_key=f"bench-fx-{uuid.uuid4().hex[:8]}", tenant_name="bench fx")
+    db.add(tenant)
+    db.flush()
+    services = [
+        DimService(cloud="aws", service_key=f"bench-fx-svc-{idx}", service_name=f"Bench FX Service {idx}")
+        for idx in range(SERVICES)
+    ]
+    scopes = [
+        DimScope(tenant_id=tenant.tenant_id, cloud="aws", scope_type="account", scope_key=f"bench-fx-acct-{idx}", scope_name=f"Conta {idx}")
+        for idx in range(SCOPES)
+    ]
+    db.add_all([*services, *scopes])
+    db.flush()
+
+    # Linhas por recurso (dia, servico, conta): 60% USD sem amount_brl, 25% USD com amount_brl, 15% BRL.
+    db.execute(
+        text(
+            """
+            INSERT INTO fact_cost_daily (
+                fact_id, cost_date, cloud, tenant_id, scope_id, service_id, scope_key, service_key, resource_id,
+                currency, amount, amount_brl, tags, source, raw
+            )
+            SELECT
+                gen_random_uuid(),
+                CAST(:start AS date) + (g % 365),
+                'aws',
+                :tenant_id,
+                (CAST(:scope_ids AS uuid[]))[1 + (g / 365) % :scopes],
+                (CAST(:service_ids AS uuid[]))[1 + (g / (365 * :scopes)) % :services],
+                'bench-fx-acct-' || ((g / 365) % :scopes),
+                'bench-fx-svc-' || ((g / (365 * :scopes)) % :services),
+                :resource_prefix || g,
+                CASE WHEN g % 20 < 17 THEN 'USD' ELSE 'BRL' END,
+                round((random() * 100)::numeric, 6),
+                CASE WHEN g % 20 BETWEEN 12 AND 16 THEN round((random() * 500)::numeric, 6) END,
+                '{}'::jsonb,
+                'aws_ce_service_cli',
+                '{}'::jsonb
+            FROM generate_series(0, :rows - 1) AS g
+            """
+        ),
+        {
+            "start": YEAR_START,
+            "tenant_id": tenant.tenant_id,
+            "scope_ids": [str(scope.scope_id) for scope in scopes],
+            "service_ids": [str(service.service_id) for service in services],
+            "scopes": SCOPES,
+            "services": SERVICES,
+            "rows": rows,
+            "resource_prefix": f"{tenant.tenant_key}-r",
+        },
+    )
+
+    # Cotacoes em passeio aleatorio so em dias uteis; nao sobrescreve cotacoes existentes.
+    rng = random.Random(42)
+    rate = 5.0
+    rate_ids: list[uuid.UUID] = []
+    day = YEAR_START - timedelta(days=7)
+    while day <= YEAR_END:
+        rate = max(4.0, rate + rng.uniform(-0.05, 0.05))
+        if day.weekday() < 5:
+            rate_id = db.execute(
+                text(
+                    """
+                    INSERT INTO dim_currency_rate (rate_id, rate_date, from_currency, to_currency, rate)
+                    VALUES (gen_random_uuid(), :rate_date, 'USD', 'BRL', :rate)
+                    ON CONFLICT DO NOTHING RETURNING rate_id
+                    """
+                ),
+                {"rate_date": day, "rate": Decimal(str(round(rate, 6)))},
+            ).scalar_one_or_none()
+            if rate_id is not None:
+                rate_ids.append(rate_id)
+        day += timedelta(days=1)
+
+    CostRollupRepository(db).refresh(tenant.tenant_id, "aws", YEAR_START, YEAR_END)
+    db.commit()
+    db.execute(text("ANALYZE fact_cost_daily"))
+    db.execute(text("ANALYZE agg_cost_daily_rollup"))
+    db.execute(text("ANALYZE dim_currency_rate"))
+    db.commit()
+    return tenant, rate_ids
+
+
+def _drop(db, tenant: DimTenant, rate_ids: list[uuid.UUID]) -> None:
+    db.rollback()
+    db.execute(delete(FactCostDaily).where(FactCostDaily.tenant_id == tenant.tenant_id))
+    db.execute(text("DELETE FROM agg_cost_daily_rollup WHERE tenant_id = :tenant_id"), {"tenant_id": tenant.tenant_id})
+    db.execute(text("DELETE FROM agg_cost_monthly_rollup WHERE tenant_id = :tenant_id"), {"tenant_id": tenant.tenant_id})
+    db.execute(delete(DimScope).where(DimScope.tenant_id == tenant.tenant_id))
+    db.execute(delete(DimService).where(DimService.service_key.like("bench-fx-svc-%")))
+    if rate_ids:
+        db.execute(delete(DimCurrencyRate).where(DimCurrencyRate.rate_id.in_(rate_ids)))
+    db.execute(delete(DimTenant).where(DimTenant.tenant_id == tenant.tenant_id))
+    db.commit()
+
+
+def _best_of(repeat: int, fn: Callable[[], object]) -> tuple[float, object]:
+    best = float("inf")
+    result: object = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _explain_daily_total(db, filters: QueryFilters) -> None:
+    captured: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        FactCostRepository(db).total(filters)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = captured[-1]
+    cursor = db.connection().connection.cursor()
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+    print("\n".join(row[0] for row in cursor.fetchall()))
+    cursor.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da conversao USD->BRL (as_of vs daily)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--explain", action="store_true")
+    args = parser.parse_args()
+
+    original = (settings.cost_rollup_enabled, settings.fx_conversion_mode)
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        tenant, rate_ids = _seed(db, args.rows)
+        print(f"seed rows={args.rows} elapsed={time.perf_counter() - started:.1f}s")
+        try:
+            year = QueryFilters(cloud="aws", start=YEAR_START, end=YEAR_END, currency="BRL", tenant_id=tenant.tenant_id)
+            week = QueryFilters(cloud="aws", start=date(2025, 12, 15), end=date(2025, 12, 21), currency="BRL", tenant_id=tenant.tenant_id)
+            for rollup in (False, True):
+                settings.cost_rollup_enabled = rollup
+                source = "rollup" if rollup else "fact"
+                totals: dict[str, float] = {}
+                for mode in ("as_of", "daily"):
+                    settings.fx_conversion_mode = mode
+                    # Repositorio novo a cada chamada: o memo por requisicao nao pode mascarar o tempo.
+                    total_s, total = _best_of(args.repeat, lambda: FactCostRepository(db).total(year))
+                    windows_s, _ = _best_of(args.repeat, lambda: FactCostRepository(db).window_totals(week))
+                    series_s, _ = _best_of(args.repeat, lambda: FactCostRepository(db).timeseries(year))
+                    totals[mode] = float(total)
+                    print(
+                        f"{source:<6} {mode:<5} total_ano={total_s * 1000:9.1f}ms window_totals={windows_s * 1000:9.1f}ms "
+                        f"timeseries_ano={series_s * 1000:9.1f}ms total={float(total):,.2f}"
+                    )
+                gap = (totals["as_of"] - totals["daily"]) / totals["daily"] * 100 if totals["daily"] else 0.0
+                print(f"{source:<6} diferenca as_of vs daily no total anual: {gap:+.3f}%")
+            if args.explain:
+                settings.cost_rollup_enabled = False
+                settings.fx_conversion_mode = "daily"
+                _explain_daily_total(db, year)
+        finally:
+            settings.cost_rollup_enabled, settings.fx_conversion_mode = original
+            _drop(db, tenant, rate_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Benchmark do IngestService._persist: upsert linha a linha (legado) vs set-based.
+
+Uso (banco descartavel, com schema aplicado):
+
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_ingest_persist.py --rows 20000
+
+Cada modo roda duas vezes sobre um tenant isolado: carga inicial (INSERT) e
+reingestao da mesma janela (UPDATE), imprimindo rows/sec de cada fase.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from finops_api.db.session import SessionLocal
+from finops_api.models.dim_region import DimRegion
+from finops_api.models.dim_scope import DimScope
+from finops_api.models.dim_service import DimService
+from finops_api.models.dim_tenant import DimTenant
+from finops_api.models.fact_cost_daily import FactCostDaily
+from finops_api.providers.common.types import CanonicalCostRow
+from finops_api.services.ingest_service import IngestService
+
+
+def synthetic_rows(total: int, amount: str, start: date = date(2025, 1, 1)) -> list[CanonicalCostRow]:
+    days = 365
+    rows: list[CanonicalCostRow] = []
+    for idx in range(total):
+        service = f"svc-{idx // days}"
+        rows.append(
+            CanonicalCostRow(
+                cloud="aws",
+                usage_date=start + timedelta(days=idx % days),
+                scope_key="__ALL__",
+                scope_name="__ALL__",
+                service_key=service,
+                service_name=service,
+                region_key="global",
+                region_name="Global",
+                currency_code="USD",
+                amount=Decimal(amount),
+                source_ref="aws_ce_service_cli",
+                metadata_json={"metric": "UnblendedCost", "source": "ce_service"},
+            )
+        )
+    # Mesma ordem dos providers (crescente por dia), exigida pelo coalesce em streaming.
+    rows.sort(key=lambda row: row.usage_date)
+    return rows
+
+
+def _legacy_scope_id(db, row: CanonicalCostRow, tenant: DimTenant, cache: dict) -> str:
+    """Reproducao do _get_or_create_scope anterior: SELECT + UPDATE do nome a cada chave nova."""
+    key = (row.cloud, str(tenant.tenant_id), row.scope_key)
+    if key in cache:
+        return cache[key]
+    lookup = select(DimScope.scope_id).where(
+        DimScope.cloud == row.cloud,
+        DimScope.tenant_id == tenant.tenant_id,
+        DimScope.scope_key == row.scope_key,
+    )
+    existing = db.execute(lookup).scalar_one_or_none()
+    if existing:
+        db.execute(
+            update(DimScope)
+            .where(DimScope.scope_id == existing)
+            .values(scope_name=row.scope_name, metadata_json={"origin": "cli_ingest"})
+        )
+    else:
+        db.execute(
+            insert(DimScope)
+            .values(
+                tenant_id=tenant.tenant_id,
+                cloud=row.cloud,
+                scope_key=row.scope_key,
+                scope_name=row.scope_name,
+                metadata_json={"origin": "cli_ingest"},
+            )
+            .on_conflict_do_update(
+                index_elements=[DimScope.tenant_id, DimScope.scope_key],
+                set_={DimScope.scope_name: row.scope_name, DimScope.metadata_json: {"origin": "cli_ingest"}},
+            )
+        )
+        existing = db.execute(lookup).scalar_one()
+    cache[key] = str(existing)
+    return cache[key]
+
+
+def _legacy_dimension_id(db, model, key_column: str, id_column: str, row: CanonicalCostRow, cache: dict) -> str:
+    """Reproducao do _get_or_create_service/_region anterior: SELECT, INSERT DO NOTHING e novo SELECT."""
+    key_value = getattr(row, key_column)
+    key = (row.cloud, key_value)
+    if key in cache:
+        return cache[key]
+    lookup = select(getattr(model, id_column)).where(model.cloud == row.cloud, getattr(model, key_column) == key_value)
+    existing = db.execute(lookup).scalar_one_or_none()
+    if existing is None:
+        name_column = key_column.replace("_key", "_name")
+        db.execute(
+            insert(model)
+            .values(
+                cloud=row.cloud,
+                **{key_column: key_value, name_column: getattr(row, name_column)},
+                metadata_json={"origin": "cli_ingest"},
+            )
+            .on_conflict_do_nothing(index_elements=[model.cloud, getattr(model, key_column)])
+        )
+        existing = db.execute(lookup).scalar_one()
+    cache[key] = str(existing)
+    return cache[key]
+
+
+def legacy_persist(service: IngestService, rows: Iterable[CanonicalCostRow], tenant: DimTenant) -> tuple[int, int, int]:
+    """Reproducao do caminho anterior: dimensoes resolvidas chave a chave e INSERT DO NOTHING + UPDATE por linha."""
+    written = rows_inserted = rows_updated = 0
+    scope_cache: dict = {}
+    service_cache: dict = {}
+    region_cache: dict = {}
+    db = service.db
+    for row in service._coalesce_rows(rows):  # noqa: SLF001
+        scope_id = _legacy_scope_id(db, row, tenant, scope_cache)
+        service_id = _legacy_dimension_id(db, DimService, "service_key", "service_id", row, service_cache)
+        region_id = _legacy_dimension_id(db, DimRegion, "region_key", "region_id", row, region_cache)
+        values = service._fact_values(row, tenant, scope_id, service_id, region_id)  # noqa: SLF001
+        result = db.execute(insert(FactCostDaily.__table__).values(**values).on_conflict_do_nothing())
+        if int(result.rowcount or 0) == 0:
+            db.execute(
+                update(FactCostDaily)
+                .where(FactCostDaily.usage_date == row.usage_date)
+                .where(FactCostDaily.cloud == row.cloud)
+                .where(FactCostDaily.tenant_id == tenant.tenant_id)
+                .where(FactCostDaily.scope_key == row.scope_key)
+                .where(FactCostDaily.service_key == row.service_key)
+                .where(func.coalesce(FactCostDaily.region_key, "") == (row.region_key or ""))
+                .where(func.coalesce(FactCostDaily.resource_id, "") == "")
+                .where(FactCostDaily.currency_code == row.currency_code.upper())
+                .where(func.coalesce(FactCostDaily.charge_type, "") == "")
+                .where(func.coalesce(FactCostDaily.pricing_model, "") == "")
+                .values(
+                    scope_id=scope_id,
+                    service_id=service_id,
+                    region_id=region_id,
+                    amount=values["amount"],
+                    amount_brl=values["amount_brl"],
+                    metadata_json=row.metadata_json,
+                    updated_at=datetime.now(timezone.utc),
+                )
+            )
+            rows_updated += 1
+        else:
+            rows_inserted += 1
+        written += 1
+    db.commit()
+    return written, rows_inserted, rows_updated
+
+
+def _bulk_persist(service: IngestService, rows: Iterable[CanonicalCostRow], tenant: DimTenant) -> tuple[int, int, int]:
+    stats = service._persist(iter(rows), tenant)  # noqa: SLF001
+    return stats.rows_written, stats.rows_inserted, stats.rows_updated
+
+
+def _create_tenant(db, label: str) -> DimTenant:
+    tenant = DimTenant(cloud="aws", tenant_key=f"bench-{label}-{uuid.uuid4().hex[:8]}", tenant_name=f"bench {label}")
+    db.add(tenant)
+    db.commit()
+    return tenant
+
+
+def _drop_tenant(db, tenant: DimTenant) -> None:
+    db.execute(delete(FactCostDaily).where(FactCostDaily.tenant_id == tenant.tenant_id))
+    db.execute(delete(DimScope).where(DimScope.tenant_id == tenant.tenant_id))
+    db.execute(delete(DimTenant).where(DimTenant.tenant_id == tenant.tenant_id))
+    db.commit()
+
+
+def _run(label: str, persist, total: int) -> None:
+    with SessionLocal() as db:
+        service = IngestService(db)
+        tenant = _create_tenant(db, label)
+        try:
+            for phase, amount in (("insert", "1.25"), ("reingest", "2.50")):
+                rows = synthetic_rows(total, amount)
+                started = time.perf_counter()
+                written, inserted, updated = persist(service, rows, tenant)
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{label:<8} {phase:<9} rows={written:>7} inserted={inserted:>7} updated={updated:>7} "
+                    f"elapsed={elapsed:8.2f}s rows/sec={written / elapsed:10.0f}"
+                )
+        finally:
+            _drop_tenant(db, tenant)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de persistencia da fact_cost_daily")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--mode", choices=["legacy", "bulk", "both"], default="both")
+    args = parser.parse_args()
+
+    if args.mode in {"legacy", "both"}:
+        _run("legacy", legacy_persist, args.rows)
+    if args.mode in {"bulk", "both"}:
+        _run("bulk", _bulk_persist, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,32 @@
 from __future__ import annotations
 
+import logging
+from collections.abc import Iterator
+
 from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 
+from finops_api.core.config import settings
+from finops_api.core.result_cache import get_result_cache
 from finops_api.db.session import get_db
 from finops_api.models.auth_user import AuthUser
 from finops_api.repositories.currency_rate_repo import CurrencyRateRepository
+from finops_api.repositories.fact_cost_frame_repo import FactCostFrameRepository
 from finops_api.repositories.fact_cost_repo import FactCostRepository
 from finops_api.services.auth_service import AuthService
 from finops_api.services.analytics_service import AnalyticsService
 from finops_api.services.targets_service import TargetsService
 
+logger = logging.getLogger(__name__)
+
 
-def get_fact_repo(db: Session = Depends(get_db)) -> FactCostRepository:
-    return FactCostRepository(db)
+def get_fact_repo(db: Session = Depends(get_db)) -> Iterator[FactCostRepository]:
+    # ANALYTICS_ENGINE=numpy: agregados do dashboard sobre fatias em memoria (mesmo resultado do SQL).
+    repo = FactCostFrameRepository(db) if settings.analytics_engine == "numpy" else FactCostRepository(db)
+    yield repo
+    stats = repo.memo.stats()
+    if stats.hits or stats.misses:
+        logger.debug("Memo da requisicao: hits=%s misses=%s entradas=%s", stats.hits, stats.misses, stats.entries)
 
 
 def get_currency_rate_repo(db: Session = Depends(get_db)) -> CurrencyRateRepository:
@@ -48,4 +61,4 @@ def get_analytics_service(
     currency_repo: CurrencyRateRepository = Depends(get_currency_rate_repo),
     targets: TargetsService = Depends(get_targets_service),
 ) -> AnalyticsService:
-    return AnalyticsService(repo, currency_repo=currency_repo, targets=targets)
+    return AnalyticsService(repo, currency_repo=currency_repo, targets=targets, result_cache=get_result_cache())
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 from datetime import date
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from finops_api.api.v1.deps import get_analytics_service
+from finops_api.core.config import settings
 from finops_api.db.session import get_db
+from finops_api.models.ingest_job import IngestJob
+from finops_api.repositories.fact_cost_export_repo import ExportCursor
 from finops_api.repositories.fact_cost_repo import FactCostRepository, QueryFilters
 from finops_api.schemas.finops import (
     AnalyticsInsightRequest,
@@ -20,6 +25,8 @@ from finops_api.schemas.finops import (
     CostExplorerTrendItem,
     DailyItem,
     FiltersV2Response,
+    IngestJobStatus,
+    IngestStatusResponse,
     RankedItemV2,
     ReingestRequest,
     ReingestResponse,
@@ -30,9 +37,12 @@ from finops_api.schemas.finops import (
 from finops_api.services.analytics_service import AnalyticsService
 from finops_api.services.analytics_insight_service import AnalyticsInsightService
 from finops_api.services.auto_ingest_service import AutoIngestService
+from finops_api.services.cost_columnar_export_service import ARROW_MEDIA_TYPE, arrow_available, stream_arrow
+from finops_api.services.cost_export_service import EXPORT_MEDIA_TYPES, export_filename, stream_export
 from finops_api.services.cost_explorer_insight_service import CostExplorerInsightService
 from finops_api.services.cost_explorer_service import CostExplorerService
 from finops_api.services.currency_rate_sync_service import CurrencyRateSyncService
+from finops_api.services.ingest_queue_service import IngestQueueService
 from finops_api.services.ingest_service import run_ingest_job
 from finops_api.services.tenant_service import TenantService
 
@@ -48,35 +58,57 @@ def _tenant_keys_for_request(db: Session, cloud: str, requested_tenant_key: str
     return [None]
 
 
+def _refresh_range(db: Session, cloud: str, start: date, end: date, tenant_key: str | None) -> None:
+    if settings.ingest_queue_enabled:
+        IngestQueueService(db).enqueue_range(cloud, start, end, tenant_key=tenant_key)
+        return
+    providers = ["aws", "azure", "oci"] if cloud == "all" else [cloud]
+    for provider in providers:
+        tenant_keys = _tenant_keys_for_request(db, provider, tenant_key if provider == cloud else None)
+        for current_tenant_key in tenant_keys:
+            run_ingest_job(db, provider=provider, start=start, end=end, tenant_key=current_tenant_key)
+
+
+def _set_freshness_headers(response: Response, db: Session, filters: QueryFilters) -> None:
+    # Leituras servem o que ja esta na fact_cost_daily; os headers dizem se ha ingestao pendente.
+    freshness = IngestQueueService(db).freshness(filters.cloud, tenant_id=filters.tenant_id)
+    response.headers["X-Ingest-Status"] = freshness.status
+    response.headers["X-Ingest-Pending-Jobs"] = str(freshness.pending_jobs)
+    if freshness.last_success_at is not None:
+        response.headers["X-Ingest-Last-Success"] = freshness.last_success_at.isoformat()
+
+
+def _job_status(job: IngestJob) -> IngestJobStatus:
+    details = job.details_json or {}
+    return IngestJobStatus(
+        jobId=str(job.job_id),
+        cloud=job.cloud,
+        tenantKey=details.get("tenant_key"),
+        status=job.status,
+        windowStart=job.source_window_start,
+        windowEnd=job.source_window_end,
+        createdAt=job.created_at,
+        startedAt=job.started_at,
+        finishedAt=job.finished_at,
+        rowsWritten=details.get("rows_written"),
+        error=job.error_message,
+        shards=details.get("shards") or [],
+    )
+
+
 def _assert_data_coverage(db: Session, cloud: str, start: date, end: date, tenant_id=None) -> None:
-    repo = FactCostRepository(db)
+    auto_ingest = AutoIngestService(db)
     providers = ["aws", "azure", "oci"] if cloud == "all" else [cloud]
     missing: list[str] = []
 
     for provider in providers:
-        if provider == "aws":
-            has_service_data = repo.has_source_data_covering_range(
-                cloud="aws",
-                start=start,
-                end=end,
-                source_ref="aws_ce_service_cli",
-                tenant_id=tenant_id,
-            )
-            has_account_data = repo.has_source_data_covering_range(
-                cloud="aws",
-                start=start,
-                end=end,
-                source_ref="aws_ce_account_cli",
-                tenant_id=tenant_id,
-            )
-            if not (has_service_data and has_account_data):
-                missing.append("aws")
-            continue
-        if not repo.has_data_covering_range(provider, start, end, tenant_id=tenant_id):
-            missing.append(provider)
+        gaps = auto_ingest.missing_ranges(provider, start, end, tenant_id=tenant_id)
+        if gaps:
+            ranges = ", ".join(f"{gap.start.isoformat()}..{gap.end.isoformat()}" for gap in gaps)
+            missing.append(f"{provider} ({ranges})")
 
     if missing:
-        missing_list = ", ".join(sorted(set(missing)))
+        missing_list = "; ".join(sorted(missing))
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=(
@@ -150,14 +182,20 @@ def parse_finops_filters(
     )
 
 
-def ensure_ingest_v2(filters: QueryFilters = Depends(parse_finops_filters), db: Session = Depends(get_db)) -> QueryFilters:
+def ensure_ingest_v2(
+    response: Response,
+    filters: QueryFilters = Depends(parse_finops_filters),
+    db: Session = Depends(get_db),
+) -> QueryFilters:
     tenant = TenantService(db).resolve_tenant(filters.cloud, filters.tenant_key)
     filters.tenant_id = tenant.tenant_id if tenant else None
     AutoIngestService(db).ensure_range(filters.cloud, filters.start, filters.end, tenant_key=filters.tenant_key)
+    _set_freshness_headers(response, db, filters)
     return filters
 
 
 def ensure_ingest_v2_refreshable(
+    response: Response,
     filters: QueryFilters = Depends(parse_finops_filters),
     refresh: bool = Query(default=False),
     db: Session = Depends(get_db),
@@ -165,18 +203,16 @@ def ensure_ingest_v2_refreshable(
     tenant = TenantService(db).resolve_tenant(filters.cloud, filters.tenant_key)
     filters.tenant_id = tenant.tenant_id if tenant else None
     if refresh:
-        providers = ["aws", "azure", "oci"] if filters.cloud == "all" else [filters.cloud]
-        for provider in providers:
-            tenant_keys = _tenant_keys_for_request(db, provider, filters.tenant_key if provider == filters.cloud else None)
-            for current_tenant_key in tenant_keys:
-                run_ingest_job(db, provider=provider, start=filters.start, end=filters.end, tenant_key=current_tenant_key)
+        _refresh_range(db, filters.cloud, filters.start, filters.end, filters.tenant_key)
         CurrencyRateSyncService(db).ensure_brl_usd_rate(filters.end)
     else:
         AutoIngestService(db).ensure_range(filters.cloud, filters.start, filters.end, tenant_key=filters.tenant_key)
+    _set_freshness_headers(response, db, filters)
     return filters
 
 
 def ensure_ingest_v2_summary(
+    response: Response,
     filters: QueryFilters = Depends(parse_finops_filters),
     refresh: bool = Query(default=False),
     db: Session = Depends(get_db),
@@ -186,17 +222,14 @@ def ensure_ingest_v2_summary(
     tenant = TenantService(db).resolve_tenant(filters.cloud, filters.tenant_key)
     filters.tenant_id = tenant.tenant_id if tenant else None
     if refresh:
-        providers = ["aws", "azure", "oci"] if filters.cloud == "all" else [filters.cloud]
-        for provider in providers:
-            tenant_keys = _tenant_keys_for_request(db, provider, filters.tenant_key if provider == filters.cloud else None)
-            for current_tenant_key in tenant_keys:
-                run_ingest_job(db, provider=provider, start=year_start, end=reference_date, tenant_key=current_tenant_key)
+        _refresh_range(db, filters.cloud, year_start, reference_date, filters.tenant_key)
         CurrencyRateSyncService(db).ensure_brl_usd_rate(date.today())
     else:
         AutoIngestService(db).ensure_range(filters.cloud, year_start, reference_date, tenant_key=filters.tenant_key)
         CurrencyRateSyncService(db).ensure_brl_usd_rate(date.today())
     # O summary usa acumulados mensal/anual, mas o dashboard nao deve falhar
     # apenas porque o provider ainda nao fechou o dia corrente.
+    _set_freshness_headers(response, db, filters)
     _assert_data_available(db, filters.cloud, filters.start, filters.end, tenant_id=filters.tenant_id)
     return filters
 
@@ -384,6 +417,33 @@ def post_cost_explorer_insights_v2(
     )
 
 
+@router.get("/export")
+def get_cost_export(
+    filters: QueryFilters = Depends(parse_finops_filters),
+    export_format: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv|arrow)$"),
+    after: str | None = Query(default=None, description="Retoma depois de cost_date,fact_id (ultima linha recebida)"),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    # Sem auto-ingest: exporta o que ja esta na fact_cost_daily, em stream (memoria constante).
+    try:
+        cursor = ExportCursor.decode(after) if after else None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if export_format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="format=arrow requer o pacote pyarrow")
+    tenant = TenantService(db).resolve_tenant(filters.cloud, filters.tenant_key)
+    filters.tenant_id = tenant.tenant_id if tenant else None
+    if export_format == "arrow":
+        body, media_type = stream_arrow(filters, after=cursor), ARROW_MEDIA_TYPE
+    else:
+        body, media_type = stream_export(filters, export_format, after=cursor), EXPORT_MEDIA_TYPES[export_format]
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(filters, export_format)}"'},
+    )
+
+
 @router.post("/reingest", response_model=ReingestResponse)
 def post_reingest(payload: ReingestRequest, db: Session = Depends(get_db)) -> ReingestResponse:
     if payload.from_ > payload.to:
@@ -406,3 +466,28 @@ def post_reingest(payload: ReingestRequest, db: Session = Depends(get_db)) -> Re
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     CurrencyRateSyncService(db).ensure_brl_usd_rate(payload.to)
     return ReingestResponse(results=results)
+
+
+@router.get("/ingest/jobs/{job_id}", response_model=IngestJobStatus)
+def get_ingest_job_status(job_id: UUID, db: Session = Depends(get_db)) -> IngestJobStatus:
+    job = IngestQueueService(db).get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="ingest job não encontrado")
+    return _job_status(job)
+
+
+@router.get("/ingest/status", response_model=IngestStatusResponse)
+def get_ingest_status(
+    cloud: str = Query(default="all", pattern="^(aws|azure|oci|all)$"),
+    tenant_key: str | None = Query(default=None, alias="tenant_key"),
+    db: Session = Depends(get_db),
+) -> IngestStatusResponse:
+    tenant = TenantService(db).resolve_tenant(cloud, tenant_key)
+    tenant_id = tenant.tenant_id if tenant else None
+    queue = IngestQueueService(db)
+    freshness = queue.freshness(cloud, tenant_id=tenant_id)
+    return IngestStatusResponse(
+        status=freshness.status,
+        lastSuccessAt=freshness.last_success_at,
+        pendingJobs=[_job_status(job) for job in queue.pending_jobs(cloud, tenant_id=tenant_id)],
+    )
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import functools
+import inspect
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class MemoStats:
+    hits: int
+    misses: int
+    entries: int
+
+
+class RequestMemo:
+    """Memo de resultados com vida de uma requisicao (sem TTL, sem limite, sem locks).
+
+    Os valores sao devolvidos por referencia: quem consome nao deve muta-los.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[Hashable, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+        self.misses += 1
+        value = fn()
+        self._values[key] = value
+        return value
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    def stats(self) -> MemoStats:
+        return MemoStats(hits=self.hits, misses=self.misses, entries=len(self._values))
+
+
+def memo_key(value: Any) -> Hashable:
+    """Forma hashable e canonica de um argumento (listas viram tuplas, dataclasses viram tuplas de campos)."""
+    normalize = getattr(value, "cache_key", None)
+    if callable(normalize):
+        return normalize()
+    if is_dataclass(value) and not isinstance(value, type):
+        return (type(value).__name__, *(memo_key(getattr(value, item.name)) for item in fields(value)))
+    if isinstance(value, (list, tuple)):
+        return tuple(memo_key(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(memo_key(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, memo_key(item)) for key, item in value.items()))
+    return value
+
+
+def memoized(method: F) -> F:
+    """Memoiza um metodo em `self.memo` (RequestMemo) pela assinatura normalizada da chamada.
+
+    Chamadas posicionais e nomeadas com os mesmos valores caem na mesma chave; sem memo
+    na instancia (memo=None) o metodo roda direto.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        memo: RequestMemo | None = getattr(self, "memo", None)
+        if memo is None:
+            return method(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__, *(memo_key(value) for name, value in bound.arguments.items() if name != "self"))
+        return memo.get_or_compute(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Protocol, TypeVar
+from uuid import UUID
+
+from finops_api.core.config import settings
+from finops_api.core.request_memo import memo_key
+
+try:
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass(frozen=True)
+class CacheScope:
+    """Fatia de dados que um resultado leu (ou que uma escrita alterou).
+
+    tenant_id None e cloud "all" valem para qualquer tenant/cloud.
+    """
+
+    tenant_id: UUID | None = None
+    cloud: str = "all"
+    start: date = date.min
+    end: date = date.max
+
+    def overlaps(self, other: CacheScope) -> bool:
+        if self.tenant_id is not None and other.tenant_id is not None and self.tenant_id != other.tenant_id:
+            return False
+        if self.cloud != "all" and other.cloud != "all" and self.cloud != other.cloud:
+            return False
+        return self.start <= other.end and other.start <= self.end
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "tenant_id": str(self.tenant_id) if self.tenant_id else None,
+                "cloud": self.cloud,
+                "start": self.start.isoformat(),
+                "end": self.end.isoformat(),
+            }
+        )
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> CacheScope:
+        payload = json.loads(raw)
+        return cls(
+            tenant_id=UUID(payload["tenant_id"]) if payload.get("tenant_id") else None,
+            cloud=payload["cloud"],
+            start=date.fromisoformat(payload["start"]),
+            end=date.fromisoformat(payload["end"]),
+        )
+
+
+_MISSING = object()
+
+
+class ResultCacheBackend(Protocol):
+    """Contrato dos backends: TTL por entrada e remocao das entradas cujo escopo intersecta o alvo."""
+
+    def get(self, key: str) -> Any: ...
+
+    def set(self, key: str, value: Any, scope: CacheScope, ttl_seconds: int) -> None: ...
+
+    def invalidate(self, scope: CacheScope) -> int: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryCacheBackend:
+    """Backend em processo: TTL + LRU limitado a `max_entries` (get devolve _MISSING quando nao ha)."""
+
+    def __init__(self, max_entries: int = 2048, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[Any, CacheScope, float]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, _, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, scope: CacheScope, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, scope, self._clock() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, scope: CacheScope) -> int:
+        with self._lock:
+            stale = [key for key, (_, entry_scope, _) in self._entries.items() if entry_scope.overlaps(scope)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Backend compartilhado entre processos (API, worker da fila, CLI).
+
+    Valores em pickle com EX (TTL); o escopo de cada chave fica no hash `<prefix>scopes` para a
+    invalidacao seletiva. A eviccao LRU fica a cargo do Redis (maxmemory-policy allkeys-lru).
+    """
+
+    def __init__(self, client: Any | None = None, url: str | None = None, prefix: str = "finops:result:") -> None:
+        if client is None:
+            if redis is None:
+                raise RuntimeError("pacote redis nao instalado (necessario para RESULT_CACHE_BACKEND=redis)")
+            client = redis.Redis.from_url(url or settings.result_cache_redis_url)
+        self.client = client
+        self.prefix = prefix
+        self.index_key = f"{prefix}scopes"
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key: str, value: Any, scope: CacheScope, ttl_seconds: int) -> None:
+        self.client.hset(self.index_key, key, scope.to_json())
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl_seconds)
+
+    def invalidate(self, scope: CacheScope) -> int:
+        removed = 0
+        for raw_key, raw_scope in self.client.hgetall(self.index_key).items():
+            key = raw_key.decode() if isinstance(raw_key, bytes) else raw_key
+            if CacheScope.from_json(raw_scope).overlaps(scope):
+                removed += int(self.client.delete(self.prefix + key) or 0)
+                self.client.hdel(self.index_key, key)
+            elif not self.client.exists(self.prefix + key):
+                # Entrada ja expirada pelo TTL: so limpa o indice.
+                self.client.hdel(self.index_key, key)
+        return removed
+
+    def clear(self) -> None:
+        for raw_key in self.client.hgetall(self.index_key):
+            key = raw_key.decode() if isinstance(raw_key, bytes) else raw_key
+            self.client.delete(self.prefix + key)
+        self.client.delete(self.index_key)
+
+
+class ResultCache:
+    """Cache de resultados entre requisicoes; falhas do backend degradam para o calculo direto."""
+
+    def __init__(self, backend: ResultCacheBackend, ttl_seconds: int = 300) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(parts: Hashable) -> str:
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def get_or_compute(self, parts: Hashable, scope: CacheScope, fn: Callable[[], Any]) -> Any:
+        key = self.make_key(parts)
+        try:
+            value = self.backend.get(key)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Cache de resultados indisponivel (get): %s", exc)
+            return fn()
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = fn()
+        try:
+            self.backend.set(key, value, scope, self.ttl_seconds)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Cache de resultados indisponivel (set): %s", exc)
+        return value
+
+    def invalidate(self, scope: CacheScope) -> int:
+        try:
+            return self.backend.invalidate(scope)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Falha ao invalidar cache de resultados para %s: %s", scope, exc)
+            return 0
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+_result_cache: ResultCache | None = None
+_result_cache_configured = False
+_result_cache_lock = threading.Lock()
+
+
+def build_result_cache() -> ResultCache | None:
+    backend_name = settings.result_cache_backend.lower().strip()
+    if backend_name in {"", "none", "off", "false"} or settings.result_cache_ttl_seconds <= 0:
+        return None
+    if backend_name == "redis":
+        backend: ResultCacheBackend = RedisCacheBackend(url=settings.result_cache_redis_url)
+    elif backend_name == "memory":
+        backend = MemoryCacheBackend(max_entries=settings.result_cache_max_entries)
+    else:
+        raise ValueError(f"RESULT_CACHE_BACKEND invalido: {settings.result_cache_backend}")
+    return ResultCache(backend, ttl_seconds=settings.result_cache_ttl_seconds)
+
+
+def get_result_cache() -> ResultCache | None:
+    """Cache do processo, criado a partir das settings no primeiro uso (None quando desativado)."""
+    global _result_cache, _result_cache_configured
+    if not _result_cache_configured:
+        with _result_cache_lock:
+            if not _result_cache_configured:
+                _result_cache = build_result_cache()
+                _result_cache_configured = True
+    return _result_cache
+
+
+def set_result_cache(cache: ResultCache | None) -> None:
+    """Troca o cache do processo (ex.: backend externo proprio ou desativar em testes)."""
+    global _result_cache, _result_cache_configured
+    with _result_cache_lock:
+        _result_cache = cache
+        _result_cache_configured = True
+
+
+def invalidate_cached_results(
+    tenant_id: UUID | None = None,
+    cloud: str = "all",
+    start: date = date.min,
+    end: date = date.max,
+) -> int:
+    cache = get_result_cache()
+    if cache is None:
+        return 0
+    removed = cache.invalidate(CacheScope(tenant_id=tenant_id, cloud=cloud, start=start, end=end))
+    if removed:
+        logger.debug("Cache de resultados: %s entradas invalidadas (%s/%s %s..%s)", removed, tenant_id, cloud, start, end)
+    return removed
+
+
+def cached_result(endpoint: str, scope: Callable[[Any], CacheScope] | None = None) -> Callable[[F], F]:
+    """Cacheia o metodo em `self.result_cache` por endpoint + argumentos normalizados.
+
+    O escopo (para invalidacao) vem do argumento com `cache_scope()` (QueryFilters) ou de `scope(filters)`.
+    Sem cache na instancia ou sem filtros na chamada o metodo roda direto.
+    """
+
+    def decorator(method: F) -> F:
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache: ResultCache | None = getattr(self, "result_cache", None)
+            if cache is None:
+                return method(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = [value for name, value in bound.arguments.items() if name != "self"]
+            filters = next((value for value in arguments if callable(getattr(value, "cache_scope", None))), None)
+            if filters is None:
+                return method(self, *args, **kwargs)
+            entry_scope = scope(filters) if scope is not None else filters.cache_scope()
+            parts = (endpoint, *(memo_key(value) for value in arguments))
+            return cache.get_or_compute(parts, entry_scope, lambda: method(self, *args, **kwargs))
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,73 @@
+"""ingest coverage intervals
+
+Revision ID: 0004_ingest_coverage
+Revises: 0003_auth
+Create Date: 2026-10-18 00:00:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0004_ingest_coverage"
+down_revision = "0003_auth"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    if not inspector.has_table("ingest_coverage"):
+        op.create_table(
+            "ingest_coverage",
+            sa.Column("coverage_id", postgresql.UUID(as_uuid=True), server_default=sa.text("gen_random_uuid()"), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("cloud", sa.String(length=16), nullable=False),
+            sa.Column("source_ref", sa.String(length=128), nullable=False),
+            sa.Column("start_date", sa.Date(), nullable=False),
+            sa.Column("end_date", sa.Date(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+            sa.ForeignKeyConstraint(["tenant_id"], ["dim_tenant.tenant_id"], name=op.f("fk_ingest_coverage_tenant_id_dim_tenant"), ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("coverage_id", name=op.f("pk_ingest_coverage")),
+        )
+        op.create_index(
+            "ix_ingest_coverage_tenant_cloud_source",
+            "ingest_coverage",
+            ["tenant_id", "cloud", "source_ref", "start_date"],
+            unique=False,
+        )
+
+        # Backfill a partir da fact: cada ilha de dias consecutivos com dados vira um intervalo
+        # (gaps-and-islands), preservando buracos no meio do periodo.
+        op.execute(
+            """
+            INSERT INTO ingest_coverage (tenant_id, cloud, source_ref, start_date, end_date)
+            SELECT tenant_id, cloud, source, MIN(cost_date), MAX(cost_date)
+            FROM (
+                SELECT
+                    tenant_id,
+                    cloud::text AS cloud,
+                    source,
+                    cost_date,
+                    cost_date - (DENSE_RANK() OVER (PARTITION BY tenant_id, cloud, source ORDER BY cost_date))::int AS island
+                FROM (
+                    SELECT DISTINCT tenant_id, cloud, source, cost_date
+                    FROM fact_cost_daily
+                    WHERE tenant_id IS NOT NULL AND source IS NOT NULL
+                ) AS days
+            ) AS islands
+            GROUP BY tenant_id, cloud, source, island
+            """
+        )
+
+
+def downgrade() -> None:
+    if inspect(op.get_bind()).has_table("ingest_coverage"):
+        op.drop_index("ix_ingest_coverage_tenant_cloud_source", table_name="ingest_coverage")
+        op.drop_table("ingest_coverage")
@@ -0,0 +1,97 @@
+"""daily cost rollup
+
+Revision ID: 0005_cost_daily_rollup
+Revises: 0004_ingest_coverage
+Create Date: 2026-10-18 00:00:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0005_cost_daily_rollup"
+down_revision = "0004_ingest_coverage"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    if not inspector.has_table("agg_cost_daily_rollup"):
+        op.create_table(
+            "agg_cost_daily_rollup",
+            sa.Column("rollup_id", postgresql.UUID(as_uuid=True), server_default=sa.text("gen_random_uuid()"), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("cloud", sa.String(length=16), nullable=False),
+            sa.Column("cost_date", sa.Date(), nullable=False),
+            sa.Column("source", sa.String(length=128), nullable=False),
+            sa.Column("service_key", sa.String(length=256), nullable=False),
+            sa.Column("service_name", sa.String(length=256), nullable=False),
+            sa.Column("scope_key", sa.String(length=256), nullable=False),
+            sa.Column("scope_name", sa.String(length=256), nullable=True),
+            sa.Column("amount", sa.Numeric(20, 6), nullable=False),
+            sa.Column("amount_brl", sa.Numeric(20, 6), nullable=False),
+            sa.Column("usd_without_brl", sa.Numeric(20, 6), nullable=False),
+            sa.Column("other_without_brl", sa.Numeric(20, 6), nullable=False),
+            sa.Column("row_count", sa.Integer(), nullable=False),
+            sa.Column("refreshed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+            sa.ForeignKeyConstraint(["tenant_id"], ["dim_tenant.tenant_id"], name=op.f("fk_agg_cost_daily_rollup_tenant_id_dim_tenant"), ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("rollup_id", name=op.f("pk_agg_cost_daily_rollup")),
+        )
+        op.create_index(
+            "ix_agg_cost_daily_rollup_tenant_cloud_cost_date",
+            "agg_cost_daily_rollup",
+            ["tenant_id", "cloud", "cost_date"],
+            unique=False,
+        )
+        op.create_index(
+            "ix_agg_cost_daily_rollup_cost_date_cloud",
+            "agg_cost_daily_rollup",
+            ["cost_date", "cloud"],
+            unique=False,
+        )
+
+        # Backfill com o mesmo agrupamento do CostRollupRepository.refresh.
+        op.execute(
+            """
+            INSERT INTO agg_cost_daily_rollup (
+                tenant_id, cloud, cost_date, source, service_key, service_name, scope_key, scope_name,
+                amount, amount_brl, usd_without_brl, other_without_brl, row_count
+            )
+            SELECT
+                f.tenant_id,
+                f.cloud::text,
+                f.cost_date,
+                f.source,
+                COALESCE(s.service_key, f.service_key),
+                COALESCE(s.service_name, f.service_key),
+                COALESCE(sc.scope_key, f.scope_key),
+                sc.scope_name,
+                SUM(f.amount),
+                COALESCE(SUM(f.amount_brl), 0),
+                COALESCE(SUM(f.amount) FILTER (WHERE f.amount_brl IS NULL AND f.currency = 'USD'), 0),
+                COALESCE(SUM(f.amount) FILTER (WHERE f.amount_brl IS NULL AND f.currency <> 'USD'), 0),
+                COUNT(*)
+            FROM fact_cost_daily AS f
+            LEFT JOIN dim_service AS s ON s.service_id = f.service_id
+            LEFT JOIN dim_scope AS sc ON sc.scope_id = f.scope_id
+            WHERE f.tenant_id IS NOT NULL
+            GROUP BY
+                f.tenant_id, f.cloud, f.cost_date, f.source,
+                COALESCE(s.service_key, f.service_key), COALESCE(s.service_name, f.service_key),
+                COALESCE(sc.scope_key, f.scope_key), sc.scope_name
+            """
+        )
+
+
+def downgrade() -> None:
+    if inspect(op.get_bind()).has_table("agg_cost_daily_rollup"):
+        op.drop_index("ix_agg_cost_daily_rollup_cost_date_cloud", table_name="agg_cost_daily_rollup")
+        op.drop_index("ix_agg_cost_daily_rollup_tenant_cloud_cost_date", table_name="agg_cost_daily_rollup")
+        op.drop_table("agg_cost_daily_rollup")
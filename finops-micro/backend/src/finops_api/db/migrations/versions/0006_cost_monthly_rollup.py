@@ -0,0 +1,83 @@
+"""monthly cost rollup
+
+Revision ID: 0006_cost_monthly_rollup
+Revises: 0005_cost_daily_rollup
+Create Date: 2026-10-18 00:00:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0006_cost_monthly_rollup"
+down_revision = "0005_cost_daily_rollup"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    if not inspector.has_table("agg_cost_monthly_rollup"):
+        op.create_table(
+            "agg_cost_monthly_rollup",
+            sa.Column("rollup_id", postgresql.UUID(as_uuid=True), server_default=sa.text("gen_random_uuid()"), nullable=False),
+            sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("cloud", sa.String(length=16), nullable=False),
+            sa.Column("month_start", sa.Date(), nullable=False),
+            sa.Column("source", sa.String(length=128), nullable=False),
+            sa.Column("service_key", sa.String(length=256), nullable=False),
+            sa.Column("service_name", sa.String(length=256), nullable=False),
+            sa.Column("scope_key", sa.String(length=256), nullable=False),
+            sa.Column("scope_name", sa.String(length=256), nullable=True),
+            sa.Column("amount", sa.Numeric(20, 6), nullable=False),
+            sa.Column("amount_brl", sa.Numeric(20, 6), nullable=False),
+            sa.Column("usd_without_brl", sa.Numeric(20, 6), nullable=False),
+            sa.Column("other_without_brl", sa.Numeric(20, 6), nullable=False),
+            sa.Column("row_count", sa.Integer(), nullable=False),
+            sa.Column("refreshed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+            sa.ForeignKeyConstraint(["tenant_id"], ["dim_tenant.tenant_id"], name=op.f("fk_agg_cost_monthly_rollup_tenant_id_dim_tenant"), ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("rollup_id", name=op.f("pk_agg_cost_monthly_rollup")),
+        )
+        op.create_index(
+            "ix_agg_cost_monthly_rollup_tenant_cloud_month",
+            "agg_cost_monthly_rollup",
+            ["tenant_id", "cloud", "month_start"],
+            unique=False,
+        )
+        op.create_index(
+            "ix_agg_cost_monthly_rollup_month_cloud",
+            "agg_cost_monthly_rollup",
+            ["month_start", "cloud"],
+            unique=False,
+        )
+
+        # Backfill a partir da rollup diaria (preenchida pela 0005).
+        op.execute(
+            """
+            INSERT INTO agg_cost_monthly_rollup (
+                tenant_id, cloud, month_start, source, service_key, service_name, scope_key, scope_name,
+                amount, amount_brl, usd_without_brl, other_without_brl, row_count
+            )
+            SELECT
+                tenant_id, cloud, date_trunc('month', cost_date)::date, source,
+                service_key, service_name, scope_key, scope_name,
+                SUM(amount), SUM(amount_brl), SUM(usd_without_brl), SUM(other_without_brl), SUM(row_count)
+            FROM agg_cost_daily_rollup
+            GROUP BY
+                tenant_id, cloud, date_trunc('month', cost_date)::date, source,
+                service_key, service_name, scope_key, scope_name
+            """
+        )
+
+
+def downgrade() -> None:
+    if inspect(op.get_bind()).has_table("agg_cost_monthly_rollup"):
+        op.drop_index("ix_agg_cost_monthly_rollup_month_cloud", table_name="agg_cost_monthly_rollup")
+        op.drop_index("ix_agg_cost_monthly_rollup_tenant_cloud_month", table_name="agg_cost_monthly_rollup")
+        op.drop_table("agg_cost_monthly_rollup")
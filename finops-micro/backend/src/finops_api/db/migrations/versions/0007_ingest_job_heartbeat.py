@@ -0,0 +1,32 @@
+"""ingest job heartbeat
+
+Revision ID: 0007_ingest_job_heartbeat
+Revises: 0006_cost_monthly_rollup
+Create Date: 2026-10-18 00:00:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision = "0007_ingest_job_heartbeat"
+down_revision = "0006_cost_monthly_rollup"
+branch_labels = None
+depends_on = None
+
+
+def _has_heartbeat() -> bool:
+    return any(column["name"] == "heartbeat_at" for column in inspect(op.get_bind()).get_columns("ingest_job"))
+
+
+def upgrade() -> None:
+    if not _has_heartbeat():
+        op.add_column("ingest_job", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    if _has_heartbeat():
+        op.drop_column("ingest_job", "heartbeat_at")
@@ -1,11 +1,148 @@
 from __future__ import annotations
 
 import argparse
+import sys
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date
+from uuid import UUID
 
 from finops_api.db.session import SessionLocal
+from finops_api.repositories.cost_rollup_repo import CostRollupRepository
+from finops_api.repositories.coverage_repo import DateRange
+from finops_api.repositories.fact_cost_export_repo import ExportCursor
+from finops_api.repositories.fact_cost_repo import QueryFilters
+from finops_api.services.auto_ingest_service import AutoIngestService
+from finops_api.services.cost_columnar_export_service import stream_arrow, write_parquet_dataset
+from finops_api.services.cost_export_service import stream_export
 from finops_api.services.currency_rate_sync_service import CurrencyRateSyncService
-from finops_api.services.ingest_service import run_ingest_job
+from finops_api.services.ingest_service import resume_ingest_job, run_ingest_job, sync_aws_account_names
+from finops_api.services.tenant_service import TenantService
+
+
+@dataclass
+class PairReport:
+    provider: str
+    tenant_key: str | None
+    rows_received: int = 0
+    rows_written: int = 0
+    windows: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+
+
+def expand_pairs(providers: list[str]) -> list[tuple[str, str | None]]:
+    """Todos os pares (provider, tenant) configurados via *_TENANTS / TENANT_CONFIGS_JSON.
+
+    Provider sem tenant configurado vira (provider, None): resolve_tenant usa o tenant ativo unico.
+    """
+    tenant_service = TenantService()
+    pairs: list[tuple[str, str | None]] = []
+    for provider in providers:
+        configs = tenant_service.get_runtime_configs(provider)
+        if configs:
+            pairs.extend((provider, config.tenant_key) for config in configs)
+        else:
+            pairs.append((provider, None))
+    return pairs
+
+
+def ingest_pair(provider: str, tenant_key: str | None, start: date, end: date, incremental: bool = False) -> PairReport:
+    # Sessao propria por par: Session nao e thread-safe e cada job commita de forma independente.
+    report = PairReport(provider=provider, tenant_key=tenant_key)
+    started = time.perf_counter()
+    try:
+        with SessionLocal() as session:
+            windows = [DateRange(start, end)]
+            if incremental:
+                tenant = TenantService(session).resolve_tenant(provider, tenant_key)
+                windows = AutoIngestService(session).plan_ranges(
+                    provider, start, end, tenant_id=tenant.tenant_id if tenant else None
+                )
+            for window in windows:
+                result = run_ingest_job(session, provider=provider, start=window.start, end=window.end, tenant_key=tenant_key)
+                report.rows_received += int(result.get("rows_received") or 0)
+                report.rows_written += int(result.get("rows_written") or 0)
+                report.windows += 1
+    except Exception as exc:  # noqa: BLE001
+        report.error = str(exc)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def run_pairs(
+    pairs: list[tuple[str, str | None]],
+    start: date,
+    end: date,
+    parallel: int,
+    incremental: bool = False,
+) -> list[PairReport]:
+    with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(pairs) or 1)), thread_name_prefix="ingest-pair") as pool:
+        return list(pool.map(lambda pair: ingest_pair(pair[0], pair[1], start, end, incremental=incremental), pairs))
+
+
+def print_report(reports: list[PairReport], wall_clock: float) -> None:
+    for report in reports:
+        label = f"[{report.provider}/{report.tenant_key or 'default'}]"
+        if report.error:
+            print(f"{label} falhou em {report.elapsed:.1f}s: {report.error}")
+            continue
+        rate = report.rows_written / report.elapsed if report.elapsed else 0.0
+        print(
+            f"{label} janelas={report.windows} recebido={report.rows_received} gravado={report.rows_written} "
+            f"tempo={report.elapsed:.1f}s rows/s={rate:.0f}"
+        )
+    written = sum(report.rows_written for report in reports)
+    serial = sum(report.elapsed for report in reports)
+    failed = sum(1 for report in reports if report.error)
+    print(
+        f"[total] pares={len(reports)} falhas={failed} gravado={written} "
+        f"tempo={wall_clock:.1f}s (serial={serial:.1f}s) rows/s={written / wall_clock if wall_clock else 0.0:.0f}"
+    )
+
+
+def export_costs(args: argparse.Namespace) -> None:
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end)
+    if start > end:
+        raise ValueError("start deve ser menor ou igual a end")
+    filters = QueryFilters(
+        cloud=args.provider,
+        start=start,
+        end=end,
+        currency="USD",
+        tenant_key=args.tenant_key,
+        services=args.service or None,
+        accounts=args.account or None,
+    )
+    with SessionLocal() as session:
+        tenant = TenantService(session).resolve_tenant(filters.cloud, filters.tenant_key)
+        filters.tenant_id = tenant.tenant_id if tenant else None
+    after = ExportCursor.decode(args.after) if args.after else None
+    if args.format == "parquet":
+        if args.output == "-" or after is not None:
+            raise ValueError("parquet grava um diretorio particionado: informe --output <dir> e nao use --after")
+        report = write_parquet_dataset(filters, args.output)
+        print(f"[export] linhas={report.rows} arquivos={len(report.files)} bytes={report.bytes_written}")
+        return
+    if args.format == "arrow":
+        write_chunks(stream_arrow(filters, after=after), args.output, binary=True)
+    else:
+        write_chunks(stream_export(filters, args.format, after=after), args.output, binary=False)
+
+
+def write_chunks(chunks: Iterable[str] | Iterable[bytes], output: str, binary: bool) -> None:
+    if output == "-":
+        target = sys.stdout.buffer if binary else sys.stdout
+        for chunk in chunks:
+            target.write(chunk)
+        return
+    handle = open(output, "wb") if binary else open(output, "w", encoding="utf-8", newline="")
+    with handle:
+        for chunk in chunks:
+            handle.write(chunk)
 
 
 def main() -> None:
@@ -23,25 +160,89 @@ def main() -> None:
     )
     parser_providers.add_argument("--start", required=False, help="Data inicial YYYY-MM-DD")
     parser_providers.add_argument("--end", required=False, help="Data final YYYY-MM-DD")
+    parser_providers.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Pares (provider, tenant) processados em paralelo, cada um com sua sessao",
+    )
+    parser_providers.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Busca apenas os dias sem cobertura e os ultimos INGEST_RESTATEMENT_LOOKBACK_DAYS dias",
+    )
+
+    parser_resume = subparsers.add_parser("resume", help="Reprocessa apenas os shards com falha de um ingest job")
+    parser_resume.add_argument("--job-id", required=True, help="job_id do ingest_job")
+
+    parser_rollup = subparsers.add_parser("rollup", help="Recalcula a agg_cost_daily_rollup a partir da fact_cost_daily")
+    parser_rollup.add_argument("--provider", choices=["aws", "azure", "oci", "all"], default="all", help="Provider alvo ou all")
+    parser_rollup.add_argument("--start", required=True, help="Data inicial YYYY-MM-DD")
+    parser_rollup.add_argument("--end", required=True, help="Data final YYYY-MM-DD")
+
+    subparsers.add_parser("account-names", help="Grava AWS_ACCOUNT_NAMES_JSON em dim_scope e nas rollups")
+
+    parser_export = subparsers.add_parser(
+        "export", help="Exporta linhas cruas da fact_cost_daily em NDJSON, CSV, Arrow IPC ou Parquet particionado"
+    )
+    parser_export.add_argument("--provider", choices=["aws", "azure", "oci", "all"], default="all", help="Provider alvo ou all")
+    parser_export.add_argument("--tenant-key", required=False, help="Tenant (obrigatorio quando o provider tem varios)")
+    parser_export.add_argument("--start", required=True, help="Data inicial YYYY-MM-DD")
+    parser_export.add_argument("--end", required=True, help="Data final YYYY-MM-DD")
+    parser_export.add_argument("--format", choices=["ndjson", "csv", "arrow", "parquet"], default="ndjson")
+    parser_export.add_argument(
+        "--output", default="-", help="Arquivo de saida (- para stdout); com parquet, diretorio raiz das particoes"
+    )
+    parser_export.add_argument("--service", action="append", help="Filtra por servico (pode repetir)")
+    parser_export.add_argument("--account", action="append", help="Filtra por conta (pode repetir)")
+    parser_export.add_argument("--after", required=False, help="Retoma depois de cost_date,fact_id")
 
     args = parser.parse_args()
 
+    if args.mode == "resume":
+        with SessionLocal() as session:
+            result = resume_ingest_job(session, UUID(args.job_id))
+            print(f"[{result['provider']}] recebido={result['rows_received']} gravado={result['rows_written']}")
+        return
+
+    if args.mode == "rollup":
+        with SessionLocal() as session:
+            written = CostRollupRepository(session).rebuild(
+                date.fromisoformat(args.start),
+                date.fromisoformat(args.end),
+                cloud=None if args.provider == "all" else args.provider,
+            )
+            print(f"[rollup] linhas agregadas={written}")
+        return
+
+    if args.mode == "account-names":
+        with SessionLocal() as session:
+            print(f"[account-names] scopes atualizados={sync_aws_account_names(session)}")
+        return
+
+    if args.mode == "export":
+        export_costs(args)
+        return
+
     end = date.fromisoformat(args.end) if args.end else date.today()
     start = date.fromisoformat(args.start) if args.start else date(end.year, 1, 1)
     if start > end:
         raise ValueError("start deve ser menor ou igual a end")
 
     providers = ["aws", "azure", "oci"] if args.provider == "all" else [args.provider]
+    pairs = expand_pairs(providers)
+    started = time.perf_counter()
+    reports = run_pairs(pairs, start, end, args.parallel, incremental=args.incremental)
+    print_report(reports, time.perf_counter() - started)
+
     with SessionLocal() as session:
-        for provider in providers:
-            result = run_ingest_job(session, provider=provider, start=start, end=end)
-            print(
-                f"[{provider}] recebido={result['rows_received']} gravado={result['rows_written']}"
-            )
         rate = CurrencyRateSyncService(session).ensure_brl_usd_rate(end)
         if rate is not None:
             print(f"[currency] USD/BRL em {end.isoformat()} = {rate:.6f}")
 
+    if any(report.error for report in reports):
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
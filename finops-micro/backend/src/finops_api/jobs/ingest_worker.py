@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+
+from finops_api.core.config import settings
+from finops_api.db.session import SessionLocal
+from finops_api.services.ingest_queue_service import IngestQueueService
+from finops_api.services.ingest_service import sync_aws_account_names
+
+logger = logging.getLogger(__name__)
+
+
+def drain_queue(max_jobs: int | None = None) -> int:
+    """Processa jobs enfileirados ate a fila esvaziar (ou max_jobs). Retorna quantos rodaram."""
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        with SessionLocal() as session:
+            if IngestQueueService(session).run_next() is None:
+                break
+        processed += 1
+    return processed
+
+
+def sync_account_names_on_startup() -> None:
+    """Aplica AWS_ACCOUNT_NAMES_JSON uma vez ao iniciar o worker, fora do caminho das requisicoes."""
+    if not settings.aws_account_names_sync_on_startup:
+        return
+    try:
+        with SessionLocal() as session:
+            changed = sync_aws_account_names(session)
+        if changed:
+            logger.info("Nomes de conta AWS sincronizados em dim_scope: %s scopes", changed)
+    except Exception as exc:  # noqa: BLE001
+        # Banco indisponivel na subida nao para o worker; a proxima ingestao aplica os nomes.
+        logger.warning("Falha ao sincronizar nomes de conta AWS: %s", exc)
+
+
+def run_worker(stop_event: threading.Event, poll_seconds: float | None = None) -> None:
+    interval = settings.ingest_worker_poll_seconds if poll_seconds is None else poll_seconds
+    logger.info("Ingest worker iniciado (poll=%ss)", interval)
+    # Antes da fila: o UPDATE em dim_scope e rollups nao segura a subida da API (thread do worker
+    # embutido ou processo do worker dedicado).
+    sync_account_names_on_startup()
+    while not stop_event.is_set():
+        try:
+            drain_queue()
+        except Exception:  # noqa: BLE001
+            logger.exception("Falha no loop do ingest worker")
+        stop_event.wait(interval)
+    logger.info("Ingest worker finalizado")
+
+
+class EmbeddedIngestWorker:
+    """Worker em thread daemon dentro do processo da API (INGEST_WORKER_EMBEDDED=true)."""
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=run_worker, args=(self._stop,), name="ingest-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker da fila de ingestao (tabela ingest_job)")
+    parser.add_argument("--once", action="store_true", help="Processa a fila atual e sai")
+    parser.add_argument("--poll-seconds", type=float, default=None, help="Intervalo entre varreduras da fila")
+    args = parser.parse_args()
+
+    if args.once:
+        sync_account_names_on_startup()
+        print(f"[worker] jobs processados={drain_queue()}")
+        return
+    stop_event = threading.Event()
+    try:
+        run_worker(stop_event, poll_seconds=args.poll_seconds)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,11 +11,26 @@ from fastapi.responses import JSONResponse
 from finops_api.api.v1 import router as api_v1_router
 from finops_api.core.config import settings
 from finops_api.core.logging import setup_logging
+from finops_api.jobs.ingest_worker import EmbeddedIngestWorker
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title=settings.app_name, debug=settings.debug)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Sem escrita no banco aqui: a sincronizacao dos nomes de conta roda na thread do worker.
+    worker = EmbeddedIngestWorker() if settings.ingest_queue_enabled and settings.ingest_worker_embedded else None
+    if worker is not None:
+        worker.start()
+    try:
+        yield
+    finally:
+        if worker is not None:
+            worker.stop()
+
+
+app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +39,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
     allow_credentials=True,
+    expose_headers=["X-Ingest-Status", "X-Ingest-Pending-Jobs", "X-Ingest-Last-Success"],
 )
 
 
@@ -1,3 +1,5 @@
+from finops_api.models.agg_cost_daily_rollup import CostDailyRollup
+from finops_api.models.agg_cost_monthly_rollup import CostMonthlyRollup
 from finops_api.models.auth_email_verification_token import AuthEmailVerificationToken
 from finops_api.models.auth_session import AuthSession
 from finops_api.models.auth_user import AuthUser
@@ -8,6 +10,7 @@ from finops_api.models.dim_scope import DimScope
 from finops_api.models.dim_service import DimService
 from finops_api.models.fact_cost_daily import FactCostDaily
 from finops_api.models.fact_ingest_audit import FactIngestAudit
+from finops_api.models.ingest_coverage import IngestCoverage
 from finops_api.models.ingest_job import IngestJob
 
 __all__ = [
@@ -20,6 +23,9 @@ __all__ = [
     "DimRegion",
     "DimCurrencyRate",
     "IngestJob",
+    "IngestCoverage",
     "FactCostDaily",
+    "CostDailyRollup",
+    "CostMonthlyRollup",
     "FactIngestAudit",
 ]
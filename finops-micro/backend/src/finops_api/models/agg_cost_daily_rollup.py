@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, Numeric, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from finops_api.db.base import Base
+
+
+class CostDailyRollup(Base):
+    """Custo diario pre-agregado por (tenant, cloud, dia, source, servico, conta), mantido pelo ingest.
+
+    Os valores ficam separados por componente de moeda para que a conversao BRL aplique a mesma
+    regra da fact_cost_daily (amount_brl quando existe, senao amount * cotacao) sem reagregar.
+    """
+
+    __tablename__ = "agg_cost_daily_rollup"
+    __table_args__ = (
+        Index("ix_agg_cost_daily_rollup_tenant_cloud_cost_date", "tenant_id", "cloud", "cost_date"),
+        Index("ix_agg_cost_daily_rollup_cost_date_cloud", "cost_date", "cloud"),
+    )
+
+    rollup_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("dim_tenant.tenant_id", ondelete="CASCADE"), nullable=False)
+    cloud: Mapped[str] = mapped_column(String(16), nullable=False)
+    usage_date: Mapped[date] = mapped_column("cost_date", Date, nullable=False)
+    source_ref: Mapped[str] = mapped_column("source", String(128), nullable=False)
+    service_key: Mapped[str] = mapped_column(String(256), nullable=False)
+    service_name: Mapped[str] = mapped_column(String(256), nullable=False)
+    scope_key: Mapped[str] = mapped_column(String(256), nullable=False)
+    scope_name: Mapped[str | None] = mapped_column(String(256), nullable=True)
+
+    # amount: soma bruta (visao USD); amount_brl: soma das linhas que ja tem amount_brl;
+    # usd_without_brl / other_without_brl: linhas sem amount_brl, convertidas na consulta.
+    amount: Mapped[float] = mapped_column(Numeric(20, 6), nullable=False)
+    amount_brl: Mapped[float] = mapped_column(Numeric(20, 6), nullable=False)
+    usd_without_brl: Mapped[float] = mapped_column(Numeric(20, 6), nullable=False)
+    other_without_brl: Mapped[float] = mapped_column(Numeric(20, 6), nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
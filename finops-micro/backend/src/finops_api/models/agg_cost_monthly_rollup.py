@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, Numeric, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from finops_api.db.base import Base
+
+
+class CostMonthlyRollup(Base):
+    """Totais mensais derivados da agg_cost_daily_rollup, com os mesmos componentes de moeda."""
+
+    __tablename__ = "agg_cost_monthly_rollup"
+    __table_args__ = (
+        Index("ix_agg_cost_monthly_rollup_tenant_cloud_month", "tenant_id", "cloud", "month_start"),
+        Index("ix_agg_cost_monthly_rollup_month_cloud", "month_start", "cloud"),
+    )
+
+    rollup_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("dim_tenant.tenant_id", ondelete="CASCADE"), nullable=False)
+    cloud: Mapped[str] = mapped_column(String(16), nullable=False)
+    month_start: Mapped[date] = mapped_column(Date, nullable=False)
+    source_ref: Mapped[str] = mapped_column("source", String(128), nullable=False)
+    service_key: Mapped[str] = mapped_column(String(256), nullable=False)
+    service_name: Mapped[str] = mapped_column(String(256), nullable=False)
+    scope_key: Mapped[str] = mapped_column(String(256), nullable=False)
+    scope_name: Mapped[str | None] = mapped_column(String(256), nullable=True)
+
+    amount: Mapped[float] = mapped_column(Numeric(20, 6), nullable=False)
+    amount_brl: Mapped[float] = mapped_column(Numeric(20, 6), nullable=False)
+    usd_without_brl: Mapped[float] = mapped_column(Numeric(20, 6), nullable=False)
+    other_without_brl: Mapped[float] = mapped_column(Numeric(20, 6), nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
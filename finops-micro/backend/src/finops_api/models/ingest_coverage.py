@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Index, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from finops_api.db.base import Base
+
+
+class IngestCoverage(Base):
+    """Intervalos de dias ja ingeridos por (tenant, cloud, source_ref), mantidos disjuntos e nao adjacentes."""
+
+    __tablename__ = "ingest_coverage"
+    __table_args__ = (
+        Index("ix_ingest_coverage_tenant_cloud_source", "tenant_id", "cloud", "source_ref", "start_date"),
+    )
+
+    coverage_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("dim_tenant.tenant_id", ondelete="CASCADE"), nullable=False)
+    cloud: Mapped[str] = mapped_column(String(16), nullable=False)
+    source_ref: Mapped[str] = mapped_column(String(128), nullable=False)
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -19,6 +19,7 @@ class IngestJob(Base):
     status: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     source: Mapped[str] = mapped_column(String(64), nullable=False, server_default=text("'provider_cli'"))
     source_window_start: Mapped[date | None] = mapped_column(Date, nullable=True)
     source_window_end: Mapped[date | None] = mapped_column(Date, nullable=True)
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import json
 import subprocess
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import date, timedelta
 from decimal import Decimal
@@ -17,6 +19,7 @@ class AwsCliSettings:
     profile: str | None = None
     metric: str = "UnblendedCost"
     account_names: dict[str, str] | None = None
+    max_workers: int = 2
 
 
 class AwsCliClient:
@@ -25,28 +28,52 @@ class AwsCliClient:
         self.account_names = settings.account_names or self._load_account_names()
 
     def fetch_daily_costs(self, start: date, end: date) -> list[CanonicalCostRow]:
-        service_rows = self._fetch_grouped_rows(start, end, group_by_keys=["SERVICE"])
-        account_rows = self._fetch_grouped_rows(start, end, group_by_keys=["LINKED_ACCOUNT"])
-        return service_rows + account_rows
+        return list(self.iter_daily_costs(start, end))
 
-    def _fetch_grouped_rows(self, start: date, end: date, group_by_keys: list[str]) -> list[CanonicalCostRow]:
-        end_exclusive = end + timedelta(days=1)
-        all_results: list[dict[str, Any]] = []
-        group_definitions: list[dict[str, Any]] = []
-        next_token: str | None = None
-
-        while True:
-            payload = self._run_ce_query(start, end_exclusive, next_token, group_by_keys=group_by_keys)
-            all_results.extend(payload.get("ResultsByTime", []))
-            if not group_definitions:
-                group_definitions = payload.get("GroupDefinitions", [])
-            next_token = payload.get("NextPageToken")
-            if not next_token:
-                break
+    def iter_daily_costs(self, start: date, end: date) -> Iterator[CanonicalCostRow]:
+        """Busca SERVICE e LINKED_ACCOUNT em paralelo, limitado por max_workers.
 
+        Cada stream tem no maximo uma pagina em voo: a proxima e disparada assim que o
+        NextPageToken chega, antes do parse da pagina atual. As linhas de um mesmo
+        source_ref continuam em ordem crescente de dia; streams diferentes se intercalam.
+        """
+        end_exclusive = end + timedelta(days=1)
+        streams: list[list[str]] = [["SERVICE"], ["LINKED_ACCOUNT"]]
+        group_definitions: dict[str, list[dict[str, Any]]] = {}
+
+        with ThreadPoolExecutor(max_workers=max(self.settings.max_workers, 1), thread_name_prefix="aws-ce") as pool:
+            pending: dict[Future[dict[str, Any]], list[str]] = {
+                pool.submit(self._run_ce_query, start, end_exclusive, None, group_by_keys): group_by_keys
+                for group_by_keys in streams
+            }
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        group_by_keys = pending.pop(future)
+                        payload = future.result()
+                        next_token = payload.get("NextPageToken")
+                        if next_token:
+                            next_page = pool.submit(self._run_ce_query, start, end_exclusive, next_token, group_by_keys)
+                            pending[next_page] = group_by_keys
+
+                        definitions = group_definitions.setdefault(group_by_keys[0], [])
+                        if not definitions:
+                            definitions.extend(payload.get("GroupDefinitions", []))
+                        yield from self._parse_results(group_by_keys, payload.get("ResultsByTime", []), definitions)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _parse_results(
+        self,
+        group_by_keys: list[str],
+        results: list[dict[str, Any]],
+        group_definitions: list[dict[str, Any]],
+    ) -> list[CanonicalCostRow]:
         if group_by_keys == ["SERVICE"]:
-            return self._parse_service_results(all_results, group_definitions)
-        return self._parse_account_results(all_results, group_definitions)
+            return self._parse_service_results(results, group_definitions)
+        return self._parse_account_results(results, group_definitions)
 
     def _run_ce_query(
         self,
@@ -162,10 +189,4 @@ class AwsCliClient:
 
     @staticmethod
     def _load_account_names() -> dict[str, str]:
-        try:
-            raw = json.loads(settings.aws_account_names_json or "{}")
-        except json.JSONDecodeError:
-            return {}
-        if not isinstance(raw, dict):
-            return {}
-        return {str(key).strip(): str(value).strip() for key, value in raw.items() if str(key).strip()}
+        return settings.aws_account_names
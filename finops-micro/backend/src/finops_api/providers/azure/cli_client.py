@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import json
 import subprocess
+from collections.abc import Iterator
 from dataclasses import dataclass
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Any
 
@@ -15,6 +16,9 @@ class AzureCliSettings:
     management_group_id: str
     api_version: str = "2023-11-01"
     cli_path: str = "az"
+    # Dias por consulta: o nextLink nao garante ordem por dia, entao cada janela e lida inteira e
+    # ordenada antes de seguir; a memoria fica limitada a uma janela, nao ao periodo todo.
+    window_days: int = 7
 
 
 class AzureCliClient:
@@ -30,6 +34,20 @@ class AzureCliClient:
         )
 
     def fetch_daily_costs(self, start: date, end: date) -> list[CanonicalCostRow]:
+        return list(self.iter_daily_costs(start, end))
+
+    def iter_daily_costs(self, start: date, end: date) -> Iterator[CanonicalCostRow]:
+        """Linhas em ordem crescente de usage_date, consultando janelas de window_days dias."""
+        step = max(int(self.settings.window_days), 1)
+        window_start = start
+        while window_start <= end:
+            window_end = min(end, window_start + timedelta(days=step - 1))
+            rows = list(self._iter_window(window_start, window_end))
+            rows.sort(key=lambda row: row.usage_date)
+            yield from rows
+            window_start = window_end + timedelta(days=1)
+
+    def _iter_window(self, start: date, end: date) -> Iterator[CanonicalCostRow]:
         payload = {
             "type": "ActualCost",
             "timeframe": "Custom",
@@ -45,13 +63,11 @@ class AzureCliClient:
             },
         }
 
-        rows: list[CanonicalCostRow] = []
         next_uri = self.endpoint
         while next_uri:
             response = self._run_query(next_uri, payload)
-            rows.extend(self._parse(response))
+            yield from self._parse(response)
             next_uri = (response.get("properties") or {}).get("nextLink")
-        return rows
 
     def _run_query(self, uri: str, payload: dict[str, Any]) -> dict[str, Any]:
         command = [
@@ -72,13 +88,12 @@ class AzureCliClient:
             raise RuntimeError(f"Falha no Azure CLI: {error_text}")
         return json.loads(result.stdout)
 
-    def _parse(self, payload: dict[str, Any]) -> list[CanonicalCostRow]:
+    def _parse(self, payload: dict[str, Any]) -> Iterator[CanonicalCostRow]:
         props = payload.get("properties", {})
         raw_rows = props.get("rows") or []
         columns = [c.get("name") for c in (props.get("columns") or [])]
         default_currency = str(props.get("currency") or "BRL").strip().upper() or "BRL"
 
-        parsed: list[CanonicalCostRow] = []
         for raw in raw_rows:
             item = dict(zip(columns, raw))
             usage_date = self._parse_usage_date(item.get("UsageDate"))
@@ -95,24 +110,21 @@ class AzureCliClient:
                 or default_currency
             ).strip().upper() or default_currency
 
-            parsed.append(
-                CanonicalCostRow(
-                    cloud="azure",
-                    usage_date=usage_date,
-                    scope_key=subscription,
-                    scope_name=subscription,
-                    service_key=service,
-                    service_name=service,
-                    region_key=region,
-                    region_name=region,
-                    currency_code=currency,
-                    amount=amount,
-                    amount_brl=amount if currency.upper() == "BRL" else None,
-                    source_ref="azure_cost_cli",
-                    metadata_json={"source": "az rest"},
-                )
+            yield CanonicalCostRow(
+                cloud="azure",
+                usage_date=usage_date,
+                scope_key=subscription,
+                scope_name=subscription,
+                service_key=service,
+                service_name=service,
+                region_key=region,
+                region_name=region,
+                currency_code=currency,
+                amount=amount,
+                amount_brl=amount if currency.upper() == "BRL" else None,
+                source_ref="azure_cost_cli",
+                metadata_json={"source": "az rest"},
             )
-        return parsed
 
     @staticmethod
     def _parse_usage_date(value: Any) -> date | None:
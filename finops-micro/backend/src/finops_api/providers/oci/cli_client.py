@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import os
 import subprocess
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
@@ -31,6 +32,9 @@ class OciCliClient:
         self.settings = settings
 
     def fetch_daily_costs(self, start: date, end: date) -> list[CanonicalCostRow]:
+        return list(self.iter_daily_costs(start, end))
+
+    def iter_daily_costs(self, start: date, end: date) -> Iterator[CanonicalCostRow]:
         command = [
             self.settings.cli_path,
             "usage-api",
@@ -63,11 +67,13 @@ class OciCliClient:
         if result.returncode != 0:
             error_text = result.stderr.strip() or result.stdout.strip() or "Falha OCI Usage API"
             raise RuntimeError(f"Falha no OCI CLI: {error_text}")
-        return self._parse(json.loads(result.stdout))
+        yield from self._parse(json.loads(result.stdout))
 
-    def _parse(self, payload: dict[str, Any]) -> list[CanonicalCostRow]:
-        rows: list[CanonicalCostRow] = []
-        for item in ((payload.get("data") or {}).get("items") or []):
+    def _parse(self, payload: dict[str, Any]) -> Iterator[CanonicalCostRow]:
+        items = (payload.get("data") or {}).get("items") or []
+        # A ingestao em streaming espera as linhas em ordem crescente de dia.
+        items = sorted(items, key=lambda item: str(item.get("time-usage-started") or ""))
+        for item in items:
             usage_text = str(item.get("time-usage-started", "")).replace("Z", "+00:00")
             if not usage_text:
                 continue
@@ -83,24 +89,21 @@ class OciCliClient:
             ).strip().upper() or "BRL"
             amount = Decimal(str(item.get("computed-amount") or "0"))
 
-            rows.append(
-                CanonicalCostRow(
-                    cloud="oci",
-                    usage_date=usage_date,
-                    scope_key=compartment,
-                    scope_name=compartment,
-                    service_key=service,
-                    service_name=service,
-                    region_key=self.settings.region,
-                    region_name=self.settings.region,
-                    currency_code=currency,
-                    amount=amount,
-                    amount_brl=amount if currency.upper() == "BRL" else None,
-                    source_ref="oci_usage_cli",
-                    metadata_json={"sku_name": sku_name},
-                )
+            yield CanonicalCostRow(
+                cloud="oci",
+                usage_date=usage_date,
+                scope_key=compartment,
+                scope_name=compartment,
+                service_key=service,
+                service_name=service,
+                region_key=self.settings.region,
+                region_name=self.settings.region,
+                currency_code=currency,
+                amount=amount,
+                amount_brl=amount if currency.upper() == "BRL" else None,
+                source_ref="oci_usage_cli",
+                metadata_json={"sku_name": sku_name},
             )
-        return rows
 
     @staticmethod
     def _iso_z(day: date) -> str:
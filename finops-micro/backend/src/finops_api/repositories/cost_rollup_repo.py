@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from uuid import UUID
+
+from sqlalchemy import Date, String, cast, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from finops_api.models.agg_cost_daily_rollup import CostDailyRollup
+from finops_api.models.agg_cost_monthly_rollup import CostMonthlyRollup
+from finops_api.models.dim_scope import DimScope
+from finops_api.models.dim_service import DimService
+from finops_api.models.dim_tenant import DimTenant
+from finops_api.models.fact_cost_daily import FactCostDaily
+
+ROLLUP_COLUMNS = (
+    "rollup_id",
+    "tenant_id",
+    "cloud",
+    "cost_date",
+    "source",
+    "service_key",
+    "service_name",
+    "scope_key",
+    "scope_name",
+    "amount",
+    "amount_brl",
+    "usd_without_brl",
+    "other_without_brl",
+    "row_count",
+)
+MONTHLY_ROLLUP_COLUMNS = tuple("month_start" if column == "cost_date" else column for column in ROLLUP_COLUMNS)
+
+
+def month_floor(value: date) -> date:
+    return value.replace(day=1)
+
+
+def month_ceil(value: date) -> date:
+    """Ultimo dia do mes de `value`."""
+    next_month = (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+class CostRollupRepository:
+    """Manutencao das rollups (diaria a partir da fact_cost_daily, mensal a partir da diaria)."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def refresh(self, tenant_id: UUID, cloud: str, start: date, end: date) -> int:
+        """Reagrega [start, end] de um (tenant, cloud); nao commita (fica na transacao da fact)."""
+        if start > end:
+            return 0
+        # Serializa delete+insert da mesma fatia entre ingestoes concorrentes do tenant.
+        self.db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"agg_cost_daily_rollup:{tenant_id}:{cloud}"))))
+        self.db.execute(
+            delete(CostDailyRollup)
+            .where(CostDailyRollup.tenant_id == tenant_id)
+            .where(CostDailyRollup.cloud == cloud)
+            .where(CostDailyRollup.usage_date.between(start, end))
+        )
+        result = self.db.execute(
+            insert(CostDailyRollup).from_select(list(ROLLUP_COLUMNS), self._aggregate_stmt(tenant_id, cloud, start, end))
+        )
+        self._refresh_months(tenant_id, cloud, month_floor(start), month_floor(end))
+        return int(result.rowcount or 0)
+
+    def _refresh_months(self, tenant_id: UUID, cloud: str, first_month: date, last_month: date) -> None:
+        # Meses inteiros reagregados a partir da rollup diaria (ja atualizada nesta transacao).
+        self.db.execute(
+            delete(CostMonthlyRollup)
+            .where(CostMonthlyRollup.tenant_id == tenant_id)
+            .where(CostMonthlyRollup.cloud == cloud)
+            .where(CostMonthlyRollup.month_start.between(first_month, last_month))
+        )
+        self.db.execute(
+            insert(CostMonthlyRollup).from_select(
+                list(MONTHLY_ROLLUP_COLUMNS),
+                self._monthly_stmt(tenant_id, cloud, first_month, month_ceil(last_month)),
+            )
+        )
+
+    def rebuild(self, start: date, end: date, cloud: str | None = None) -> int:
+        """Recalcula a janela para todos os tenants (ou os de um cloud), com commit por tenant."""
+        stmt = select(DimTenant.tenant_id, DimTenant.cloud).order_by(DimTenant.cloud, DimTenant.tenant_key)
+        if cloud is not None:
+            stmt = stmt.where(DimTenant.cloud == cloud)
+        written = 0
+        for tenant in self.db.execute(stmt).all():
+            written += self.refresh(tenant.tenant_id, str(tenant.cloud), start, end)
+            self.db.commit()
+        return written
+
+    @staticmethod
+    def _monthly_stmt(tenant_id: UUID, cloud: str, start: date, end: date):
+        month_start = cast(func.date_trunc("month", CostDailyRollup.usage_date), Date)
+        return (
+            select(
+                func.gen_random_uuid(),
+                CostDailyRollup.tenant_id,
+                CostDailyRollup.cloud,
+                month_start,
+                CostDailyRollup.source_ref,
+                CostDailyRollup.service_key,
+                CostDailyRollup.service_name,
+                CostDailyRollup.scope_key,
+                CostDailyRollup.scope_name,
+                func.sum(CostDailyRollup.amount),
+                func.sum(CostDailyRollup.amount_brl),
+                func.sum(CostDailyRollup.usd_without_brl),
+                func.sum(CostDailyRollup.other_without_brl),
+                func.sum(CostDailyRollup.row_count),
+            )
+            .where(CostDailyRollup.tenant_id == tenant_id)
+            .where(CostDailyRollup.cloud == cloud)
+            .where(CostDailyRollup.usage_date.between(start, end))
+            .group_by(
+                CostDailyRollup.tenant_id,
+                CostDailyRollup.cloud,
+                month_start,
+                CostDailyRollup.source_ref,
+                CostDailyRollup.service_key,
+                CostDailyRollup.service_name,
+                CostDailyRollup.scope_key,
+                CostDailyRollup.scope_name,
+            )
+        )
+
+    @staticmethod
+    def _aggregate_stmt(tenant_id: UUID, cloud: str, start: date, end: date):
+        service_key = func.coalesce(DimService.service_key, FactCostDaily.service_key)
+        service_name = func.coalesce(DimService.service_name, FactCostDaily.service_key)
+        scope_key = func.coalesce(DimScope.scope_key, FactCostDaily.scope_key)
+        without_brl = FactCostDaily.amount_brl.is_(None)
+        return (
+            select(
+                func.gen_random_uuid(),
+                FactCostDaily.tenant_id,
+                cast(FactCostDaily.cloud, String),
+                FactCostDaily.usage_date,
+                FactCostDaily.source_ref,
+                service_key,
+                service_name,
+                scope_key,
+                DimScope.scope_name,
+                func.sum(FactCostDaily.amount),
+                func.coalesce(func.sum(FactCostDaily.amount_brl), 0),
+                func.coalesce(func.sum(FactCostDaily.amount).filter(without_brl & (FactCostDaily.currency_code == "USD")), 0),
+                func.coalesce(func.sum(FactCostDaily.amount).filter(without_brl & (FactCostDaily.currency_code != "USD")), 0),
+                func.count(),
+            )
+            .select_from(FactCostDaily)
+            .outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
+            .outerjoin(DimScope, DimScope.scope_id == FactCostDaily.scope_id)
+            .where(FactCostDaily.tenant_id == tenant_id)
+            .where(FactCostDaily.cloud == cloud)
+            .where(FactCostDaily.usage_date.between(start, end))
+            .group_by(
+                FactCostDaily.tenant_id,
+                FactCostDaily.cloud,
+                FactCostDaily.usage_date,
+                FactCostDaily.source_ref,
+                service_key,
+                service_name,
+                scope_key,
+                DimScope.scope_name,
+            )
+        )
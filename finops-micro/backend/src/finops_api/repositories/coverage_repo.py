@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from finops_api.models.ingest_coverage import IngestCoverage
+
+# source_ref gravados por cada provider: uma ingestao bem-sucedida cobre todos eles na janela.
+PROVIDER_SOURCE_REFS: dict[str, tuple[str, ...]] = {
+    "aws": ("aws_ce_service_cli", "aws_ce_account_cli"),
+    "azure": ("azure_cost_cli",),
+    "oci": ("oci_usage_cli",),
+}
+
+
+@dataclass(frozen=True)
+class DateRange:
+    start: date
+    end: date
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+
+def merge_ranges(ranges: Iterable[DateRange]) -> list[DateRange]:
+    """Uniao de intervalos: sobrepostos ou adjacentes (dia seguinte) viram um so."""
+    merged: list[DateRange] = []
+    for item in sorted(ranges, key=lambda value: value.start):
+        if merged and item.start <= merged[-1].end + timedelta(days=1):
+            if item.end > merged[-1].end:
+                merged[-1] = DateRange(merged[-1].start, item.end)
+            continue
+        merged.append(item)
+    return merged
+
+
+def subtract_ranges(window: DateRange, covered: Iterable[DateRange]) -> list[DateRange]:
+    """Sub-intervalos de `window` nao cobertos por `covered` (assumido ordenado e disjunto)."""
+    missing: list[DateRange] = []
+    cursor = window.start
+    for item in covered:
+        if item.end < cursor:
+            continue
+        if item.start > window.end:
+            break
+        if item.start > cursor:
+            missing.append(DateRange(cursor, item.start - timedelta(days=1)))
+        cursor = max(cursor, item.end + timedelta(days=1))
+        if cursor > window.end:
+            return missing
+    if cursor <= window.end:
+        missing.append(DateRange(cursor, window.end))
+    return missing
+
+
+class CoverageRepository:
+    """Cobertura de ingestao em intervalos (tabela ingest_coverage)."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def source_refs_for(self, cloud: str) -> tuple[str, ...]:
+        if cloud == "all":
+            return tuple(source for sources in PROVIDER_SOURCE_REFS.values() for source in sources)
+        return PROVIDER_SOURCE_REFS.get(cloud, ())
+
+    def intervals(
+        self,
+        cloud: str,
+        source_refs: Iterable[str],
+        tenant_id: UUID | None = None,
+        start: date | None = None,
+        end: date | None = None,
+    ) -> list[DateRange]:
+        stmt = select(IngestCoverage.start_date, IngestCoverage.end_date).where(
+            IngestCoverage.source_ref.in_(list(source_refs))
+        )
+        if cloud != "all":
+            stmt = stmt.where(IngestCoverage.cloud == cloud)
+        if tenant_id is not None:
+            stmt = stmt.where(IngestCoverage.tenant_id == tenant_id)
+        if start is not None:
+            stmt = stmt.where(IngestCoverage.end_date >= start - timedelta(days=1))
+        if end is not None:
+            stmt = stmt.where(IngestCoverage.start_date <= end + timedelta(days=1))
+        rows = self.db.execute(stmt.order_by(IngestCoverage.start_date.asc())).all()
+        return merge_ranges(DateRange(row.start_date, row.end_date) for row in rows)
+
+    def missing_ranges(
+        self,
+        cloud: str,
+        start: date,
+        end: date,
+        tenant_id: UUID | None = None,
+        source_ref: str | None = None,
+    ) -> list[DateRange]:
+        """Sub-intervalos de [start, end] sem cobertura para o source_ref (ou para o cloud inteiro)."""
+        if start > end:
+            return []
+        source_refs = (source_ref,) if source_ref else self.source_refs_for(cloud)
+        covered = self.intervals(cloud, source_refs, tenant_id=tenant_id, start=start, end=end)
+        return subtract_ranges(DateRange(start, end), covered)
+
+    def covers(
+        self,
+        cloud: str,
+        start: date,
+        end: date,
+        tenant_id: UUID | None = None,
+        source_ref: str | None = None,
+    ) -> bool:
+        return not self.missing_ranges(cloud, start, end, tenant_id=tenant_id, source_ref=source_ref)
+
+    def add(self, tenant_id: UUID, cloud: str, start: date, end: date, source_refs: Iterable[str] | None = None) -> None:
+        """Une [start, end] aos intervalos existentes; nao commita (fica na transacao do chamador)."""
+        for source in source_refs or self.source_refs_for(cloud):
+            # Serializa o merge por (tenant, cloud, source) entre shards/processos concorrentes.
+            self.db.execute(
+                select(func.pg_advisory_xact_lock(func.hashtext(f"ingest_coverage:{tenant_id}:{cloud}:{source}")))
+            )
+            touching = self.db.execute(
+                select(IngestCoverage.coverage_id, IngestCoverage.start_date, IngestCoverage.end_date)
+                .where(IngestCoverage.tenant_id == tenant_id)
+                .where(IngestCoverage.cloud == cloud)
+                .where(IngestCoverage.source_ref == source)
+                .where(IngestCoverage.end_date >= start - timedelta(days=1))
+                .where(IngestCoverage.start_date <= end + timedelta(days=1))
+            ).all()
+            merged = merge_ranges([DateRange(start, end), *(DateRange(row.start_date, row.end_date) for row in touching)])
+            if touching:
+                self.db.execute(
+                    delete(IngestCoverage).where(IngestCoverage.coverage_id.in_([row.coverage_id for row in touching]))
+                )
+            for item in merged:
+                self.db.add(
+                    IngestCoverage(
+                        tenant_id=tenant_id,
+                        cloud=cloud,
+                        source_ref=source,
+                        start_date=item.start,
+                        end_date=item.end,
+                    )
+                )
@@ -2,22 +2,35 @@ from __future__ import annotations
 
 from datetime import date
 
-from sqlalchemy import and_, desc, or_, select
+from sqlalchemy import event
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from finops_api.models.dim_currency_rate import DimCurrencyRate
+from finops_api.repositories.fx_rate_table import FxRateTable, get_fx_rate_table
+
+PENDING_RATES_KEY = "fx_rate_table_pending"
+
+
+def _apply_pending_rates(session: Session) -> None:
+    for table, args in session.info.pop(PENDING_RATES_KEY, []):
+        table.record(*args)
+
+
+def _drop_pending_rates(session: Session) -> None:
+    session.info.pop(PENDING_RATES_KEY, None)
 
 
 class CurrencyRateRepository:
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session, fx_rates: FxRateTable | None = None) -> None:
         self.db = db
+        self.fx_rates = fx_rates or get_fx_rate_table()
 
     def get_exact_brl_per_usd(self, rate_date: date) -> float | None:
-        return self._get_brl_per_usd(date_filter=DimCurrencyRate.rate_date == rate_date)
+        return self.fx_rates.exact_brl_per_usd(self.db, rate_date)
 
     def get_brl_per_usd(self, as_of: date) -> float | None:
-        return self._get_brl_per_usd(date_filter=DimCurrencyRate.rate_date <= as_of)
+        return self.fx_rates.brl_per_usd(self.db, as_of)
 
     def upsert_rate(self, rate_date: date, from_currency: str, to_currency: str, rate: float) -> None:
         normalized_from = from_currency.upper().strip()
@@ -37,36 +50,10 @@ class CurrencyRateRepository:
             set_={"rate": rate},
         )
         self.db.execute(stmt)
-
-    def _get_brl_per_usd(self, date_filter: object) -> float | None:
-        pairs = {("USD", "BRL"), ("BRL", "USD")}
-        stmt = (
-            select(
-                DimCurrencyRate.rate_date,
-                DimCurrencyRate.from_currency,
-                DimCurrencyRate.to_currency,
-                DimCurrencyRate.rate,
-            )
-            .where(date_filter)
-            .where(
-                or_(
-                    and_(DimCurrencyRate.from_currency == "USD", DimCurrencyRate.to_currency == "BRL"),
-                    and_(DimCurrencyRate.from_currency == "BRL", DimCurrencyRate.to_currency == "USD"),
-                )
-            )
-            .order_by(desc(DimCurrencyRate.rate_date))
+        # A tabela em memoria so recebe a cotacao quando a transacao commitar (rollback descarta).
+        self.db.info.setdefault(PENDING_RATES_KEY, []).append(
+            (self.fx_rates, (rate_date, normalized_from, normalized_to, rate))
         )
-        rows = self.db.execute(stmt).all()
-        for row in rows:
-            from_currency = str(row.from_currency or "").upper()
-            to_currency = str(row.to_currency or "").upper()
-            if (from_currency, to_currency) not in pairs:
-                continue
-            rate = float(row.rate or 0.0)
-            if rate <= 0:
-                continue
-            if from_currency == "USD" and to_currency == "BRL":
-                return rate
-            if from_currency == "BRL" and to_currency == "USD":
-                return (1.0 / rate) if rate > 0 else None
-        return None
+        if not event.contains(self.db, "after_commit", _apply_pending_rates):
+            event.listen(self.db, "after_commit", _apply_pending_rates)
+            event.listen(self.db, "after_rollback", _drop_pending_rates)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from sqlalchemy import String, column, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from finops_api.core.config import settings
+from finops_api.models.agg_cost_daily_rollup import CostDailyRollup
+from finops_api.models.agg_cost_monthly_rollup import CostMonthlyRollup
+from finops_api.models.dim_region import DimRegion
+from finops_api.models.dim_scope import DimScope
+from finops_api.models.dim_service import DimService
+from finops_api.providers.common.types import CanonicalCostRow
+
+CLI_INGEST_METADATA = {"origin": "cli_ingest"}
+
+
+@dataclass
+class DimensionIds:
+    scopes: dict[str, UUID] = field(default_factory=dict)
+    services: dict[tuple[str, str], UUID] = field(default_factory=dict)
+    regions: dict[tuple[str, str], UUID] = field(default_factory=dict)
+
+
+class DimensionRepository:
+    """Resolve ids de scope/service/region em lote para um batch de ingestao."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        # Scopes existentes que mudaram de nome nesta instancia (a ingestao invalida o cache do tenant inteiro).
+        self.scopes_renamed = 0
+
+    def resolve(self, rows: Iterable[CanonicalCostRow], tenant_id: UUID, cloud: str) -> DimensionIds:
+        scope_names: dict[str, str] = {}
+        service_names: dict[tuple[str, str], str] = {}
+        region_names: dict[tuple[str, str], str] = {}
+        for row in rows:
+            scope_names[row.scope_key] = row.scope_name
+            service_names.setdefault((row.cloud, row.service_key), row.service_name)
+            region_names.setdefault((row.cloud, row.region_key), row.region_name)
+        if cloud == "aws":
+            # Nome de exibicao configurado (AWS_ACCOUNT_NAMES_JSON) prevalece sobre o que veio do provider.
+            account_names = settings.aws_account_names
+            scope_names = {key: account_names.get(key, name) for key, name in scope_names.items()}
+
+        return DimensionIds(
+            scopes=self.upsert_scopes(tenant_id, cloud, scope_names),
+            services=self.upsert_services(service_names),
+            regions=self.upsert_regions(region_names),
+        )
+
+    def upsert_scopes(self, tenant_id: UUID, cloud: str, scope_names: dict[str, str]) -> dict[str, UUID]:
+        if not scope_names:
+            return {}
+
+        existing = self.db.execute(
+            select(DimScope.scope_key, DimScope.scope_id, DimScope.scope_name).where(
+                DimScope.tenant_id == tenant_id,
+                DimScope.scope_key.in_(list(scope_names)),
+            )
+        ).all()
+        resolved = {row.scope_key: row.scope_id for row in existing}
+        current_names = {row.scope_key: row.scope_name for row in existing}
+
+        # So grava quando o scope e novo ou o nome mudou; scopes inalterados nao geram UPDATE.
+        # Ordenado pela chave: ingestoes paralelas travam o indice unico sempre na mesma ordem.
+        pending = [
+            {
+                "tenant_id": tenant_id,
+                "cloud": cloud,
+                "scope_key": scope_key,
+                "scope_name": scope_name,
+                "metadata_json": CLI_INGEST_METADATA,
+            }
+            for scope_key, scope_name in sorted(scope_names.items())
+            if scope_key not in resolved or current_names.get(scope_key) != scope_name
+        ]
+        if not pending:
+            return resolved
+        renamed = {row["scope_key"]: row["scope_name"] for row in pending if row["scope_key"] in resolved}
+
+        stmt = insert(DimScope).values(pending)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DimScope.tenant_id, DimScope.scope_key],
+            set_={
+                DimScope.scope_name: stmt.excluded.scope_name,
+                DimScope.metadata_json: stmt.excluded["metadata"],
+            },
+        ).returning(DimScope.scope_key, DimScope.scope_id)
+        resolved.update({row.scope_key: row.scope_id for row in self.db.execute(stmt).all()})
+        if renamed:
+            # Dias ja agregados tambem passam ao nome novo, nao so os reagregados por esta ingestao.
+            self._rename_rollup_scopes(cloud, self._names_table(renamed), tenant_id=tenant_id)
+            self.scopes_renamed += len(renamed)
+        return resolved
+
+    def sync_scope_names(self, cloud: str, names: dict[str, str]) -> int:
+        """Grava nomes de exibicao por scope_key em dim_scope e nas rollups; nao commita.
+
+        So atualiza linhas cujo nome difere (IS DISTINCT FROM), entao rodar de novo sem mudancas
+        nao gera escrita. Devolve quantos scopes mudaram de nome.
+        """
+        if not names:
+            return 0
+        mapping = self._names_table(names)
+        changed = self.db.execute(
+            update(DimScope)
+            .where(DimScope.cloud == cloud)
+            .where(DimScope.scope_key == mapping.c.scope_key)
+            .where(DimScope.scope_name.is_distinct_from(mapping.c.scope_name))
+            .values(scope_name=mapping.c.scope_name)
+        ).rowcount
+        self._rename_rollup_scopes(cloud, mapping)
+        return int(changed or 0)
+
+    @staticmethod
+    def _names_table(names: dict[str, str]):
+        return values(column("scope_key", String), column("scope_name", String), name="account_names").data(
+            sorted(names.items())
+        )
+
+    def _rename_rollup_scopes(self, cloud: str, mapping, tenant_id: UUID | None = None) -> None:
+        # A rollup copia scope_name da dim_scope na agregacao: mantem as linhas ja agregadas em dia.
+        for rollup in (CostDailyRollup, CostMonthlyRollup):
+            stmt = (
+                update(rollup)
+                .where(rollup.cloud == cloud)
+                .where(rollup.scope_key == mapping.c.scope_key)
+                .where(rollup.scope_name.is_distinct_from(mapping.c.scope_name))
+                .values(scope_name=mapping.c.scope_name)
+            )
+            if tenant_id is not None:
+                stmt = stmt.where(rollup.tenant_id == tenant_id)
+            self.db.execute(stmt)
+
+    def upsert_services(self, service_names: dict[tuple[str, str], str]) -> dict[tuple[str, str], UUID]:
+        return self._upsert_by_cloud_key(
+            service_names,
+            model=DimService,
+            key_column=DimService.service_key,
+            id_column=DimService.service_id,
+            name_attr="service_name",
+        )
+
+    def upsert_regions(self, region_names: dict[tuple[str, str], str]) -> dict[tuple[str, str], UUID]:
+        return self._upsert_by_cloud_key(
+            region_names,
+            model=DimRegion,
+            key_column=DimRegion.region_key,
+            id_column=DimRegion.region_id,
+            name_attr="region_name",
+        )
+
+    def _upsert_by_cloud_key(self, names: dict[tuple[str, str], str], model, key_column, id_column, name_attr: str):
+        if not names:
+            return {}
+
+        resolved = self._select_ids(model, key_column, id_column, list(names))
+        # Ordem fixa de insercao (como em upsert_scopes) evita deadlock entre shards paralelos.
+        missing = sorted(key for key in names if key not in resolved)
+        if not missing:
+            return resolved
+
+        stmt = (
+            insert(model)
+            .values(
+                [
+                    {
+                        "cloud": cloud,
+                        key_column.key: key,
+                        name_attr: names[(cloud, key)],
+                        "metadata_json": CLI_INGEST_METADATA,
+                    }
+                    for cloud, key in missing
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[model.cloud, key_column])
+            .returning(model.cloud, key_column, id_column)
+        )
+        for row in self.db.execute(stmt).all():
+            resolved[(row[0], row[1])] = row[2]
+
+        # Linhas inseridas em paralelo por outra ingestao nao voltam no RETURNING do DO NOTHING.
+        still_missing = [key for key in missing if key not in resolved]
+        if still_missing:
+            resolved.update(self._select_ids(model, key_column, id_column, still_missing))
+        return resolved
+
+    def _select_ids(self, model, key_column, id_column, keys: list[tuple[str, str]]) -> dict[tuple[str, str], UUID]:
+        rows = self.db.execute(
+            select(model.cloud, key_column, id_column).where(tuple_(model.cloud, key_column).in_(keys))
+        ).all()
+        return {(row[0], row[1]): row[2] for row in rows}
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import MetaData, delete, func, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from finops_api.models.fact_cost_daily import FactCostDaily
+
+STAGE_TABLE_NAME = "tmp_fact_cost_daily_stage"
+
+# Copia da fact com os mesmos tipos (inclusive enums/JSONB), usada como staging por conexao.
+stage_table = FactCostDaily.__table__.to_metadata(MetaData(), name=STAGE_TABLE_NAME)
+
+
+@dataclass
+class BulkUpsertResult:
+    rows_inserted: int = 0
+    rows_updated: int = 0
+    rows_deleted: int = 0
+
+
+class FactCostBulkRepository:
+    """Persistencia set-based da fact_cost_daily via tabela temporaria de staging."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def upsert(
+        self,
+        values: Sequence[dict[str, Any]],
+        batch_size: int = 5000,
+        cleanup_legacy_currency: bool = False,
+    ) -> BulkUpsertResult:
+        result = BulkUpsertResult()
+        if not values:
+            return result
+
+        self._ensure_stage_table()
+        step = max(int(batch_size), 1)
+        for offset in range(0, len(values), step):
+            batch = values[offset : offset + step]
+            self.db.execute(text(f"TRUNCATE {STAGE_TABLE_NAME}"))
+            self.db.execute(insert(stage_table), list(batch))
+            if cleanup_legacy_currency:
+                result.rows_deleted += self._delete_legacy_currency_mismatch(batch)
+            inserted, updated = self._merge_batch()
+            result.rows_inserted += inserted
+            result.rows_updated += updated
+        return result
+
+    def _ensure_stage_table(self) -> None:
+        # ON COMMIT DELETE ROWS mantem a tabela na conexao do pool e descarta o conteudo a cada commit.
+        self.db.execute(
+            text(
+                f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE_NAME} "
+                "(LIKE fact_cost_daily INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+        )
+
+    def _merge_batch(self) -> tuple[int, int]:
+        row = self.db.execute(self._merge_stmt()).one()
+        return int(row.rows_inserted or 0), int(row.rows_updated or 0)
+
+    def _delete_legacy_currency_mismatch(self, batch: Sequence[dict[str, Any]]) -> int:
+        # Corrige legado: alguns registros Azure/OCI foram persistidos como USD
+        # mesmo com valor já em BRL, inflando KPIs por conversão duplicada.
+        total = 0
+        windows: dict[tuple[Any, Any], list[Any]] = {}
+        for item in batch:
+            if str(item.get("currency") or "").upper() != "BRL":
+                continue
+            window = windows.setdefault((item["tenant_id"], item["cloud"]), [item["cost_date"], item["cost_date"]])
+            window[0] = min(window[0], item["cost_date"])
+            window[1] = max(window[1], item["cost_date"])
+
+        for (tenant_id, cloud), (start, end) in windows.items():
+            result = self.db.execute(self._delete_legacy_currency_stmt(tenant_id, cloud, start, end))
+            total += int(result.rowcount or 0)
+        return total
+
+    @staticmethod
+    def _delete_legacy_currency_stmt(tenant_id, cloud: str, start, end):
+        fact = FactCostDaily.__table__
+        stage = stage_table
+        return (
+            delete(fact)
+            .where(fact.c.tenant_id == tenant_id)
+            .where(fact.c.cloud == cloud)
+            .where(fact.c.cost_date.between(start, end))
+            .where(fact.c.currency == "USD")
+            .where(stage.c.currency == "BRL")
+            .where(fact.c.source == stage.c.source)
+            .where(fact.c.cost_date == stage.c.cost_date)
+            .where(fact.c.tenant_id == stage.c.tenant_id)
+            .where(fact.c.scope_key == stage.c.scope_key)
+            .where(fact.c.service_key == stage.c.service_key)
+            .where(func.coalesce(fact.c.region_key, "") == func.coalesce(stage.c.region_key, ""))
+            .where(func.coalesce(fact.c.resource_id, "") == "")
+            .where(func.coalesce(fact.c.charge_type, "") == "")
+            .where(func.coalesce(fact.c.pricing_model, "") == "")
+        )
+
+    @staticmethod
+    def _merge_stmt():
+        fact = FactCostDaily.__table__
+        stage = stage_table
+
+        # Mesma chave natural do indice unico uq_fact_cost_daily_natural_key (com COALESCE),
+        # restrita ao tenant como no UPDATE por linha anterior.
+        updated = (
+            update(fact)
+            .where(fact.c.cost_date == stage.c.cost_date)
+            .where(fact.c.cloud == stage.c.cloud)
+            .where(fact.c.tenant_id == stage.c.tenant_id)
+            .where(fact.c.scope_key == stage.c.scope_key)
+            .where(fact.c.service_key == stage.c.service_key)
+            .where(func.coalesce(fact.c.region_key, "") == func.coalesce(stage.c.region_key, ""))
+            .where(func.coalesce(fact.c.resource_id, "") == "")
+            .where(fact.c.currency == stage.c.currency)
+            .where(func.coalesce(fact.c.charge_type, "") == "")
+            .where(func.coalesce(fact.c.pricing_model, "") == "")
+            .values(
+                scope_id=stage.c.scope_id,
+                service_id=stage.c.service_id,
+                region_id=stage.c.region_id,
+                amount=stage.c.amount,
+                amount_brl=stage.c.amount_brl,
+                raw=stage.c.raw,
+                updated_at=func.now(),
+            )
+            .returning(stage.c.fact_id.label("stage_id"))
+            .cte("updated")
+        )
+
+        insert_columns = [column.name for column in stage.columns if column.name not in {"created_at", "updated_at"}]
+        inserted = (
+            insert(fact)
+            .from_select(
+                insert_columns,
+                select(*[stage.c[name] for name in insert_columns]).where(
+                    stage.c.fact_id.not_in(select(updated.c.stage_id))
+                ),
+            )
+            .on_conflict_do_nothing()
+            .returning(literal(1).label("inserted"))
+            .cte("inserted")
+        )
+
+        return select(
+            select(func.count()).select_from(inserted).scalar_subquery().label("rows_inserted"),
+            select(func.count()).select_from(updated).scalar_subquery().label("rows_updated"),
+        )
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Text, cast, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from finops_api.core.config import settings
+from finops_api.models.fact_cost_daily import FactCostDaily
+from finops_api.repositories.fact_cost_repo import FactCostRepository, QueryFilters
+
+# Ordem das colunas no CSV (e das chaves no NDJSON).
+EXPORT_FIELDS = (
+    "fact_id",
+    "cost_date",
+    "cloud",
+    "tenant_id",
+    "scope_key",
+    "account_name",
+    "service_key",
+    "service_name",
+    "region_key",
+    "resource_id",
+    "resource_name",
+    "charge_type",
+    "pricing_model",
+    "meter_category",
+    "meter_subcategory",
+    "currency",
+    "amount",
+    "amount_brl",
+    "fx_rate_used",
+    "source",
+    "source_record_id",
+    "tags",
+    "metadata",
+)
+
+
+@dataclass(frozen=True)
+class ExportCursor:
+    """Posicao do keyset (cost_date, fact_id): a exportacao continua depois desta linha."""
+
+    cost_date: date
+    fact_id: UUID
+
+    def encode(self) -> str:
+        return f"{self.cost_date.isoformat()},{self.fact_id}"
+
+    @classmethod
+    def decode(cls, raw: str) -> ExportCursor:
+        try:
+            raw_date, raw_id = raw.split(",", 1)
+            return cls(cost_date=date.fromisoformat(raw_date.strip()), fact_id=UUID(raw_id.strip()))
+        except ValueError as exc:
+            raise ValueError("after deve ser no formato YYYY-MM-DD,<fact_id>") from exc
+
+
+class FactCostExportRepository:
+    """Linhas cruas da fact_cost_daily (com metadata) em paginas por keyset (cost_date, fact_id).
+
+    Filtros com a mesma semantica do FactCostRepository (periodo, tenant, cloud, servicos, contas);
+    todas as sources entram, sem o recorte por source dos agregados. Cada pagina e lida por cursor
+    no servidor (yield_per), entao a memoria fica limitada a EXPORT_FETCH_SIZE linhas.
+    """
+
+    def __init__(self, db: Session, page_size: int | None = None, fetch_size: int | None = None) -> None:
+        self.db = db
+        self.page_size = max(1, page_size or settings.export_page_size)
+        self.fetch_size = max(1, min(fetch_size or settings.export_fetch_size, self.page_size))
+
+    def iter_rows(self, filters: QueryFilters, after: ExportCursor | None = None) -> Iterator[dict[str, Any]]:
+        for batch in self.iter_batches(filters, after=after):
+            for row in batch:
+                yield dict(row._mapping)
+
+    def iter_batches(
+        self,
+        filters: QueryFilters,
+        after: ExportCursor | None = None,
+        as_text: bool = False,
+    ) -> Iterator[Sequence[Row]]:
+        """Lotes de ate EXPORT_FETCH_SIZE linhas como saem do cursor (tuplas na ordem de EXPORT_FIELDS).
+
+        Com `as_text` UUIDs, numerics e JSONB (tags, metadata) chegam como texto do Postgres, sem criar
+        UUID/Decimal/dict por valor no Python: e o formato que as exportacoes colunares convertem em lote.
+        """
+        while True:
+            fetched = 0
+            last: Row | None = None
+            result = self.db.execute(
+                self._page_stmt(filters, after, as_text=as_text),
+                execution_options={"yield_per": self.fetch_size},
+            )
+            for batch in result.partitions():
+                fetched += len(batch)
+                last = batch[-1]
+                yield batch
+            if fetched < self.page_size or last is None:
+                return
+            after = ExportCursor(cost_date=last.cost_date, fact_id=UUID(str(last.fact_id)))
+
+    def _page_stmt(self, filters: QueryFilters, after: ExportCursor | None, as_text: bool = False):
+        cols = FactCostRepository(self.db)._fact_columns()
+
+        def text_if(column):
+            return cast(column, Text) if as_text else column
+
+        stmt = select(
+            text_if(FactCostDaily.fact_id).label("fact_id"),
+            FactCostDaily.usage_date.label("cost_date"),
+            FactCostDaily.cloud.label("cloud"),
+            text_if(FactCostDaily.tenant_id).label("tenant_id"),
+            cols.scope_key.label("scope_key"),
+            cols.account_name.label("account_name"),
+            cols.service_key.label("service_key"),
+            cols.service_name.label("service_name"),
+            FactCostDaily.region_key.label("region_key"),
+            FactCostDaily.resource_id.label("resource_id"),
+            FactCostDaily.resource_name.label("resource_name"),
+            FactCostDaily.charge_type.label("charge_type"),
+            FactCostDaily.pricing_model.label("pricing_model"),
+            FactCostDaily.meter_category.label("meter_category"),
+            FactCostDaily.meter_subcategory.label("meter_subcategory"),
+            FactCostDaily.currency_code.label("currency"),
+            text_if(FactCostDaily.amount).label("amount"),
+            text_if(FactCostDaily.amount_brl).label("amount_brl"),
+            text_if(FactCostDaily.fx_rate_used).label("fx_rate_used"),
+            FactCostDaily.source_ref.label("source"),
+            FactCostDaily.source_record_id.label("source_record_id"),
+            text_if(FactCostDaily.tags).label("tags"),
+            text_if(FactCostDaily.metadata_json).label("metadata"),
+        ).select_from(cols.from_clause)
+        stmt = FactCostRepository._apply_filters(stmt, filters, cols)
+        if after is not None:
+            # O cost_date >= repetido deixa o planner usar os indices por data (o keyset em tupla sozinho nao).
+            stmt = stmt.where(FactCostDaily.usage_date >= after.cost_date).where(
+                tuple_(FactCostDaily.usage_date, FactCostDaily.fact_id) > tuple_(after.cost_date, after.fact_id)
+            )
+        return stmt.order_by(FactCostDaily.usage_date, FactCostDaily.fact_id).limit(self.page_size)
@@ -0,0 +1,459 @@
+from __future__ import annotations
+
+from collections.abc import Hashable
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, NamedTuple
+
+from sqlalchemy import BigInteger, cast, func, select, union_all
+from sqlalchemy.orm import Session
+
+from finops_api.core.request_memo import RequestMemo, memoized
+from finops_api.repositories.cost_rollup_repo import month_ceil
+from finops_api.repositories.fact_cost_repo import FactCostRepository, QueryFilters, WindowTotals
+from finops_api.repositories.fx_rate_table import FxRateTable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+# As colunas de valor (fact e rollups) tem escala 6: em micro-unidades as somas ficam exatas em int64.
+MICROS = 1_000_000
+# Ordem dos componentes nas fatias (mesma do FactCostRepository._component_sums).
+AMOUNT, AMOUNT_BRL, USD_WITHOUT_BRL, OTHER_WITHOUT_BRL = range(4)
+
+
+class _NamedTotal(NamedTuple):
+    name: str
+    total: float
+
+
+class _RankedRow(NamedTuple):
+    name: str
+    total: float
+    previous: float
+    period_total: float | None
+
+
+class _BucketRow(NamedTuple):
+    date: date
+    service: str
+    total: float
+
+
+class _TrendRow(NamedTuple):
+    date: date
+    total: float
+    selected: float
+    others: float
+
+
+@dataclass(frozen=True)
+class _Conversion:
+    """SUM(amount_expr) exato a partir dos componentes somados: numerador inteiro / (MICROS * scale).
+
+    Em BRL a cotacao chega ao Postgres como literal numeric (repr do float), ou seja mantissa / scale;
+    como a soma numeric nao arredonda, amount_brl + USD * cotacao + demais vira uma fracao de inteiros
+    e o float final e o mesmo que o driver devolve para o numeric.
+    """
+
+    usd: bool
+    mantissa: int = 1
+    scale: int = 1
+
+    @classmethod
+    def from_rate(cls, rate: float) -> _Conversion:
+        sign, digits, exponent = Decimal(repr(float(rate))).as_tuple()
+        mantissa = int("".join(str(digit) for digit in digits)) * (-1 if sign else 1)
+        if exponent >= 0:
+            return cls(usd=False, mantissa=mantissa * 10**exponent)
+        return cls(usd=False, mantissa=mantissa, scale=10**-exponent)
+
+    def numerators(self, sums: np.ndarray) -> list[int]:
+        if self.usd:
+            return sums[:, AMOUNT].tolist()
+        local, usd = self._components(sums)
+        return (local * self.scale + usd * self.mantissa).tolist()
+
+    def to_float(self, numerator: int) -> float:
+        return numerator / (MICROS * self.scale)
+
+    def total(self, sums: np.ndarray) -> float:
+        # Soma os componentes antes de aplicar a cotacao: uma multiplicacao por coluna, nao por linha.
+        if self.usd:
+            return self.to_float(_exact_sum(sums[:, AMOUNT]))
+        local = _exact_sum(sums[:, AMOUNT_BRL]) + _exact_sum(sums[:, OTHER_WITHOUT_BRL])
+        return self.to_float(local * self.scale + _exact_sum(sums[:, USD_WITHOUT_BRL]) * self.mantissa)
+
+    def _components(self, sums: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(amount_brl + demais, USD sem BRL) por linha; int64 quando o numerador cabe, senao int do Python.
+
+        Cotacao com 8 casas cabe em int64; o repr de um float com 16 digitos na mantissa costuma
+        estourar, e ai as colunas viram dtype object (aritmetica vetorizada com int do Python).
+        """
+        local = sums[:, AMOUNT_BRL] + sums[:, OTHER_WITHOUT_BRL]
+        usd = sums[:, USD_WITHOUT_BRL]
+        if not len(sums) or _max_abs(local) * self.scale + _max_abs(usd) * abs(self.mantissa) <= INT64_MAX:
+            return local, usd
+        return local.astype(object), usd.astype(object)
+
+
+INT64_MAX = 2**63 - 1
+
+
+def _max_abs(values: np.ndarray) -> int:
+    return max(abs(int(values.max())), abs(int(values.min()))) if len(values) else 0
+
+
+def _exact_sum(values: np.ndarray) -> int:
+    """Soma exata: em int64 quando nenhuma soma parcial pode estourar, senao em int do Python."""
+    if values.dtype != object and _max_abs(values) * len(values) <= INT64_MAX:
+        return int(values.sum())
+    return int(values.astype(object).sum())
+
+
+class _CostFrame:
+    """Fatia (dia, nome) -> componentes em micro-unidades, cobrindo [start, end] e crescendo pelas pontas."""
+
+    def __init__(self) -> None:
+        self.start: date | None = None
+        self.end: date | None = None
+        self.names: list[str] = []
+        self._codes: dict[str, int] = {}
+        self.days = np.empty(0, dtype=np.int64)
+        self.codes = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, 4), dtype=np.int64)
+
+    def missing(self, start: date, end: date) -> list[tuple[date, date]]:
+        if self.start is None or self.end is None:
+            return [(start, end)]
+        parts = []
+        if start < self.start:
+            parts.append((start, self.start - timedelta(days=1)))
+        if end > self.end:
+            parts.append((self.end + timedelta(days=1), end))
+        return parts
+
+    def extend(self, start: date, end: date, rows: list[Any]) -> None:
+        if rows:
+            self.days = np.concatenate([self.days, np.fromiter((row.usage_date.toordinal() for row in rows), np.int64, len(rows))])
+            self.codes = np.concatenate([self.codes, np.fromiter((self._code(row.name) for row in rows), np.int64, len(rows))])
+            values = np.array([(row.amount, row.amount_brl, row.usd, row.other) for row in rows], dtype=np.int64)
+            self.values = np.concatenate([self.values, values])
+        self.start = start if self.start is None else min(self.start, start)
+        self.end = end if self.end is None else max(self.end, end)
+
+    def _code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def window(self, start: date, end: date) -> np.ndarray:
+        return (self.days >= start.toordinal()) & (self.days <= end.toordinal())
+
+    def sum_by(self, keys: np.ndarray, mask: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+        """Soma dos componentes por chave (0..size-1) nas linhas de `mask` e quais chaves tem linha."""
+        sums = np.zeros((size, 4), dtype=np.int64)
+        np.add.at(sums, keys[mask], self.values[mask])
+        present = np.bincount(keys[mask], minlength=size) > 0
+        return sums, present
+
+    def by_name(self, start: date, end: date) -> tuple[np.ndarray, np.ndarray]:
+        """(codigos com linha no periodo, componentes por codigo)."""
+        sums, present = self.sum_by(self.codes, self.window(start, end), len(self.names))
+        return np.flatnonzero(present), sums[present]
+
+    def by_day(self, start: date, end: date, mask: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """(ordinais dos dias com linha no periodo, componentes por dia), em ordem de data."""
+        window = self.window(start, end) if mask is None else self.window(start, end) & mask
+        sums, present = self.sum_by(self.days - start.toordinal(), window, (end - start).days + 1)
+        return np.flatnonzero(present) + start.toordinal(), sums[present]
+
+
+class FactCostFrameRepository(FactCostRepository):
+    """Agregados do dashboard calculados em memoria (NumPy) sobre uma fatia lida uma vez por requisicao.
+
+    Cada recorte (servico ou conta, com o escopo de source AWS de cada um) vira uma fatia
+    (dia, nome, amount, amount_brl, USD sem BRL, demais) em micro-unidades, lida da mesma fonte que o
+    SQL (rollup ou fact) e estendida so nos dias que faltam quando outra janela precisa. window_totals,
+    total, timeseries, top servicos/contas com delta, daily com quebra por servico, breakdown e trend
+    saem de group-bys sobre a fatia, com o mesmo resultado do caminho SQL: somas exatas em int64 e a
+    conversao BRL como fracao inteira (ver _Conversion). Empates exatos de valor sao desempatados pelo
+    nome em ordem de codepoint (o SQL usa a collation do banco). FX_CONVERSION_MODE=daily fica no SQL.
+    """
+
+    def __init__(self, db: Session, memo: RequestMemo | None = None, fx_rates: FxRateTable | None = None) -> None:
+        if np is None:
+            raise RuntimeError("pacote numpy nao instalado (necessario para ANALYTICS_ENGINE=numpy)")
+        super().__init__(db, memo=memo, fx_rates=fx_rates)
+        self._frames: dict[Hashable, _CostFrame] = {}
+
+    def _frame(self, kind: str, filters: QueryFilters, start: date, end: date) -> _CostFrame:
+        # Mesmos filtros fora o periodo (e a moeda, aplicada so na conversao) reaproveitam a fatia.
+        key = (kind, *replace(filters, start=date.min, end=date.min, currency="USD").cache_key())
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = _CostFrame()
+        for part_start, part_end in frame.missing(start, end):
+            frame.extend(part_start, part_end, self._load_frame_rows(kind, filters, part_start, part_end))
+        return frame
+
+    def _load_frame_rows(self, kind: str, filters: QueryFilters, start: date, end: date) -> list[Any]:
+        cols = self._source_columns()
+        name_col = cols.account_name if kind == "account" else cols.service_name
+        stmt = (
+            select(cols.usage_date.label("usage_date"), name_col.label("name"), *self._micro_sums(cols))
+            .select_from(cols.from_clause)
+            .group_by(cols.usage_date, name_col)
+        )
+        stmt = self._apply_filters(stmt, replace(filters, start=start, end=end), cols)
+        stmt = self._apply_aws_source_scope(stmt, filters.cloud, kind, cols)
+        return self.db.execute(stmt).all()
+
+    def _micro_sums(self, cols) -> list:
+        return [
+            cast(func.coalesce(component, 0) * MICROS, BigInteger).label(label)
+            for component, label in zip(self._component_sums(cols), ("amount", "amount_brl", "usd", "other"))
+        ]
+
+    def _component_totals(self, filters: QueryFilters, start: date, end: date) -> np.ndarray:
+        """Componentes (1, 4) somados em [start, end] sem passar pela fatia: meses fechados da rollup mensal.
+
+        Usado para o trecho do ano acumulado antes das janelas do dashboard, que a fatia nao precisa cobrir.
+        """
+        cols = self._source_columns()
+        closed_months = self._closed_months(start, end) if cols.rollup else None
+        parts = [(cols, start, end)]
+        if closed_months is not None:
+            first_month, last_month = closed_months
+            parts = [(self._monthly_columns(), first_month, last_month)]
+            if start < first_month:
+                parts.append((cols, start, first_month - timedelta(days=1)))
+            if end > month_ceil(last_month):
+                parts.append((cols, month_ceil(last_month) + timedelta(days=1), end))
+        selects = []
+        for part_cols, part_start, part_end in parts:
+            stmt = select(*self._micro_sums(part_cols)).select_from(part_cols.from_clause)
+            stmt = self._apply_filters(stmt, replace(filters, start=part_start, end=part_end), part_cols)
+            selects.append(self._apply_aws_source_scope(stmt, filters.cloud, "service", part_cols))
+        combined = union_all(*selects).subquery()
+        row = self.db.execute(select(*(func.coalesce(func.sum(column), 0) for column in combined.c))).one()
+        return np.array([[int(value) for value in row]], dtype=np.int64)
+
+    def _conversion(self, currency: str, as_of: date) -> _Conversion:
+        # Mesma cotacao que o _amount_expr usaria para esta janela.
+        if currency.upper() == "USD":
+            return _Conversion(usd=True)
+        return _Conversion.from_rate(self._resolve_brl_per_usd(as_of))
+
+    @memoized
+    def total(self, filters: QueryFilters) -> float:
+        if self._use_daily_fx(filters):
+            return super().total(filters)
+        frame = self._frame("service", filters, filters.start, filters.end)
+        mask = frame.window(filters.start, filters.end)
+        return self._conversion(filters.currency, filters.end).total(frame.values[mask])
+
+    @memoized
+    def window_totals(self, filters: QueryFilters) -> WindowTotals:
+        if self._use_daily_fx(filters):
+            return super().window_totals(filters)
+        range_days = max((filters.end - filters.start).days + 1, 1)
+        prev_start = filters.start - timedelta(days=range_days)
+        prev_end = filters.start - timedelta(days=1)
+        month_start = filters.end.replace(day=1)
+        year_start = filters.end.replace(month=1, day=1)
+        # A fatia cobre so as janelas do dashboard; o ano antes delas soma direto no SQL (como o caminho SQL).
+        daily_from = min(prev_start, month_start)
+        frame = self._frame("service", filters, daily_from, filters.end)
+        current = self._conversion(filters.currency, filters.end)
+        previous = self._conversion(filters.currency, prev_end)
+        year_sums = frame.values[frame.window(max(year_start, daily_from), filters.end)]
+        if year_start < daily_from:
+            year_sums = np.vstack([year_sums, self._component_totals(filters, year_start, daily_from - timedelta(days=1))])
+
+        days, sums = frame.by_day(filters.start, filters.end)
+        daily = [
+            {"date": date.fromordinal(day), "total": current.to_float(numerator)}
+            for day, numerator in zip(days.tolist(), current.numerators(sums))
+        ]
+        return WindowTotals(
+            current=current.total(sums),
+            previous=previous.total(frame.values[frame.window(prev_start, prev_end)]),
+            month_to_date=current.total(frame.values[frame.window(month_start, filters.end)]),
+            year_to_date=current.total(year_sums),
+            daily=daily,
+        )
+
+    @memoized
+    def timeseries(self, filters: QueryFilters) -> list[dict]:
+        if self._use_daily_fx(filters):
+            return super().timeseries(filters)
+        frame = self._frame("service", filters, filters.start, filters.end)
+        conversion = self._conversion(filters.currency, filters.end)
+        days, sums = frame.by_day(filters.start, filters.end)
+        return [
+            {"date": date.fromordinal(day), "total": conversion.to_float(numerator)}
+            for day, numerator in zip(days.tolist(), conversion.numerators(sums))
+        ]
+
+    @memoized
+    def top_services_ranked(self, filters: QueryFilters, limit: int) -> list[dict]:
+        if self._use_daily_fx(filters):
+            return super().top_services_ranked(filters, limit)
+        range_days = max((filters.end - filters.start).days + 1, 1)
+        prev_start = filters.start - timedelta(days=range_days)
+        prev_end = filters.start - timedelta(days=1)
+        frame = self._frame("service", filters, prev_start, filters.end)
+        current_conversion = self._conversion(filters.currency, filters.end)
+        previous_conversion = self._conversion(filters.currency, prev_end)
+
+        codes, sums = frame.by_name(filters.start, filters.end)
+        current = dict(zip(codes.tolist(), current_conversion.numerators(sums)))
+        codes, sums = frame.by_name(prev_start, prev_end)
+        previous = dict(zip(codes.tolist(), previous_conversion.numerators(sums)))
+
+        # row_number sobre (current desc nulls last, name); servicos so com anterior ficam no fim.
+        ranking = sorted(
+            current.keys() | previous.keys(),
+            key=lambda code: (code not in current, -current.get(code, 0), frame.names[code]),
+        )
+        has_others = len(current) > limit if limit > 1 else False
+        top_n = limit - 1 if has_others else limit
+        buckets: dict[str, list[int]] = {}
+        for position, code in enumerate(ranking, start=1):
+            if position <= top_n and code in current:
+                name = frame.names[code]
+            elif has_others:
+                name = "Others"
+            else:
+                continue
+            bucket = buckets.setdefault(name, [0, 0, position])
+            bucket[0] += current.get(code, 0)
+            bucket[1] += previous.get(code, 0)
+        period_total = current_conversion.to_float(sum(current.values())) if current else None
+        rows = [
+            _RankedRow(
+                name=name,
+                total=current_conversion.to_float(total),
+                previous=previous_conversion.to_float(previous_total),
+                period_total=period_total,
+            )
+            for name, (total, previous_total, _) in sorted(buckets.items(), key=lambda item: item[1][2])
+        ]
+        return self._ranked_services_result(rows[:limit])
+
+    @memoized
+    def _top_ranked_with_delta(
+        self,
+        filters: QueryFilters,
+        limit: int,
+        group: str,
+        include_others: bool = False,
+    ) -> list[dict]:
+        if self._use_daily_fx(filters):
+            return super()._top_ranked_with_delta(filters, limit, group, include_others)
+        kind = "service" if group == "service" else "account"
+        prev_filters = self._previous_period(filters)
+        frame = self._frame(kind, filters, prev_filters.start, filters.end)
+        # Como no SQL, o anterior por item usa a mesma expressao (cotacao do fim do periodo atual).
+        conversion = self._conversion(filters.currency, filters.end)
+
+        codes, sums = frame.by_name(filters.start, filters.end)
+        current = sorted(
+            zip(conversion.numerators(sums), codes.tolist()),
+            key=lambda item: (-item[0], frame.names[item[1]]),
+        )
+        top = current[: limit - 1 if include_others and limit > 1 else limit]
+        codes, sums = frame.by_name(prev_filters.start, prev_filters.end)
+        prev_map = {
+            frame.names[code]: conversion.to_float(numerator)
+            for code, numerator in zip(codes.tolist(), conversion.numerators(sums))
+        }
+        return self._ranked_with_delta_result(
+            [_NamedTotal(name=frame.names[code], total=conversion.to_float(numerator)) for numerator, code in top],
+            prev_map,
+            period_total=self.total(filters),
+            previous_period_total=self.total(prev_filters),
+            key_name="serviceName" if group == "service" else "linkedAccount",
+            include_others=include_others,
+        )
+
+    @memoized
+    def daily_with_service_breakdown(self, filters: QueryFilters, top_n: int) -> list[dict]:
+        if self._use_daily_fx(filters):
+            return super().daily_with_service_breakdown(filters, top_n)
+        frame = self._frame("service", filters, filters.start, filters.end)
+        conversion = self._conversion(filters.currency, filters.end)
+        mask = frame.window(filters.start, filters.end)
+
+        codes, sums = frame.by_name(filters.start, filters.end)
+        service_totals = conversion.numerators(sums)
+        # dense_rank por (total do servico desc, nome): posicao 1..n; a partir de top_n viram "Others".
+        ranking = sorted(range(len(codes)), key=lambda idx: (-service_totals[idx], frame.names[codes[idx]]))
+        position = np.zeros(len(frame.names), dtype=np.int64)
+        position[codes[ranking]] = np.arange(1, len(ranking) + 1)
+        has_others = len(ranking) > top_n if top_n > 1 else False
+        # Balde por codigo: o proprio servico ou 0 ("Others"); posicao do balde = menor posicao dele.
+        bucket = np.where(has_others & (position >= top_n), 0, position)
+
+        days = frame.days - filters.start.toordinal()
+        width = len(ranking) + 1
+        sums, present = frame.sum_by(days * width + bucket[frame.codes], mask, ((filters.end - filters.start).days + 1) * width)
+        keys = np.flatnonzero(present)
+        names = ["Others"] + [frame.names[codes[idx]] for idx in ranking]
+        rows = [
+            _BucketRow(
+                date=date.fromordinal(filters.start.toordinal() + key // width),
+                service=names[key % width],
+                total=conversion.to_float(numerator),
+            )
+            for key, numerator in zip(keys.tolist(), conversion.numerators(sums[present]))
+        ]
+        if has_others:
+            # "Others" (balde 0) tem posicao top_n: no dia, vem depois dos servicos nomeados (sort estavel).
+            rows.sort(key=lambda row: (row.date, row.service == "Others"))
+        return self._daily_breakdown_result(rows)
+
+    @memoized
+    def cost_explorer_trend(
+        self,
+        filters: QueryFilters,
+        group_by: str,
+        selected_item: str | None,
+        limit: int = 5,
+    ) -> list[dict]:
+        if self._use_daily_fx(filters):
+            return super().cost_explorer_trend(filters, group_by, selected_item, limit)
+        kind = "account" if group_by == "account" else "service"
+        frame = self._frame(kind, filters, filters.start, filters.end)
+        conversion = self._conversion(filters.currency, filters.end)
+
+        if selected_item:
+            selected_codes = [code for code, name in enumerate(frame.names) if name == selected_item]
+        else:
+            codes, sums = frame.by_name(filters.start, filters.end)
+            totals = conversion.numerators(sums)
+            top_n = limit - 1 if kind == "service" and limit > 1 else limit
+            ranking = sorted(range(len(codes)), key=lambda idx: (-totals[idx], frame.names[codes[idx]]))
+            selected_codes = codes[ranking[: max(top_n, 0)]].tolist()
+        selected = np.isin(frame.codes, selected_codes)
+
+        days, totals_by_day = frame.by_day(filters.start, filters.end)
+        selected_by_day = dict(zip(*frame.by_day(filters.start, filters.end, selected)))
+        others_by_day = dict(zip(*frame.by_day(filters.start, filters.end, ~selected)))
+        empty = np.zeros(4, dtype=np.int64)
+        rows = [
+            _TrendRow(
+                date=date.fromordinal(day),
+                total=conversion.total(day_sums[None, :]),
+                selected=conversion.total(selected_by_day.get(day, empty)[None, :]),
+                others=conversion.total(others_by_day.get(day, empty)[None, :]),
+            )
+            for day, day_sums in zip(days.tolist(), totals_by_day)
+        ]
+        return self._trend_result(rows)
@@ -1,20 +1,26 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import date, timedelta
 from decimal import Decimal
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import case, func, literal, select
+from sqlalchemy import Date, Numeric, and_, case, cast, func, literal, literal_column, or_, select, true, tuple_, union_all
 from sqlalchemy.orm import Session
 
 from finops_api.core.config import settings
+from finops_api.core.request_memo import RequestMemo, memoized
+from finops_api.core.result_cache import CacheScope
+from finops_api.models.agg_cost_daily_rollup import CostDailyRollup
+from finops_api.models.agg_cost_monthly_rollup import CostMonthlyRollup
 from finops_api.models.dim_currency_rate import DimCurrencyRate
 from finops_api.models.dim_scope import DimScope
 from finops_api.models.dim_service import DimService
 from finops_api.models.fact_cost_daily import FactCostDaily
+from finops_api.repositories.cost_rollup_repo import month_ceil, month_floor
+from finops_api.repositories.coverage_repo import CoverageRepository
+from finops_api.repositories.fx_rate_table import FxRateTable, get_fx_rate_table
 
 
 @dataclass
@@ -30,6 +36,31 @@ class QueryFilters:
     services: list[str] | None = None
     accounts: list[str] | None = None
 
+    def cache_key(self) -> tuple:
+        """Chave canonica dos filtros: listas ordenadas/sem repeticao, vazio == None; tenant_key fica de fora
+        (as consultas filtram so por tenant_id)."""
+        return (
+            self.cloud,
+            self.start,
+            self.end,
+            self.currency.upper(),
+            self.tenant_id,
+            self.scope_key or None,
+            self.service_key or None,
+            tuple(sorted(set(self.services))) if self.services else None,
+            tuple(sorted(set(self.accounts))) if self.accounts else None,
+        )
+
+    def cache_scope(self) -> CacheScope:
+        """Dias que as consultas destes filtros podem ler: periodo anterior e ano acumulado inclusos."""
+        previous_start = self.start - timedelta(days=(self.end - self.start).days + 1)
+        return CacheScope(
+            tenant_id=self.tenant_id,
+            cloud=self.cloud,
+            start=min(previous_start, self.end.replace(month=1, day=1)),
+            end=self.end,
+        )
+
 
 @dataclass
 class RankedItem:
@@ -38,77 +69,242 @@ class RankedItem:
     total: float
 
 
+@dataclass
+class WindowTotals:
+    current: float
+    previous: float
+    month_to_date: float
+    year_to_date: float
+    daily: list[dict]
+
+
+@dataclass(frozen=True)
+class CostColumns:
+    """Colunas equivalentes na fact_cost_daily (com dimensoes) e na agg_cost_daily_rollup."""
+
+    from_clause: Any
+    usage_date: Any
+    cloud: Any
+    tenant_id: Any
+    source_ref: Any
+    service_key: Any
+    service_name: Any
+    scope_key: Any
+    account_name: Any
+    rollup: bool = False
+    # Tabela com as colunas de valor da rollup (amount, amount_brl, usd_without_brl, other_without_brl).
+    amount_table: Any = None
+    # Cotacao BRL/USD por dia (serie densa juntada ao from_clause) no modo FX_CONVERSION_MODE=daily.
+    fx_rate: Any = None
+
+
 class FactCostRepository:
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session, memo: RequestMemo | None = None, fx_rates: FxRateTable | None = None) -> None:
         self.db = db
-        self.aws_account_names = self._load_aws_account_names()
+        self.fx_rates = fx_rates or get_fx_rate_table()
+        # Uma instancia por requisicao (deps): agregados repetidos entre servicos saem do memo.
+        self.memo = memo if memo is not None else RequestMemo()
 
     @staticmethod
     def _service_name_expr():
         return func.coalesce(DimService.service_name, FactCostDaily.service_key)
 
-    def _account_name_expr(self):
-        resolved_name = self._aws_account_name_case_expr()
-        return func.coalesce(
-            resolved_name,
-            DimScope.scope_name,
-            FactCostDaily.scope_key,
+    @staticmethod
+    def _account_name_expr():
+        # Nomes de conta AWS (AWS_ACCOUNT_NAMES_JSON) ja estao em dim_scope.scope_name (sync na subida e na ingestao).
+        return func.coalesce(DimScope.scope_name, FactCostDaily.scope_key)
+
+    def _fact_columns(self) -> CostColumns:
+        return CostColumns(
+            from_clause=FactCostDaily.__table__.outerjoin(
+                DimService.__table__, DimService.service_id == FactCostDaily.service_id
+            ).outerjoin(DimScope.__table__, DimScope.scope_id == FactCostDaily.scope_id),
+            usage_date=FactCostDaily.usage_date,
+            cloud=FactCostDaily.cloud,
+            tenant_id=FactCostDaily.tenant_id,
+            source_ref=FactCostDaily.source_ref,
+            service_key=func.coalesce(DimService.service_key, FactCostDaily.service_key),
+            service_name=self._service_name_expr(),
+            scope_key=func.coalesce(DimScope.scope_key, FactCostDaily.scope_key),
+            account_name=self._account_name_expr(),
         )
 
-    def _aws_account_name_case_expr(self):
-        if not self.aws_account_names:
-            return None
+    def _rollup_columns(self) -> CostColumns:
+        return CostColumns(
+            from_clause=CostDailyRollup.__table__,
+            amount_table=CostDailyRollup.__table__,
+            usage_date=CostDailyRollup.usage_date,
+            cloud=CostDailyRollup.cloud,
+            tenant_id=CostDailyRollup.tenant_id,
+            source_ref=CostDailyRollup.source_ref,
+            service_key=CostDailyRollup.service_key,
+            service_name=CostDailyRollup.service_name,
+            scope_key=CostDailyRollup.scope_key,
+            account_name=func.coalesce(CostDailyRollup.scope_name, CostDailyRollup.scope_key),
+            rollup=True,
+        )
+
+    def _monthly_columns(self) -> CostColumns:
+        # usage_date aponta para month_start: filtros de periodo usam o primeiro dia de cada mes.
+        return CostColumns(
+            from_clause=CostMonthlyRollup.__table__,
+            amount_table=CostMonthlyRollup.__table__,
+            usage_date=CostMonthlyRollup.month_start,
+            cloud=CostMonthlyRollup.cloud,
+            tenant_id=CostMonthlyRollup.tenant_id,
+            source_ref=CostMonthlyRollup.source_ref,
+            service_key=CostMonthlyRollup.service_key,
+            service_name=CostMonthlyRollup.service_name,
+            scope_key=CostMonthlyRollup.scope_key,
+            account_name=func.coalesce(CostMonthlyRollup.scope_name, CostMonthlyRollup.scope_key),
+            rollup=True,
+        )
+
+    def _source_columns(self) -> CostColumns:
+        return self._rollup_columns() if self._use_rollup() else self._fact_columns()
+
+    def _columns(self, filters: QueryFilters | None = None) -> CostColumns:
+        cols = self._source_columns()
+        if filters is not None and self._use_daily_fx(filters):
+            # A serie cobre todo dia que as consultas dos filtros leem (periodo anterior e ano acumulado), entao
+            # o INNER JOIN nao perde linhas e deixa o planner usar a serie (pequena) como lado do hash.
+            scope = filters.cache_scope()
+            series = self._daily_rate_series(scope.start, scope.end)
+            cols = replace(
+                cols,
+                from_clause=cols.from_clause.join(series, series.c.rate_date == cols.usage_date),
+                fx_rate=series.c.brl_per_usd,
+            )
+        return cols
+
+    @staticmethod
+    def _use_daily_fx(filters: QueryFilters) -> bool:
+        return settings.fx_conversion_mode == "daily" and filters.currency.upper() != "USD"
+
+    @staticmethod
+    def _daily_rate_series(start: date, end: date):
+        """(rate_date, brl_per_usd) para cada dia de [start, end], com a ultima cotacao conhecida em cada dia.
 
-        whens = []
-        for account_id, account_name in self.aws_account_names.items():
-            whens.append(
-                (
-                    (FactCostDaily.cloud == "aws") & (func.coalesce(DimScope.scope_key, FactCostDaily.scope_key) == account_id),
-                    literal(account_name),
+        Um probe por dia no indice de rate_date (ORDER BY rate_date DESC LIMIT 1); sem cotacao anterior
+        vale o mesmo fallback do modo as-of.
+        """
+        days = func.generate_series(start, end, literal_column("interval '1 day'")).table_valued("day").render_derived()
+        day = cast(days.c.day, Date)
+        latest = (
+            select(
+                case(
+                    (DimCurrencyRate.from_currency == "USD", DimCurrencyRate.rate),
+                    else_=1 / DimCurrencyRate.rate,
+                ).label("brl_per_usd")
+            )
+            .where(
+                or_(
+                    and_(DimCurrencyRate.from_currency == "USD", DimCurrencyRate.to_currency == "BRL"),
+                    and_(DimCurrencyRate.from_currency == "BRL", DimCurrencyRate.to_currency == "USD"),
                 )
             )
+            .where(DimCurrencyRate.rate > 0)
+            .where(DimCurrencyRate.rate_date <= day)
+            .order_by(DimCurrencyRate.rate_date.desc(), (DimCurrencyRate.from_currency == "USD").desc())
+            .limit(1)
+            .lateral("latest_rate")
+        )
+        fallback = settings.usd_rate_fallback if settings.usd_rate_fallback and settings.usd_rate_fallback > 0 else 1.0
+        return (
+            select(
+                day.label("rate_date"),
+                func.coalesce(latest.c.brl_per_usd, cast(literal(fallback), Numeric(18, 8))).label("brl_per_usd"),
+            )
+            .select_from(days.outerjoin(latest, true()))
+            .subquery("fx_daily")
+        )
+
+    def _converted_by_day(self, filters: QueryFilters):
+        """(usage_date, amount) em BRL por dia no modo daily: agrega antes de converter.
+
+        Soma os componentes (amount_brl, USD sem BRL, demais moedas) por dia na fonte e so entao
+        junta a serie de cotacoes: o join fica com ~1 linha por dia em vez de 1 por linha da fonte,
+        e a agregacao da fonte continua elegivel a indice e plano paralelo.
+        """
+        cols = self._source_columns()
+        _, *components = self._component_sums(cols)
+        stmt = select(
+            cols.usage_date.label("usage_date"),
+            *(func.coalesce(component, 0).label(name) for component, name in zip(components, ("brl", "usd", "other"))),
+        ).select_from(cols.from_clause)
+        stmt = self._apply_filters(stmt, filters, cols)
+        by_day = self._apply_aws_source_scope(stmt, filters.cloud, "service", cols).group_by(cols.usage_date).subquery("by_day")
+        series = self._daily_rate_series(filters.start, filters.end)
+        return (
+            select(
+                by_day.c.usage_date,
+                (by_day.c.brl + by_day.c.usd * series.c.brl_per_usd + by_day.c.other).label("amount"),
+            )
+            .select_from(by_day.join(series, series.c.rate_date == by_day.c.usage_date))
+            .subquery("converted_by_day")
+        )
 
-        return case(*whens, else_=None)
+    @staticmethod
+    def _component_sums(cols: CostColumns) -> tuple:
+        """SUMs de (amount, amount_brl, USD sem BRL, demais moedas sem BRL) na fonte de `cols`.
+
+        amount e a visao USD; em BRL o valor e amount_brl + USD * cotacao + demais (mesma regra do _amount_expr).
+        """
+        if cols.rollup:
+            table = cols.amount_table
+            return (
+                func.sum(table.c.amount),
+                func.sum(table.c.amount_brl),
+                func.sum(table.c.usd_without_brl),
+                func.sum(table.c.other_without_brl),
+            )
+        without_brl = FactCostDaily.amount_brl.is_(None)
+        return (
+            func.sum(FactCostDaily.amount),
+            func.sum(FactCostDaily.amount_brl),
+            func.sum(FactCostDaily.amount).filter(without_brl & (FactCostDaily.currency_code == "USD")),
+            func.sum(FactCostDaily.amount).filter(without_brl & (FactCostDaily.currency_code != "USD")),
+        )
 
     @staticmethod
-    def _load_aws_account_names() -> dict[str, str]:
-        try:
-            raw = json.loads(settings.aws_account_names_json or "{}")
-        except json.JSONDecodeError:
-            return {}
-        if not isinstance(raw, dict):
-            return {}
-        return {str(key).strip(): str(value).strip() for key, value in raw.items() if str(key).strip()}
+    def _use_rollup() -> bool:
+        # A rollup guarda todas as dimensoes que QueryFilters filtra (tenant, cloud, dia, source, servico,
+        # conta), entao a escolha da fonte so depende de COST_ROLLUP_ENABLED.
+        return settings.cost_rollup_enabled
 
     @staticmethod
-    def _apply_aws_source_scope(stmt, cloud: str, mode: str):
+    def _apply_aws_source_scope(stmt, cloud: str, mode: str, cols: CostColumns | None = None):
+        source_ref = cols.source_ref if cols is not None else FactCostDaily.source_ref
+        cloud_col = cols.cloud if cols is not None else FactCostDaily.cloud
         if mode == "service":
+            service_key = cols.service_key if cols is not None else FactCostDaily.service_key
             if cloud == "aws":
                 return stmt.where(
-                    FactCostDaily.source_ref == "aws_ce_service_cli"
-                ).where(FactCostDaily.service_key != "__ALL__")
+                    source_ref == "aws_ce_service_cli"
+                ).where(service_key != "__ALL__")
             if cloud == "all":
                 return stmt.where(
-                    (FactCostDaily.cloud != "aws")
+                    (cloud_col != "aws")
                     | (
-                        (FactCostDaily.cloud == "aws")
-                        & (FactCostDaily.source_ref == "aws_ce_service_cli")
+                        (cloud_col == "aws")
+                        & (source_ref == "aws_ce_service_cli")
                     )
-                ).where((FactCostDaily.cloud != "aws") | (FactCostDaily.service_key != "__ALL__"))
+                ).where((cloud_col != "aws") | (service_key != "__ALL__"))
             return stmt
         if mode == "account":
+            scope_key = cols.scope_key if cols is not None else FactCostDaily.scope_key
             if cloud == "aws":
                 return stmt.where(
-                    FactCostDaily.source_ref == "aws_ce_account_cli"
-                ).where(FactCostDaily.scope_key != "__ALL__")
+                    source_ref == "aws_ce_account_cli"
+                ).where(scope_key != "__ALL__")
             if cloud == "all":
                 return stmt.where(
-                    (FactCostDaily.cloud != "aws")
+                    (cloud_col != "aws")
                     | (
-                        (FactCostDaily.cloud == "aws")
-                        & (FactCostDaily.source_ref == "aws_ce_account_cli")
+                        (cloud_col == "aws")
+                        & (source_ref == "aws_ce_account_cli")
                     )
-                ).where((FactCostDaily.cloud != "aws") | (FactCostDaily.scope_key != "__ALL__"))
+                ).where((cloud_col != "aws") | (scope_key != "__ALL__"))
             return stmt
         return stmt
 
@@ -138,52 +334,40 @@ class FactCostRepository:
         source_ref: str,
         tenant_id: UUID | None = None,
     ) -> bool:
-        stmt = (
-            select(func.min(FactCostDaily.usage_date), func.max(FactCostDaily.usage_date))
-            .where(FactCostDaily.cloud == cloud)
-            .where(FactCostDaily.source_ref == source_ref)
-        )
-        stmt = self._apply_tenant_filter(stmt, tenant_id)
-        row = self.db.execute(stmt).one()
-        min_date, max_date = row[0], row[1]
-        if min_date is None or max_date is None:
-            return False
-        return min_date <= start and max_date >= end
+        # Responde pela ingest_coverage (intervalos), detectando tambem buracos no meio do periodo.
+        return CoverageRepository(self.db).covers(cloud, start, end, tenant_id=tenant_id, source_ref=source_ref)
 
     def _resolve_brl_per_usd(self, as_of: date) -> float:
-        stmt = (
-            select(
-                DimCurrencyRate.from_currency,
-                DimCurrencyRate.to_currency,
-                DimCurrencyRate.rate,
-            )
-            .where(DimCurrencyRate.rate_date <= as_of)
-            .order_by(DimCurrencyRate.rate_date.desc())
-        )
-        rows = self.db.execute(stmt).all()
-        for row in rows:
-            from_currency = str(row.from_currency or "").upper()
-            to_currency = str(row.to_currency or "").upper()
-            rate = float(row.rate or 0.0)
-            if rate <= 0:
-                continue
-            if from_currency == "USD" and to_currency == "BRL":
-                return rate
-            if from_currency == "BRL" and to_currency == "USD":
-                return 1.0 / rate
+        rate = self.fx_rates.brl_per_usd(self.db, as_of)
+        if rate is not None:
+            return rate
         if settings.usd_rate_fallback and settings.usd_rate_fallback > 0:
             return float(settings.usd_rate_fallback)
         return 1.0
 
-    def _amount_expr(self, currency: str, as_of: date) -> case | Any:
+    def _amount_expr(
+        self,
+        currency: str,
+        as_of: date,
+        cols: CostColumns | None = None,
+        brl_per_usd: float | None = None,
+    ) -> case | Any:
         if currency.upper() == "USD":
-            return FactCostDaily.amount
-        brl_per_usd = self._resolve_brl_per_usd(as_of)
+            return cols.amount_table.c.amount if cols is not None and cols.rollup else FactCostDaily.amount
+        if cols is not None and cols.fx_rate is not None:
+            # Modo daily: cada dia convertido pela sua cotacao (serie juntada em _columns).
+            rate = cols.fx_rate
+        else:
+            rate = literal(brl_per_usd if brl_per_usd is not None else self._resolve_brl_per_usd(as_of))
+        if cols is not None and cols.rollup:
+            table = cols.amount_table
+            # Mesma regra da fact, ja separada por componente: amount_brl + USD * cotacao + demais moedas.
+            return table.c.amount_brl + table.c.usd_without_brl * rate + table.c.other_without_brl
         return case(
             (FactCostDaily.amount_brl.is_not(None), FactCostDaily.amount_brl),
             (
                 FactCostDaily.currency_code == "USD",
-                FactCostDaily.amount * literal(brl_per_usd),
+                FactCostDaily.amount * rate,
             ),
             else_=FactCostDaily.amount,
         )
@@ -248,42 +432,144 @@ class FactCostRepository:
         return int(total or 0) > 0
 
     def has_data_covering_range(self, cloud: str, start: date, end: date, tenant_id: UUID | None = None) -> bool:
-        stmt = select(func.min(FactCostDaily.usage_date), func.max(FactCostDaily.usage_date))
-        stmt = self._apply_tenant_filter(stmt, tenant_id)
-        if cloud != "all":
-            stmt = stmt.where(FactCostDaily.cloud == cloud)
-        row = self.db.execute(stmt).one()
-        min_date, max_date = row[0], row[1]
-        if min_date is None or max_date is None:
-            return False
-        return min_date <= start and max_date >= end
+        return CoverageRepository(self.db).covers(cloud, start, end, tenant_id=tenant_id)
 
+    @memoized
     def total(self, filters: QueryFilters) -> float:
-        amount_expr = self._amount_expr(filters.currency, filters.end)
-        stmt = (
-            select(func.coalesce(func.sum(amount_expr), 0))
-            .select_from(FactCostDaily)
-            .where(FactCostDaily.usage_date.between(filters.start, filters.end))
-        )
-        stmt = self._apply_tenant_filter(stmt, filters.tenant_id)
-        if filters.cloud != "all":
-            stmt = stmt.where(FactCostDaily.cloud == filters.cloud)
-        stmt = self._apply_aws_source_scope(stmt, filters.cloud, "service")
-        if filters.scope_key or filters.accounts:
-            stmt = stmt.join(DimScope, DimScope.scope_id == FactCostDaily.scope_id)
-        if filters.service_key or filters.services:
-            stmt = stmt.join(DimService, DimService.service_id == FactCostDaily.service_id)
-        if filters.scope_key:
-            stmt = stmt.where(DimScope.scope_key == filters.scope_key)
-        if filters.service_key:
-            stmt = stmt.where(DimService.service_key == filters.service_key)
-        if filters.services:
-            stmt = stmt.where(DimService.service_name.in_(filters.services))
-        if filters.accounts:
-            stmt = stmt.where(DimScope.scope_name.in_(filters.accounts))
+        if self._use_daily_fx(filters):
+            # Meses fechados ja somados nao permitem converter dia a dia: o modo daily le so a rollup diaria.
+            converted = self._converted_by_day(filters)
+            value = self.db.execute(select(func.coalesce(func.sum(converted.c.amount), 0))).scalar_one()
+            return float(value or 0)
+        cols = self._columns(filters)
+        closed_months = self._closed_months(filters.start, filters.end) if cols.rollup else None
+        if closed_months is not None:
+            return self._total_by_months(filters, cols, *closed_months)
+        amount_expr = self._amount_expr(filters.currency, filters.end, cols)
+        stmt = select(func.coalesce(func.sum(amount_expr), 0)).select_from(cols.from_clause)
+        stmt = self._apply_filters(stmt, filters, cols)
+        stmt = self._apply_aws_source_scope(stmt, filters.cloud, "service", cols)
         value = self.db.execute(stmt).scalar_one()
         return float(value or 0)
 
+    @staticmethod
+    def _closed_months(start: date, end: date) -> tuple[date, date] | None:
+        """Primeiro e ultimo mes inteiramente contidos em [start, end], se houver."""
+        first_month = start if start.day == 1 else month_ceil(start) + timedelta(days=1)
+        last_month = month_floor(end) if end == month_ceil(end) else month_floor(month_floor(end) - timedelta(days=1))
+        if first_month > last_month:
+            return None
+        return first_month, last_month
+
+    def _total_by_months(self, filters: QueryFilters, daily_cols: CostColumns, first_month: date, last_month: date) -> float:
+        # Meses fechados vem da rollup mensal; so as pontas (inicio/fim parciais) leem a diaria.
+        # YTD passa a custar ~12 linhas por (servico, conta) + a cauda do mes corrente.
+        parts = [(self._monthly_columns(), replace(filters, start=first_month, end=last_month))]
+        if filters.start < first_month:
+            parts.append((daily_cols, replace(filters, end=first_month - timedelta(days=1))))
+        if filters.end > month_ceil(last_month):
+            parts.append((daily_cols, replace(filters, start=month_ceil(last_month) + timedelta(days=1))))
+
+        selects = []
+        for cols, part_filters in parts:
+            amount_expr = self._amount_expr(filters.currency, filters.end, cols)
+            stmt = select(func.coalesce(func.sum(amount_expr), 0).label("total")).select_from(cols.from_clause)
+            stmt = self._apply_filters(stmt, part_filters, cols)
+            selects.append(self._apply_aws_source_scope(stmt, filters.cloud, "service", cols))
+        combined = union_all(*selects).subquery()
+        value = self.db.execute(select(func.coalesce(func.sum(combined.c.total), 0))).scalar_one()
+        return float(value or 0)
+
+    @memoized
+    def window_totals(self, filters: QueryFilters) -> WindowTotals:
+        """Periodo, periodo anterior, mes e ano acumulados (ate filters.end) e serie diaria do periodo.
+
+        Uma unica consulta: as janelas sao SUM(...) FILTER sobre a mesma passada e o GROUPING SETS
+        devolve a serie por dia e a linha de totais juntas. Com a rollup, os meses fechados do ano
+        que nao entram nas demais janelas vem da rollup mensal.
+        """
+        range_days = max((filters.end - filters.start).days + 1, 1)
+        prev_start = filters.start - timedelta(days=range_days)
+        prev_end = filters.start - timedelta(days=1)
+        month_start = filters.end.replace(day=1)
+        year_start = filters.end.replace(month=1, day=1)
+        daily_from = min(prev_start, month_start)
+
+        daily_fx = self._use_daily_fx(filters)
+        cols = self._source_columns()
+        # Cotacao resolvida uma vez por janela de referencia (periodo anterior usa o proprio fim, como no total()).
+        brl_current = brl_previous = None
+        if filters.currency.upper() != "USD" and not daily_fx:
+            brl_current = self._resolve_brl_per_usd(filters.end)
+            brl_previous = self._resolve_brl_per_usd(prev_end)
+
+        closed_months = None
+        if cols.rollup and not daily_fx and daily_from > year_start:
+            closed_months = self._closed_months(year_start, daily_from - timedelta(days=1))
+        parts: list[tuple[str, CostColumns, date]] = []
+        if closed_months is not None:
+            parts.append(("month", self._monthly_columns(), closed_months[0]))
+            daily_from = min(daily_from, month_ceil(closed_months[1]) + timedelta(days=1))
+        else:
+            daily_from = min(daily_from, year_start)
+        parts.append(("day", cols, daily_from))
+
+        selects = []
+        for grain, part_cols, part_start in parts:
+            if daily_fx:
+                # Cada dia ja convertido pela propria cotacao: o periodo anterior usa o mesmo valor.
+                converted = self._converted_by_day(replace(filters, start=part_start))
+                selects.append(
+                    select(
+                        converted.c.usage_date,
+                        literal(grain).label("grain"),
+                        converted.c.amount,
+                        converted.c.amount.label("amount_previous"),
+                    )
+                )
+                continue
+            part_end = closed_months[1] if grain == "month" and closed_months is not None else filters.end
+            stmt = select(
+                part_cols.usage_date.label("usage_date"),
+                literal(grain).label("grain"),
+                self._amount_expr(filters.currency, filters.end, part_cols, brl_current).label("amount"),
+                self._amount_expr(filters.currency, prev_end, part_cols, brl_previous).label("amount_previous"),
+            ).select_from(part_cols.from_clause)
+            stmt = self._apply_filters(stmt, replace(filters, start=part_start, end=part_end), part_cols)
+            selects.append(self._apply_aws_source_scope(stmt, filters.cloud, "service", part_cols))
+        source = union_all(*selects).subquery()
+
+        def daily_between(start: date, end: date):
+            return (source.c.grain == "day") & source.c.usage_date.between(start, end)
+
+        stmt = select(
+            source.c.usage_date,
+            func.grouping(source.c.usage_date).label("is_total"),
+            func.sum(source.c.amount).filter(daily_between(filters.start, filters.end)).label("current"),
+            func.sum(source.c.amount_previous).filter(daily_between(prev_start, prev_end)).label("previous"),
+            func.sum(source.c.amount).filter(daily_between(month_start, filters.end)).label("month_to_date"),
+            func.sum(source.c.amount).filter(source.c.usage_date.between(year_start, filters.end)).label("year_to_date"),
+        ).group_by(func.grouping_sets(source.c.usage_date, tuple_()))
+        rows = self.db.execute(stmt).all()
+
+        totals = next((row for row in rows if row.is_total), None)
+        daily = sorted(
+            (
+                {"date": row.usage_date, "total": float(row.current)}
+                for row in rows
+                if not row.is_total and row.current is not None
+            ),
+            key=lambda item: item["date"],
+        )
+        return WindowTotals(
+            current=float(totals.current or 0) if totals else 0.0,
+            previous=float(totals.previous or 0) if totals else 0.0,
+            month_to_date=float(totals.month_to_date or 0) if totals else 0.0,
+            year_to_date=float(totals.year_to_date or 0) if totals else 0.0,
+            daily=daily,
+        )
+
+    @memoized
     def infer_brl_per_usd(self, filters: QueryFilters) -> float | None:
         stmt = (
             select(
@@ -317,156 +603,220 @@ class FactCostRepository:
             "delta": {"absolute": delta_abs, "percent": delta_pct},
         }
 
+    @memoized
     def timeseries(self, filters: QueryFilters) -> list[dict]:
-        amount_expr = self._amount_expr(filters.currency, filters.end)
+        if self._use_daily_fx(filters):
+            converted = self._converted_by_day(filters)
+            rows = self.db.execute(select(converted.c.usage_date, converted.c.amount).order_by(converted.c.usage_date.asc())).all()
+            return [{"date": row.usage_date, "total": float(row.amount or 0)} for row in rows]
+        cols = self._columns(filters)
+        amount_expr = self._amount_expr(filters.currency, filters.end, cols)
         stmt = (
             select(
-                FactCostDaily.usage_date.label("date"),
+                cols.usage_date.label("date"),
                 func.coalesce(func.sum(amount_expr), 0).label("total"),
             )
-            .group_by(FactCostDaily.usage_date)
-            .order_by(FactCostDaily.usage_date.asc())
+            .select_from(cols.from_clause)
+            .group_by(cols.usage_date)
+            .order_by(cols.usage_date.asc())
         )
-        stmt = self._apply_filters(stmt, filters, join_scope=True, join_service=True)
-        stmt = self._apply_aws_source_scope(stmt, filters.cloud, "service")
+        stmt = self._apply_filters(stmt, filters, cols)
+        stmt = self._apply_aws_source_scope(stmt, filters.cloud, "service", cols)
         rows = self.db.execute(stmt).all()
         return [{"date": row.date, "total": float(row.total or 0)} for row in rows]
 
+    @memoized
     def top_services(self, filters: QueryFilters, limit: int) -> list[RankedItem]:
-        amount_expr = self._amount_expr(filters.currency, filters.end)
-        service_name = self._service_name_expr()
-        service_key = func.coalesce(DimService.service_key, FactCostDaily.service_key)
+        cols = self._columns(filters)
+        amount_expr = self._amount_expr(filters.currency, filters.end, cols)
         stmt = (
             select(
-                service_key.label("key"),
-                service_name.label("name"),
+                cols.service_key.label("key"),
+                cols.service_name.label("name"),
                 func.coalesce(func.sum(amount_expr), 0).label("total"),
             )
-            .outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
-            .group_by(service_key, service_name)
+            .select_from(cols.from_clause)
+            .group_by(cols.service_key, cols.service_name)
             .order_by(func.sum(amount_expr).desc())
             .limit(limit)
         )
-        stmt = self._apply_filters(
-            stmt,
-            filters,
-            join_scope=True,
-            join_service=False,
-            scope_joined=False,
-            service_joined=True,
-        )
-        stmt = self._apply_aws_source_scope(stmt, filters.cloud, "service")
+        stmt = self._apply_filters(stmt, filters, cols)
+        stmt = self._apply_aws_source_scope(stmt, filters.cloud, "service", cols)
         rows = self.db.execute(stmt).all()
         return [RankedItem(key=row.key, name=row.name, total=float(row.total or 0)) for row in rows]
 
+    @memoized
     def top_scopes(self, filters: QueryFilters, limit: int) -> list[RankedItem]:
-        amount_expr = self._amount_expr(filters.currency, filters.end)
-        account_name = self._account_name_expr()
-        account_key = func.coalesce(DimScope.scope_key, FactCostDaily.scope_key)
+        cols = self._columns(filters)
+        amount_expr = self._amount_expr(filters.currency, filters.end, cols)
         stmt = (
             select(
-                account_key.label("key"),
-                account_name.label("name"),
+                cols.scope_key.label("key"),
+                cols.account_name.label("name"),
                 func.coalesce(func.sum(amount_expr), 0).label("total"),
             )
-            .outerjoin(DimScope, DimScope.scope_id == FactCostDaily.scope_id)
-            .group_by(account_key, account_name)
+            .select_from(cols.from_clause)
+            .group_by(cols.scope_key, cols.account_name)
             .order_by(func.sum(amount_expr).desc())
             .limit(limit)
         )
-        stmt = self._apply_filters(
-            stmt,
-            filters,
-            join_scope=False,
-            join_service=True,
-            scope_joined=True,
-            service_joined=False,
-        )
+        stmt = self._apply_filters(stmt, filters, cols)
         rows = self.db.execute(stmt).all()
         return [RankedItem(key=row.key, name=row.name, total=float(row.total or 0)) for row in rows]
 
+    @memoized
     def daily_with_service_breakdown(self, filters: QueryFilters, top_n: int) -> list[dict]:
-        amount_expr = self._amount_expr(filters.currency, filters.end)
-        service_name = self._service_name_expr()
-        count_stmt = (
-            select(func.count(func.distinct(service_name)))
-            .select_from(FactCostDaily)
-            .outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
+        """Custo por dia com quebra pelos top servicos do periodo e o resto em "Others", em uma consulta.
+
+        Agrupa por (dia, servico), ranqueia os servicos pelo total do periodo (SUM OVER por servico +
+        dense_rank) e reagrupa por (dia, balde): volta no maximo dias x top_n linhas. Com mais servicos
+        que `top_n` (e top_n > 1), os servicos a partir da posicao `top_n` viram "Others".
+        """
+        cols = self._columns(filters)
+        amount_expr = self._amount_expr(filters.currency, filters.end, cols)
+        per_day_stmt = (
+            select(
+                cols.usage_date.label("usage_date"),
+                cols.service_name.label("service_name"),
+                func.coalesce(func.sum(amount_expr), 0).label("total"),
+            )
+            .select_from(cols.from_clause)
+            .group_by(cols.usage_date, cols.service_name)
         )
-        count_stmt = self._apply_filters(
-            count_stmt,
-            filters,
-            join_scope=True,
-            join_service=False,
-            scope_joined=False,
-            service_joined=True,
+        per_day_stmt = self._apply_filters(per_day_stmt, filters, cols)
+        per_day = self._apply_aws_source_scope(per_day_stmt, filters.cloud, "service", cols).subquery("per_day")
+
+        with_totals = select(
+            per_day.c.usage_date,
+            per_day.c.service_name,
+            per_day.c.total,
+            func.sum(per_day.c.total).over(partition_by=per_day.c.service_name).label("service_total"),
+        ).subquery("with_totals")
+        ranked = select(
+            with_totals.c.usage_date,
+            with_totals.c.service_name,
+            with_totals.c.total,
+            func.dense_rank()
+            .over(order_by=(with_totals.c.service_total.desc(), with_totals.c.service_name))
+            .label("position"),
+        ).subquery("ranked")
+        services = func.max(ranked.c.position).over()
+        has_others = (services > top_n) if top_n > 1 else literal(False)
+        bucket = case(
+            (has_others & ((ranked.c.position >= top_n) | ranked.c.service_name.is_(None)), literal("Others")),
+            else_=func.coalesce(ranked.c.service_name, "N/A"),
         )
-        count_stmt = self._apply_aws_source_scope(count_stmt, filters.cloud, "service")
-        distinct_services = int(self.db.execute(count_stmt).scalar_one() or 0)
+        bucketed = select(
+            ranked.c.usage_date,
+            bucket.label("service"),
+            ranked.c.position,
+            ranked.c.total,
+        ).subquery("bucketed")
+        stmt = (
+            select(
+                bucketed.c.usage_date.label("date"),
+                bucketed.c.service,
+                func.sum(bucketed.c.total).label("total"),
+            )
+            .group_by(bucketed.c.usage_date, bucketed.c.service)
+            .order_by(bucketed.c.usage_date.asc(), func.min(bucketed.c.position))
+        )
+        return self._daily_breakdown_result(self.db.execute(stmt).all())
 
-        has_others = top_n > 1 and distinct_services > top_n
-        effective_top_n = max(top_n - 1, 1) if has_others else top_n
+    @staticmethod
+    def _daily_breakdown_result(rows) -> list[dict]:
+        """Linhas (date, service, total) ja ordenadas por dia e posicao do servico -> itens do daily-v2."""
+        by_date: dict[date, dict] = {}
+        for row in rows:
+            bucket_row = by_date.setdefault(row.date, {"date": row.date, "total": 0.0, "byService": {}})
+            total_value = float(row.total or 0)
+            bucket_row["total"] += total_value
+            bucket_row["byService"][row.service] = total_value
+        return list(by_date.values())
 
-        base_stmt = (
-            select(service_name.label("service_name"), func.coalesce(func.sum(amount_expr), 0).label("total"))
-            .select_from(FactCostDaily)
-            .outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
-            .group_by(service_name)
-            .order_by(func.sum(amount_expr).desc())
-            .limit(effective_top_n)
-        )
-        base_stmt = self._apply_filters(
-            base_stmt,
-            filters,
-            join_scope=True,
-            join_service=False,
-            scope_joined=False,
-            service_joined=True,
+    @memoized
+    def top_services_ranked(self, filters: QueryFilters, limit: int) -> list[dict]:
+        """Top servicos do periodo com total anterior, share e "Others" em uma unica consulta.
+
+        Agrupa por servico a janela combinada [inicio do periodo anterior, fim] com um SUM FILTER
+        por periodo; row_number/count sobre o agrupado definem o top e o balde "Others" (quando ha
+        mais servicos que `limit`, os excedentes a partir da posicao `limit` viram Others). O anterior
+        de cada servico e o dele proprio; o do Others soma todos os servicos fora do top atual.
+        """
+        range_days = max((filters.end - filters.start).days + 1, 1)
+        prev_start = filters.start - timedelta(days=range_days)
+        prev_end = filters.start - timedelta(days=1)
+        cols = self._columns(filters)
+        name_col = cols.service_name
+        current_amount = self._amount_expr(filters.currency, filters.end, cols)
+        previous_amount = self._amount_expr(filters.currency, prev_end, cols)
+
+        grouped_stmt = (
+            select(
+                name_col.label("name"),
+                func.sum(current_amount).filter(cols.usage_date.between(filters.start, filters.end)).label("current"),
+                func.sum(previous_amount).filter(cols.usage_date.between(prev_start, prev_end)).label("previous"),
+            )
+            .select_from(cols.from_clause)
+            .group_by(name_col)
         )
-        base_stmt = self._apply_aws_source_scope(base_stmt, filters.cloud, "service")
-        top_rows = self.db.execute(base_stmt).all()
-        top_services = [row.service_name for row in top_rows if row.service_name]
+        grouped_stmt = self._apply_filters(grouped_stmt, replace(filters, start=prev_start), cols)
+        grouped = self._apply_aws_source_scope(grouped_stmt, filters.cloud, "service", cols).subquery()
 
-        detail_stmt = (
+        ranked = select(
+            grouped.c.name,
+            grouped.c.current,
+            grouped.c.previous,
+            func.row_number().over(order_by=(grouped.c.current.desc().nulls_last(), grouped.c.name)).label("position"),
+            func.count(grouped.c.current).over().label("services"),
+            func.sum(grouped.c.current).over().label("period_total"),
+        ).subquery()
+        has_others = (ranked.c.services > limit) if limit > 1 else literal(False)
+        top_n = case((has_others, limit - 1), else_=limit)
+        # Servicos so com custo no periodo anterior entram apenas no "Others" (previous).
+        bucket = case(
+            ((ranked.c.position <= top_n) & ranked.c.current.is_not(None), ranked.c.name),
+            (has_others, literal("Others")),
+            else_=None,
+        )
+        bucketed = select(
+            bucket.label("name"),
+            ranked.c.position,
+            ranked.c.current,
+            ranked.c.previous,
+            ranked.c.period_total,
+        ).subquery()
+        stmt = (
             select(
-                FactCostDaily.usage_date.label("date"),
-                service_name.label("service"),
-                func.coalesce(func.sum(amount_expr), 0).label("total"),
+                bucketed.c.name,
+                func.coalesce(func.sum(bucketed.c.current), 0).label("total"),
+                func.coalesce(func.sum(bucketed.c.previous), 0).label("previous"),
+                func.max(bucketed.c.period_total).label("period_total"),
+                func.min(bucketed.c.position).label("position"),
             )
-            .select_from(FactCostDaily)
-            .outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
-            .group_by(FactCostDaily.usage_date, service_name)
-            .order_by(FactCostDaily.usage_date.asc())
-        )
-        detail_stmt = self._apply_filters(
-            detail_stmt,
-            filters,
-            join_scope=True,
-            join_service=False,
-            scope_joined=False,
-            service_joined=True,
-        )
-        detail_stmt = self._apply_aws_source_scope(detail_stmt, filters.cloud, "service")
-        rows = self.db.execute(detail_stmt).all()
-
-        by_date: dict[date, dict[str, float]] = {}
-        for row in rows:
-            item_date: date = row.date
-            service_name: str = row.service or "N/A"
-            bucket = by_date.setdefault(item_date, {"total": 0.0, "byService": {}})
-            total_value = float(row.total or 0)
-            bucket["total"] += total_value
-            key = service_name if (service_name in top_services or not has_others) else "Others"
-            bucket["byService"][key] = bucket["byService"].get(key, 0.0) + total_value
+            .where(bucketed.c.name.is_not(None))
+            .group_by(bucketed.c.name)
+            .order_by(func.min(bucketed.c.position))
+            .limit(limit)
+        )
+        return self._ranked_services_result(self.db.execute(stmt).all())
 
+    @staticmethod
+    def _ranked_services_result(rows) -> list[dict]:
+        """Baldes (name, total, previous, period_total) na ordem do ranking -> itens do top-services-v2."""
         result: list[dict] = []
-        for item_date in sorted(by_date.keys()):
-            row = by_date[item_date]
+        for row in rows:
+            total = float(row.total or 0)
+            previous = float(row.previous or 0)
+            period_total = float(row.period_total or 0)
+            delta = total - previous
             result.append(
                 {
-                    "date": item_date,
-                    "total": row["total"],
-                    "byService": row["byService"],
+                    "serviceName": row.name,
+                    "total": total,
+                    "sharePct": (total / period_total * 100.0) if period_total > 0 else 0.0,
+                    "delta": delta,
+                    "deltaPct": (delta / previous * 100.0) if previous > 0 else 0.0,
                 }
             )
         return result
@@ -477,6 +827,7 @@ class FactCostRepository:
     def top_accounts_with_delta(self, filters: QueryFilters, limit: int) -> list[dict]:
         return self._top_ranked_with_delta(filters, limit=limit, group="account")
 
+    @memoized
     def cost_explorer_breakdown(self, filters: QueryFilters, limit: int, group_by: str) -> list[dict]:
         group = "account" if group_by == "account" else "service"
         items = (
@@ -505,6 +856,7 @@ class FactCostRepository:
             )
         return result
 
+    @memoized
     def cost_explorer_trend(
         self,
         filters: QueryFilters,
@@ -512,108 +864,113 @@ class FactCostRepository:
         selected_item: str | None,
         limit: int = 5,
     ) -> list[dict]:
+        """Serie diaria (total, selecionado, demais) em uma consulta, uma linha por dia.
+
+        Com `selected_item` o selecionado e esse nome; sem ele, sao os itens nomeados do breakdown (top
+        do periodo), ranqueados no proprio statement via SUM OVER + dense_rank.
+        """
         group = "account" if group_by == "account" else "service"
-        name_col = self._account_name_expr() if group == "account" else self._service_name_expr()
-        join_scope = group == "service"
-        join_service = group == "account"
-        scope_joined = group == "account"
-        service_joined = group == "service"
-        amount_expr = self._amount_expr(filters.currency, filters.end)
-
-        focus_items = [selected_item] if selected_item else []
-        if not focus_items:
-            breakdown = self.cost_explorer_breakdown(filters, limit=limit, group_by=group)
-            focus_items = [item["label"] for item in breakdown[:limit] if item["label"]]
-
-        detail_stmt = (
+        cols = self._columns(filters)
+        name_col = cols.account_name if group == "account" else cols.service_name
+        amount_expr = self._amount_expr(filters.currency, filters.end, cols)
+
+        per_name_stmt = (
             select(
-                FactCostDaily.usage_date.label("date"),
-                name_col.label("name"),
+                cols.usage_date.label("usage_date"),
+                func.coalesce(name_col, "N/A").label("name"),
                 func.coalesce(func.sum(amount_expr), 0).label("total"),
             )
-            .select_from(FactCostDaily)
-            .group_by(FactCostDaily.usage_date, name_col)
-            .order_by(FactCostDaily.usage_date.asc())
+            .select_from(cols.from_clause)
+            .group_by(cols.usage_date, name_col)
         )
-        if group == "service":
-            detail_stmt = detail_stmt.outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
-        else:
-            detail_stmt = detail_stmt.outerjoin(DimScope, DimScope.scope_id == FactCostDaily.scope_id)
-        detail_stmt = self._apply_filters(
-            detail_stmt,
-            filters,
-            join_scope=join_scope,
-            join_service=join_service,
-            scope_joined=scope_joined,
-            service_joined=service_joined,
-        )
-        detail_stmt = self._apply_aws_source_scope(detail_stmt, filters.cloud, group)
-        rows = self.db.execute(detail_stmt).all()
-
-        series_by_date: dict[date, dict[str, float]] = {}
-        for row in rows:
-            item_date = row.date
-            label = str(row.name or "N/A")
-            total = float(row.total or 0.0)
-            bucket = series_by_date.setdefault(item_date, {"total": 0.0, "selected": 0.0, "others": 0.0})
-            bucket["total"] += total
-            if label in focus_items:
-                bucket["selected"] += total
-            else:
-                bucket["others"] += total
+        per_name_stmt = self._apply_filters(per_name_stmt, filters, cols)
+        per_name = self._apply_aws_source_scope(per_name_stmt, filters.cloud, group, cols).subquery("per_name")
 
-        result: list[dict] = []
-        for item_date in sorted(series_by_date.keys()):
-            row = series_by_date[item_date]
-            result.append(
-                {
-                    "date": item_date,
-                    "total": row["total"],
-                    "selected": row["selected"],
-                    "others": row["others"],
-                }
+        if selected_item:
+            flagged = select(
+                per_name.c.usage_date,
+                per_name.c.total,
+                (per_name.c.name == selected_item).label("selected"),
+            ).subquery("flagged")
+        else:
+            with_totals = select(
+                per_name.c.usage_date,
+                per_name.c.name,
+                per_name.c.total,
+                func.sum(per_name.c.total).over(partition_by=per_name.c.name).label("name_total"),
+            ).subquery("with_totals")
+            # Mesmo recorte do breakdown: servicos reservam uma posicao para o "Others" (top limit - 1).
+            top_n = limit - 1 if group == "service" and limit > 1 else limit
+            position = func.dense_rank().over(order_by=(with_totals.c.name_total.desc(), with_totals.c.name))
+            flagged = select(
+                with_totals.c.usage_date,
+                with_totals.c.total,
+                (position <= top_n).label("selected"),
+            ).subquery("flagged")
+        stmt = (
+            select(
+                flagged.c.usage_date.label("date"),
+                func.sum(flagged.c.total).label("total"),
+                func.coalesce(func.sum(flagged.c.total).filter(flagged.c.selected), 0).label("selected"),
+                func.coalesce(func.sum(flagged.c.total).filter(~flagged.c.selected), 0).label("others"),
             )
-        return result
+            .group_by(flagged.c.usage_date)
+            .order_by(flagged.c.usage_date.asc())
+        )
+        return self._trend_result(self.db.execute(stmt).all())
+
+    @staticmethod
+    def _trend_result(rows) -> list[dict]:
+        return [
+            {
+                "date": row.date,
+                "total": float(row.total or 0.0),
+                "selected": float(row.selected or 0.0),
+                "others": float(row.others or 0.0),
+            }
+            for row in rows
+        ]
 
+    @memoized
     def filter_lists(self, cloud: str, month: str | None = None, tenant_id: UUID | None = None) -> dict[str, list[str]]:
-        service_name = self._service_name_expr()
-        account_name = self._account_name_expr()
+        cols = self._columns()
+        amount = CostDailyRollup.amount if cols.rollup else FactCostDaily.amount
 
         services_stmt = (
-            select(service_name.label("service_name"), func.sum(FactCostDaily.amount).label("total"))
-            .select_from(FactCostDaily)
-            .outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
-            .group_by(service_name)
-            .order_by(func.sum(FactCostDaily.amount).desc())
+            select(cols.service_name.label("service_name"), func.sum(amount).label("total"))
+            .select_from(cols.from_clause)
+            .group_by(cols.service_name)
+            .order_by(func.sum(amount).desc())
             .limit(50)
         )
         accounts_stmt = (
-            select(account_name.label("scope_name"), func.sum(FactCostDaily.amount).label("total"))
-            .select_from(FactCostDaily)
-            .outerjoin(DimScope, DimScope.scope_id == FactCostDaily.scope_id)
-            .group_by(account_name)
-            .order_by(func.sum(FactCostDaily.amount).desc())
+            select(cols.account_name.label("scope_name"), func.sum(amount).label("total"))
+            .select_from(cols.from_clause)
+            .group_by(cols.account_name)
+            .order_by(func.sum(amount).desc())
             .limit(50)
         )
         if cloud != "all":
-            services_stmt = services_stmt.where(FactCostDaily.cloud == cloud)
-            accounts_stmt = accounts_stmt.where(FactCostDaily.cloud == cloud)
-            services_stmt = self._apply_aws_source_scope(services_stmt, cloud, "service")
-            accounts_stmt = self._apply_aws_source_scope(accounts_stmt, cloud, "account")
-        services_stmt = self._apply_tenant_filter(services_stmt, tenant_id)
-        accounts_stmt = self._apply_tenant_filter(accounts_stmt, tenant_id)
+            services_stmt = services_stmt.where(cols.cloud == cloud)
+            accounts_stmt = accounts_stmt.where(cols.cloud == cloud)
+            services_stmt = self._apply_aws_source_scope(services_stmt, cloud, "service", cols)
+            accounts_stmt = self._apply_aws_source_scope(accounts_stmt, cloud, "account", cols)
+        if tenant_id is not None:
+            services_stmt = services_stmt.where(cols.tenant_id == tenant_id)
+            accounts_stmt = accounts_stmt.where(cols.tenant_id == tenant_id)
         if month:
             year, month_number = month.split("-")
             start = date(int(year), int(month_number), 1)
             end = date(int(year), int(month_number), 28) + timedelta(days=4)
             end = end - timedelta(days=end.day)
-            services_stmt = services_stmt.where(FactCostDaily.usage_date.between(start, end))
-            accounts_stmt = accounts_stmt.where(FactCostDaily.usage_date.between(start, end))
+            services_stmt = services_stmt.where(cols.usage_date.between(start, end))
+            accounts_stmt = accounts_stmt.where(cols.usage_date.between(start, end))
 
         services = [row.service_name for row in self.db.execute(services_stmt).all() if row.service_name]
         accounts = [row.scope_name for row in self.db.execute(accounts_stmt).all() if row.scope_name]
         return {"services": services, "accounts": accounts}
 
+    @memoized
     def _top_ranked_with_delta(
         self,
         filters: QueryFilters,
@@ -621,72 +978,65 @@ class FactCostRepository:
         group: str,
         include_others: bool = False,
     ) -> list[dict]:
-        amount_expr = self._amount_expr(filters.currency, filters.end)
+        cols = self._columns(filters)
+        amount_expr = self._amount_expr(filters.currency, filters.end, cols)
         if group == "service":
-            name_col = self._service_name_expr()
-            join_scope = True
-            join_service = False
+            name_col = cols.service_name
             key_name = "serviceName"
         else:
-            name_col = self._account_name_expr()
-            join_scope = False
-            join_service = True
+            name_col = cols.account_name
             key_name = "linkedAccount"
 
         current_stmt = (
             select(name_col.label("name"), func.coalesce(func.sum(amount_expr), 0).label("total"))
-            .select_from(FactCostDaily)
+            .select_from(cols.from_clause)
             .group_by(name_col)
             .order_by(func.sum(amount_expr).desc())
             .limit(limit - 1 if include_others and limit > 1 else limit)
         )
-        if group == "service":
-            current_stmt = current_stmt.outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
-        else:
-            current_stmt = current_stmt.outerjoin(DimScope, DimScope.scope_id == FactCostDaily.scope_id)
-        current_stmt = self._apply_filters(
-            current_stmt,
-            filters,
-            join_scope=join_scope,
-            join_service=join_service,
-            scope_joined=(group == "account"),
-            service_joined=(group == "service"),
-        )
+        current_stmt = self._apply_filters(current_stmt, filters, cols)
         current_stmt = self._apply_aws_source_scope(
             current_stmt,
             filters.cloud,
             "service" if group == "service" else "account",
+            cols,
         )
         current_rows = self.db.execute(current_stmt).all()
 
         prev_filters = self._previous_period(filters)
         prev_stmt = (
             select(name_col.label("name"), func.coalesce(func.sum(amount_expr), 0).label("total"))
-            .select_from(FactCostDaily)
+            .select_from(cols.from_clause)
             .group_by(name_col)
         )
-        if group == "service":
-            prev_stmt = prev_stmt.outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
-        else:
-            prev_stmt = prev_stmt.outerjoin(DimScope, DimScope.scope_id == FactCostDaily.scope_id)
-        prev_stmt = self._apply_filters(
-            prev_stmt,
-            prev_filters,
-            join_scope=join_scope,
-            join_service=join_service,
-            scope_joined=(group == "account"),
-            service_joined=(group == "service"),
-        )
+        prev_stmt = self._apply_filters(prev_stmt, prev_filters, cols)
         prev_stmt = self._apply_aws_source_scope(
             prev_stmt,
             prev_filters.cloud,
             "service" if group == "service" else "account",
+            cols,
         )
         prev_rows = self.db.execute(prev_stmt).all()
         prev_map = {row.name: float(row.total or 0) for row in prev_rows}
+        return self._ranked_with_delta_result(
+            current_rows,
+            prev_map,
+            period_total=self.total(filters),
+            previous_period_total=self.total(prev_filters),
+            key_name=key_name,
+            include_others=include_others,
+        )
 
-        period_total = self.total(filters)
-        previous_period_total = self.total(prev_filters)
+    @staticmethod
+    def _ranked_with_delta_result(
+        current_rows,
+        prev_map: dict[str, float],
+        period_total: float,
+        previous_period_total: float,
+        key_name: str,
+        include_others: bool,
+    ) -> list[dict]:
+        """Top do periodo (name, total) + totais do anterior -> itens com share, delta e o "Others" opcional."""
         result: list[dict] = []
         top_total = 0.0
         top_prev_total = 0.0
@@ -725,31 +1075,22 @@ class FactCostRepository:
             )
         return result
 
-    def _apply_filters(
-        self,
-        stmt,
-        filters: QueryFilters,
-        join_scope: bool = False,
-        join_service: bool = False,
-        scope_joined: bool = False,
-        service_joined: bool = False,
-    ):
-        stmt = stmt.where(FactCostDaily.usage_date.between(filters.start, filters.end))
-        stmt = self._apply_tenant_filter(stmt, filters.tenant_id)
+    @staticmethod
+    def _apply_filters(stmt, filters: QueryFilters, cols: CostColumns):
+        # O FROM (fact + dimensoes ou rollup) vem de cols.from_clause; aqui so entram os predicados.
+        stmt = stmt.where(cols.usage_date.between(filters.start, filters.end))
+        if filters.tenant_id is not None:
+            stmt = stmt.where(cols.tenant_id == filters.tenant_id)
         if filters.cloud != "all":
-            stmt = stmt.where(FactCostDaily.cloud == filters.cloud)
-        if (join_scope or filters.scope_key or filters.accounts) and not scope_joined:
-            stmt = stmt.outerjoin(DimScope, DimScope.scope_id == FactCostDaily.scope_id)
-        if (join_service or filters.service_key or filters.services) and not service_joined:
-            stmt = stmt.outerjoin(DimService, DimService.service_id == FactCostDaily.service_id)
+            stmt = stmt.where(cols.cloud == filters.cloud)
         if filters.scope_key:
-            stmt = stmt.where(DimScope.scope_key == filters.scope_key)
+            stmt = stmt.where(cols.scope_key == filters.scope_key)
         if filters.service_key:
-            stmt = stmt.where(DimService.service_key == filters.service_key)
+            stmt = stmt.where(cols.service_key == filters.service_key)
         if filters.services:
-            stmt = stmt.where(self._service_name_expr().in_(filters.services))
+            stmt = stmt.where(cols.service_name.in_(filters.services))
         if filters.accounts:
-            stmt = stmt.where(self._account_name_expr().in_(filters.accounts))
+            stmt = stmt.where(cols.account_name.in_(filters.accounts))
         return stmt
 
     @staticmethod
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable
+from datetime import date
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from finops_api.core.config import settings
+from finops_api.models.dim_currency_rate import DimCurrencyRate
+
+USD_BRL = ("USD", "BRL")
+BRL_USD = ("BRL", "USD")
+
+
+class FxRateTable:
+    """Cotacoes USD/BRL em memoria, indexadas por data (lista ordenada + bisect para o "as of").
+
+    Carrega a dim_currency_rate uma vez (so os pares USD/BRL e BRL/USD), recebe as escritas do
+    proprio processo via `record` e recarrega a cada FX_RATE_TABLE_REFRESH_SECONDS para enxergar
+    cotacoes gravadas por outros processos.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pairs: dict[date, dict[tuple[str, str], float]] = {}
+        self._dates: list[date] = []
+        self._rates: list[float] = []
+        self._loaded_at: float | None = None
+
+    @classmethod
+    def from_rates(cls, rates: Iterable[tuple[date, str, str, float]]) -> FxRateTable:
+        table = cls()
+        with table._lock:
+            table._replace(rates)
+        return table
+
+    def brl_per_usd(self, db: Session, as_of: date) -> float | None:
+        """Ultima cotacao com rate_date <= as_of."""
+        self._ensure_loaded(db)
+        with self._lock:
+            idx = bisect_right(self._dates, as_of) - 1
+            return self._rates[idx] if idx >= 0 else None
+
+    def exact_brl_per_usd(self, db: Session, rate_date: date) -> float | None:
+        self._ensure_loaded(db)
+        with self._lock:
+            idx = bisect_left(self._dates, rate_date)
+            if idx < len(self._dates) and self._dates[idx] == rate_date:
+                return self._rates[idx]
+            return None
+
+    def record(self, rate_date: date, from_currency: str, to_currency: str, rate: float) -> None:
+        """Aplica uma cotacao gravada (sem recarregar a tabela); ignorada se ainda nao carregou."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._set_pair(rate_date, (from_currency.upper().strip(), to_currency.upper().strip()), float(rate))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pairs.clear()
+            self._dates.clear()
+            self._rates.clear()
+            self._loaded_at = None
+
+    def _ensure_loaded(self, db: Session) -> None:
+        loaded_at = self._loaded_at
+        refresh = settings.fx_rate_table_refresh_seconds
+        if loaded_at is not None and (refresh <= 0 or self._clock() - loaded_at < refresh):
+            return
+        stmt = select(
+            DimCurrencyRate.rate_date,
+            DimCurrencyRate.from_currency,
+            DimCurrencyRate.to_currency,
+            DimCurrencyRate.rate,
+        ).where(
+            or_(
+                and_(DimCurrencyRate.from_currency == "USD", DimCurrencyRate.to_currency == "BRL"),
+                and_(DimCurrencyRate.from_currency == "BRL", DimCurrencyRate.to_currency == "USD"),
+            )
+        )
+        rows = [(row.rate_date, row.from_currency, row.to_currency, row.rate) for row in db.execute(stmt).all()]
+        with self._lock:
+            self._replace(rows)
+
+    def _replace(self, rates: Iterable[tuple[date, str, str, float]]) -> None:
+        self._pairs = {}
+        for rate_date, from_currency, to_currency, rate in rates:
+            pair = (str(from_currency or "").upper().strip(), str(to_currency or "").upper().strip())
+            self._pairs.setdefault(rate_date, {})[pair] = float(rate or 0.0)
+        self._dates = []
+        self._rates = []
+        for rate_date in sorted(self._pairs):
+            value = self._resolve(self._pairs[rate_date])
+            if value is not None:
+                self._dates.append(rate_date)
+                self._rates.append(value)
+        self._loaded_at = self._clock()
+
+    def _set_pair(self, rate_date: date, pair: tuple[str, str], rate: float) -> None:
+        if pair not in (USD_BRL, BRL_USD):
+            return
+        pairs = self._pairs.setdefault(rate_date, {})
+        pairs[pair] = rate
+        value = self._resolve(pairs)
+        idx = bisect_left(self._dates, rate_date)
+        present = idx < len(self._dates) and self._dates[idx] == rate_date
+        if value is None:
+            if present:
+                del self._dates[idx]
+                del self._rates[idx]
+        elif present:
+            self._rates[idx] = value
+        else:
+            self._dates.insert(idx, rate_date)
+            self._rates.insert(idx, value)
+
+    @staticmethod
+    def _resolve(pairs: dict[tuple[str, str], float]) -> float | None:
+        # Mesma preferencia das consultas antigas: USD->BRL direto, senao o inverso de BRL->USD.
+        direct = pairs.get(USD_BRL, 0.0)
+        if direct > 0:
+            return direct
+        inverse = pairs.get(BRL_USD, 0.0)
+        if inverse > 0:
+            return 1.0 / inverse
+        return None
+
+
+_fx_rate_table = FxRateTable()
+
+
+def get_fx_rate_table() -> FxRateTable:
+    return _fx_rate_table
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime
+from typing import Any
 
 from pydantic import BaseModel, Field
 
@@ -197,3 +198,24 @@ class ReingestResult(BaseModel):
 
 class ReingestResponse(BaseModel):
     results: list[ReingestResult]
+
+
+class IngestJobStatus(BaseModel):
+    jobId: str
+    cloud: str
+    tenantKey: str | None = None
+    status: str
+    windowStart: date | None = None
+    windowEnd: date | None = None
+    createdAt: datetime | None = None
+    startedAt: datetime | None = None
+    finishedAt: datetime | None = None
+    rowsWritten: int | None = None
+    error: str | None = None
+    shards: list[dict[str, Any]] = Field(default_factory=list)
+
+
+class IngestStatusResponse(BaseModel):
+    status: str
+    lastSuccessAt: datetime | None = None
+    pendingJobs: list[IngestJobStatus] = Field(default_factory=list)
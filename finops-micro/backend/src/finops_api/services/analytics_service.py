@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from datetime import date, timedelta
+from dataclasses import replace
+from datetime import date
 
 from finops_api.core.config import settings
+from finops_api.core.result_cache import CacheScope, ResultCache, cached_result
 from finops_api.repositories.currency_rate_repo import CurrencyRateRepository
 from finops_api.repositories.fact_cost_repo import FactCostRepository, QueryFilters
 from finops_api.schemas.finops import (
@@ -13,62 +15,43 @@ from finops_api.schemas.finops import (
 from finops_api.services.targets_service import TargetsService
 
 
+def _summary_scope(filters: QueryFilters) -> CacheScope:
+    # usdRate usa a cotacao de hoje: uma nova cotacao invalida o summary mesmo de janelas passadas.
+    scope = filters.cache_scope()
+    return replace(scope, end=max(scope.end, date.today()))
+
+
 class AnalyticsService:
     def __init__(
         self,
         fact_repo: FactCostRepository,
         currency_repo: CurrencyRateRepository | None = None,
         targets: TargetsService | None = None,
+        result_cache: ResultCache | None = None,
     ) -> None:
         self.fact_repo = fact_repo
         self.currency_repo = currency_repo
         self.targets = targets or TargetsService()
+        self.result_cache = result_cache
 
+    @cached_result("summary-v2", scope=_summary_scope)
     def summary_v2(self, filters: QueryFilters) -> SummaryV2Response:
-        week_total = self.fact_repo.total(filters)
+        # Semana, semana anterior, mes/ano acumulados e serie diaria saem de uma unica consulta.
+        windows = self.fact_repo.window_totals(filters)
+        week_total = windows.current
         week_days = max((filters.end - filters.start).days + 1, 1)
         avg_daily = week_total / week_days
 
-        prev_filters = QueryFilters(
-            cloud=filters.cloud,
-            start=filters.start - timedelta(days=week_days),
-            end=filters.start - timedelta(days=1),
-            currency=filters.currency,
-            tenant_id=filters.tenant_id,
-            tenant_key=filters.tenant_key,
-            services=filters.services,
-            accounts=filters.accounts,
-        )
-        prev_total = self.fact_repo.total(prev_filters)
+        prev_total = windows.previous
         delta_pct = ((week_total - prev_total) / prev_total * 100.0) if prev_total > 0 else 0.0
 
-        daily = self.fact_repo.timeseries(filters)
+        daily = windows.daily
         peak = max(daily, key=lambda item: item["total"]) if daily else {"date": filters.start, "total": 0.0}
         peak_day = PeakDay(date=peak["date"], amount=peak["total"])
 
         reference_date = filters.end
         month_start = reference_date.replace(day=1)
-        month_filters = QueryFilters(
-            cloud=filters.cloud,
-            start=month_start,
-            end=reference_date,
-            currency=filters.currency,
-            tenant_id=filters.tenant_id,
-            tenant_key=filters.tenant_key,
-            services=filters.services,
-            accounts=filters.accounts,
-        )
         year_start = reference_date.replace(month=1, day=1)
-        year_filters = QueryFilters(
-            cloud=filters.cloud,
-            start=year_start,
-            end=reference_date,
-            currency=filters.currency,
-            tenant_id=filters.tenant_id,
-            tenant_key=filters.tenant_key,
-            services=filters.services,
-            accounts=filters.accounts,
-        )
 
         budget_month = self.targets.monthly_target(
             cloud=filters.cloud,
@@ -106,68 +89,24 @@ class AnalyticsService:
             deltaWeek=delta_pct,
             avgDaily=avg_daily,
             peakDay=peak_day,
-            monthTotal=self.fact_repo.total(month_filters),
-            yearTotal=self.fact_repo.total(year_filters),
+            monthTotal=windows.month_to_date,
+            yearTotal=windows.year_to_date,
             budgetMonth=budget_month,
             budgetYear=budget_year,
             usdRate=usd_rate,
         )
 
+    @cached_result("daily-v2")
     def daily_v2(self, filters: QueryFilters, top_n: int) -> list[DailyItem]:
         rows = self.fact_repo.daily_with_service_breakdown(filters, top_n=top_n)
         return [DailyItem(**row) for row in rows]
 
+    @cached_result("top-services-v2")
     def top_services_v2(self, filters: QueryFilters, limit: int) -> list[dict]:
-        current_rows = self.fact_repo.daily_with_service_breakdown(filters, top_n=limit)
-        current_totals: dict[str, float] = {}
-        for row in current_rows:
-            for service_name, amount in (row.get("byService") or {}).items():
-                current_totals[service_name] = current_totals.get(service_name, 0.0) + float(amount)
-
-        range_days = max((filters.end - filters.start).days + 1, 1)
-        prev_filters = QueryFilters(
-            cloud=filters.cloud,
-            start=filters.start - timedelta(days=range_days),
-            end=filters.start - timedelta(days=1),
-            currency=filters.currency,
-            tenant_id=filters.tenant_id,
-            tenant_key=filters.tenant_key,
-            services=filters.services,
-            accounts=filters.accounts,
-        )
-        prev_rows = self.fact_repo.daily_with_service_breakdown(prev_filters, top_n=limit)
-        prev_totals: dict[str, float] = {}
-        for row in prev_rows:
-            for service_name, amount in (row.get("byService") or {}).items():
-                prev_totals[service_name] = prev_totals.get(service_name, 0.0) + float(amount)
-
-        period_total = float(sum(current_totals.values()) or 0.0)
-        ordered_services = sorted(
-            [name for name in current_totals.keys() if name != "Others"],
-            key=lambda name: current_totals.get(name, 0.0),
-            reverse=True,
-        )
-        if "Others" in current_totals:
-            ordered_services.append("Others")
-
-        items: list[dict] = []
-        for service_name in ordered_services:
-            total = current_totals.get(service_name, 0.0)
-            previous = prev_totals.get(service_name, 0.0)
-            delta = total - previous
-            delta_pct = (delta / previous * 100.0) if previous > 0 else 0.0
-            share_pct = (total / period_total * 100.0) if period_total > 0 else 0.0
-            items.append(
-                {
-                    "serviceName": service_name,
-                    "total": total,
-                    "sharePct": share_pct,
-                    "delta": delta,
-                    "deltaPct": delta_pct,
-                }
-            )
-        return items[:limit]
+        # Periodo atual, anterior, share e "Others" vem agrupados de uma unica consulta.
+        return self.fact_repo.top_services_ranked(filters, limit)
 
+    @cached_result("top-accounts-v2")
     def top_accounts_v2(self, filters: QueryFilters, limit: int) -> list[dict]:
         return self.fact_repo.top_accounts_with_delta(filters, limit)
 
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import logging
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from finops_api.core.config import settings
-from finops_api.repositories.fact_cost_repo import FactCostRepository
+from finops_api.models.ingest_job import IngestJob
+from finops_api.repositories.coverage_repo import CoverageRepository, DateRange, merge_ranges
 from finops_api.services.currency_rate_sync_service import CurrencyRateSyncService
+from finops_api.services.ingest_queue_service import IngestQueueService
 from finops_api.services.ingest_service import run_ingest_job
 from finops_api.services.tenant_service import TenantService
 
@@ -17,7 +21,6 @@ logger = logging.getLogger(__name__)
 class AutoIngestService:
     def __init__(self, db: Session) -> None:
         self.db = db
-        self.repo = FactCostRepository(db)
 
     def ensure_range(self, cloud: str, start: date, end: date, tenant_key: str | None = None) -> None:
         effective_end = self._effective_end(end)
@@ -36,46 +39,84 @@ class AutoIngestService:
             for resolved_tenant_key in tenant_keys:
                 tenant = tenant_service.resolve_tenant(provider, resolved_tenant_key)
                 tenant_id = tenant.tenant_id if tenant else None
-                if provider == "aws":
-                    has_service_data = self.repo.has_source_data_covering_range(
-                        cloud="aws",
-                        start=start,
-                        end=effective_end,
-                        source_ref="aws_ce_service_cli",
-                        tenant_id=tenant_id,
-                    )
-                    has_account_data = self.repo.has_source_data_covering_range(
-                        cloud="aws",
-                        start=start,
-                        end=effective_end,
-                        source_ref="aws_ce_account_cli",
-                        tenant_id=tenant_id,
-                    )
-                    has_data = has_service_data and has_account_data
-                else:
-                    has_data = self.repo.has_data_covering_range(provider, start, effective_end, tenant_id=tenant_id)
-                if has_data:
-                    continue
-                try:
-                    result = run_ingest_job(
-                        self.db,
-                        provider=provider,
-                        start=start,
-                        end=effective_end,
-                        tenant_key=resolved_tenant_key,
-                    )
-                    logger.info(
-                        "Auto ingest executado para %s/%s: recebido=%s gravado=%s",
-                        provider,
-                        result.get("tenant_key"),
-                        result.get("rows_received"),
-                        result.get("rows_written"),
-                    )
-                except Exception as exc:  # noqa: BLE001
-                    self.db.rollback()
-                    logger.warning("Auto ingest falhou para %s/%s: %s", provider, resolved_tenant_key or "default", exc)
+                # So os sub-intervalos sem cobertura (e a janela de restatement) sao ingeridos,
+                # nao a janela inteira.
+                for missing in self.plan_ranges(provider, start, effective_end, tenant_id=tenant_id):
+                    self._ingest_missing(provider, missing, resolved_tenant_key)
         self._ensure_currency_rate(end)
 
+    def plan_ranges(self, provider: str, start: date, end: date, tenant_id: UUID | None = None) -> list[DateRange]:
+        """Intervalos a buscar no provider: dias sem cobertura + restatement dos ultimos dias."""
+        # Hoje nunca fica coberto (dia em apuracao): com restatement ativo ele entra pela cauda, que respeita
+        # INGEST_RESTATEMENT_REFRESH_MINUTES, em vez de ser reingerido a cada request.
+        restatement_enabled = settings.ingest_restatement_lookback_days > 0 and tenant_id is not None
+        missing_end = min(end, date.today() - timedelta(days=1)) if restatement_enabled else end
+        ranges = self.missing_ranges(provider, start, missing_end, tenant_id=tenant_id) if missing_end >= start else []
+        restatement = self.restatement_range(provider, start, end, tenant_id=tenant_id)
+        if restatement is not None:
+            ranges = merge_ranges([*ranges, restatement])
+        return ranges
+
+    def missing_ranges(self, provider: str, start: date, end: date, tenant_id: UUID | None = None) -> list[DateRange]:
+        """Dias sem cobertura em qualquer source_ref do provider (AWS exige SERVICE e LINKED_ACCOUNT)."""
+        coverage = CoverageRepository(self.db)
+        return merge_ranges(
+            missing
+            for source_ref in coverage.source_refs_for(provider)
+            for missing in coverage.missing_ranges(provider, start, end, tenant_id=tenant_id, source_ref=source_ref)
+        )
+
+    def restatement_range(self, provider: str, start: date, end: date, tenant_id: UUID | None = None) -> DateRange | None:
+        # Providers revisam os custos dos ultimos dias (AWS ate ~72h); esses dias sao reingeridos
+        # mesmo cobertos, salvo se algum job bem-sucedido ja os tocou ha pouco tempo.
+        lookback = settings.ingest_restatement_lookback_days
+        if lookback <= 0 or tenant_id is None:
+            return None
+        tail = DateRange(max(start, date.today() - timedelta(days=lookback)), end)
+        if tail.start > tail.end:
+            return None
+        refreshed_after = datetime.now(timezone.utc) - timedelta(minutes=settings.ingest_restatement_refresh_minutes)
+        recent_job = self.db.execute(
+            select(IngestJob.job_id)
+            .where(IngestJob.tenant_id == tenant_id)
+            .where(IngestJob.cloud == provider)
+            .where(IngestJob.status == "success")
+            .where(IngestJob.source_window_end >= tail.start)
+            .where(IngestJob.finished_at >= refreshed_after)
+            .limit(1)
+        ).scalar_one_or_none()
+        return None if recent_job is not None else tail
+
+    def _ingest_missing(self, provider: str, missing: DateRange, tenant_key: str | None) -> None:
+        if settings.ingest_queue_enabled:
+            # Fora do caminho do request: o worker da fila executa a ingestao.
+            try:
+                IngestQueueService(self.db).enqueue(provider, missing.start, missing.end, tenant_key=tenant_key)
+            except Exception as exc:  # noqa: BLE001
+                self.db.rollback()
+                logger.warning("Falha ao enfileirar ingest para %s/%s: %s", provider, tenant_key or "default", exc)
+            return
+        try:
+            result = run_ingest_job(
+                self.db,
+                provider=provider,
+                start=missing.start,
+                end=missing.end,
+                tenant_key=tenant_key,
+            )
+            logger.info(
+                "Auto ingest executado para %s/%s (%s..%s): recebido=%s gravado=%s",
+                provider,
+                result.get("tenant_key"),
+                missing.start,
+                missing.end,
+                result.get("rows_received"),
+                result.get("rows_written"),
+            )
+        except Exception as exc:  # noqa: BLE001
+            self.db.rollback()
+            logger.warning("Auto ingest falhou para %s/%s: %s", provider, tenant_key or "default", exc)
+
     def _ensure_currency_rate(self, as_of: date) -> None:
         try:
             CurrencyRateSyncService(self.db).ensure_brl_usd_rate(as_of)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import io
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from finops_api.db.session import SessionLocal
+from finops_api.repositories.cost_rollup_repo import month_ceil, month_floor
+from finops_api.repositories.fact_cost_export_repo import EXPORT_FIELDS, ExportCursor, FactCostExportRepository
+from finops_api.repositories.fact_cost_repo import QueryFilters
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover
+    pa = None  # type: ignore[assignment]
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Linhas por row group nos arquivos Parquet: o writer junta os lotes do cursor de cada particao ate esse tamanho.
+PARQUET_ROW_GROUP_ROWS = 128_000
+# Chaves das particoes Parquet (hive): cada reexportacao substitui por inteiro as particoes que toca.
+PARQUET_PARTITION_KEYS = ("tenant_id", "cloud", "month")
+# Mesma precisao/escala das colunas Numeric da fact_cost_daily.
+_DECIMAL_FIELDS = {"amount": (18, 6), "amount_brl": (18, 6), "fx_rate_used": (18, 8)}
+
+
+@dataclass
+class ParquetExportReport:
+    rows: int = 0
+    bytes_written: int = 0
+    files: list[str] = field(default_factory=list)
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pacote pyarrow nao instalado (necessario para exportar em Arrow/Parquet)")
+
+
+def export_schema() -> pa.Schema:
+    """Schema das exportacoes colunares: colunas de EXPORT_FIELDS; tags e metadata como texto JSON."""
+    _require_pyarrow()
+    fields = []
+    for name in EXPORT_FIELDS:
+        if name == "cost_date":
+            fields.append(pa.field(name, pa.date32(), nullable=False))
+        elif name in _DECIMAL_FIELDS:
+            fields.append(pa.field(name, pa.decimal128(*_DECIMAL_FIELDS[name])))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def record_batch(rows: Sequence[Sequence[Any]], schema: pa.Schema) -> pa.RecordBatch:
+    """Transpoe as tuplas de um fetch do cursor em colunas e monta o RecordBatch, sem dict por linha.
+
+    As linhas vem do FactCostExportRepository com `as_text`: UUIDs e JSONB ja sao texto e os numerics
+    chegam como texto e viram decimal128 num cast vetorizado.
+    """
+    columns = list(zip(*rows)) if rows else [() for _ in schema]
+    arrays = []
+    for values, column in zip(columns, schema):
+        if pa.types.is_decimal(column.type):
+            arrays.append(pa.array(values, type=pa.string()).cast(column.type))
+        else:
+            arrays.append(pa.array(values, type=column.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_record_batches(
+    db: Session,
+    filters: QueryFilters,
+    after: ExportCursor | None = None,
+) -> Iterator[pa.RecordBatch]:
+    schema = export_schema()
+    for rows in FactCostExportRepository(db).iter_batches(filters, after=after, as_text=True):
+        yield record_batch(rows, schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino do writer IPC que acumula os bytes ate o stream HTTP/CLI drenar."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        # O writer IPC alinha as mensagens pela posicao: conta o total escrito, nao o buffer atual.
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_arrow(
+    filters: QueryFilters,
+    after: ExportCursor | None = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Iterator[bytes]:
+    """Arrow IPC stream (um RecordBatch por fetch do cursor) com sessao propria, como o stream_export."""
+    _require_pyarrow()
+    schema = export_schema()
+
+    def generate() -> Iterator[bytes]:
+        sink = _ChunkSink()
+        with session_factory() as db, pa.ipc.new_stream(sink, schema) as writer:
+            for batch in iter_record_batches(db, filters, after=after):
+                writer.write_batch(batch)
+                yield sink.drain()
+        yield sink.drain()
+
+    return generate()
+
+
+def _check_parquet_filters(filters: QueryFilters) -> None:
+    if filters.start != month_floor(filters.start) or filters.end != month_ceil(filters.end):
+        raise ValueError("parquet substitui meses inteiros: start deve ser dia 1 e end o ultimo dia do mes")
+    if filters.scope_key or filters.service_key or filters.services or filters.accounts:
+        raise ValueError("parquet substitui particoes por tenant/cloud/mes: filtros de servico/conta nao sao aceitos")
+
+
+def write_parquet_dataset(
+    filters: QueryFilters,
+    base_dir: str | Path,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> ParquetExportReport:
+    """Grava Parquet particionado no estilo hive: base_dir/tenant_id=<id>/cloud=<cloud>/month=<YYYY-MM>/part-N.parquet.
+
+    As particoes (tenant, cloud, mes) tocadas sao substituidas por inteiro e as demais ficam, entao reexportar
+    um periodo e idempotente; por isso nao ha retomada por `after` aqui. Pelo mesmo motivo so sao aceitos
+    meses inteiros sem filtro de servico/conta: uma exportacao parcial apagaria o resto da particao.
+    """
+    _require_pyarrow()
+    _check_parquet_filters(filters)
+    schema = export_schema()
+    dataset_schema = schema.append(pa.field("month", pa.string(), nullable=False))
+    report = ParquetExportReport()
+
+    def with_month(batch: pa.RecordBatch) -> pa.RecordBatch:
+        month = pc.strftime(batch.column("cost_date"), format="%Y-%m")
+        return pa.RecordBatch.from_arrays([*batch.columns, month], schema=dataset_schema)
+
+    def visit(written) -> None:
+        report.files.append(written.path)
+        report.rows += written.metadata.num_rows
+        report.bytes_written += written.size
+
+    with session_factory() as db:
+        ds.write_dataset(
+            (with_month(batch) for batch in iter_record_batches(db, filters)),
+            str(base_dir),
+            schema=dataset_schema,
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([(name, pa.string()) for name in PARQUET_PARTITION_KEYS]), flavor="hive"
+            ),
+            basename_template="part-{i}.parquet",
+            existing_data_behavior="delete_matching",
+            preserve_order=True,
+            min_rows_per_group=PARQUET_ROW_GROUP_ROWS,
+            max_rows_per_group=PARQUET_ROW_GROUP_ROWS,
+            file_visitor=visit,
+        )
+    return report
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from finops_api.core.result_cache import cached_result
 from finops_api.repositories.fact_cost_repo import QueryFilters
 from finops_api.schemas.finops import (
     CostExplorerBreakdownItem,
@@ -14,7 +15,9 @@ class CostExplorerService:
     def __init__(self, analytics: AnalyticsService) -> None:
         self.analytics = analytics
         self.fact_repo = analytics.fact_repo
+        self.result_cache = analytics.result_cache
 
+    @cached_result("cost-explorer-snapshot")
     def snapshot(self, filters: QueryFilters, top_n: int) -> CostExplorerSnapshotResponse:
         summary = self.analytics.summary_v2(filters)
         top_services = self.analytics.top_services_v2(filters, limit=top_n)
@@ -35,12 +38,14 @@ class CostExplorerService:
             largestAccount=self._to_snapshot_kpi(largest_account, "linkedAccount"),
         )
 
+    @cached_result("cost-explorer-breakdown")
     def breakdown(self, filters: QueryFilters, top_n: int, group_by: str) -> list[CostExplorerBreakdownItem]:
         return [
             CostExplorerBreakdownItem(**item)
             for item in self.fact_repo.cost_explorer_breakdown(filters, limit=top_n, group_by=group_by)
         ]
 
+    @cached_result("cost-explorer-trend")
     def trend(
         self,
         filters: QueryFilters,
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from finops_api.db.session import SessionLocal
+from finops_api.repositories.fact_cost_export_repo import EXPORT_FIELDS, ExportCursor, FactCostExportRepository
+from finops_api.repositories.fact_cost_repo import QueryFilters
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Linhas serializadas por pedaco entregue ao stream (uma escrita/um next() a cada pedaco).
+CHUNK_ROWS = 500
+
+
+def _json_default(value: Any) -> Any:
+    # Decimal vira string para nao perder precisao na conciliacao.
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"tipo nao serializavel: {type(value).__name__}")
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=_json_default, sort_keys=True)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def iter_ndjson(rows: Iterable[dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    chunk: list[str] = []
+    for row in rows:
+        chunk.append(json.dumps(row, ensure_ascii=False, default=_json_default))
+        if len(chunk) >= chunk_rows:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def iter_csv(rows: Iterable[dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    pending = 1
+    for row in rows:
+        writer.writerow([_csv_value(row.get(field)) for field in EXPORT_FIELDS])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def iter_export(rows: Iterable[dict[str, Any]], export_format: str) -> Iterator[str]:
+    if export_format == "csv":
+        return iter_csv(rows)
+    if export_format == "ndjson":
+        return iter_ndjson(rows)
+    raise ValueError(f"formato de exportacao invalido: {export_format}")
+
+
+def stream_export(
+    filters: QueryFilters,
+    export_format: str,
+    after: ExportCursor | None = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Iterator[str]:
+    """Gera o arquivo em pedacos com sessao propria (a da requisicao fecha antes do fim do stream)."""
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"formato de exportacao invalido: {export_format}")
+
+    def generate() -> Iterator[str]:
+        with session_factory() as db:
+            yield from iter_export(FactCostExportRepository(db).iter_rows(filters, after=after), export_format)
+
+    return generate()
+
+
+def export_filename(filters: QueryFilters, export_format: str) -> str:
+    return f"fact_cost_daily_{filters.cloud}_{filters.start.isoformat()}_{filters.end.isoformat()}.{export_format}"
@@ -11,6 +11,7 @@ import httpx
 from sqlalchemy.orm import Session
 
 from finops_api.core.config import settings
+from finops_api.core.result_cache import invalidate_cached_results
 from finops_api.repositories.currency_rate_repo import CurrencyRateRepository
 
 try:
@@ -92,6 +93,8 @@ class CurrencyRateSyncService:
             self.repo.upsert_rate(quote.rate_date, "USD", "BRL", quote.brl_per_usd)
             self.repo.upsert_rate(quote.rate_date, "BRL", "USD", 1.0 / quote.brl_per_usd)
             self.db.commit()
+            # A cotacao vale para qualquer as_of >= rate_date: invalida resultados de todos os tenants/clouds ate hoje.
+            invalidate_cached_results(start=quote.rate_date)
             self._request_cache[as_of] = quote.brl_per_usd
             self._request_cache[quote.rate_date] = quote.brl_per_usd
             logger.info(
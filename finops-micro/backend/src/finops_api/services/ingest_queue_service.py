@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from finops_api.core.config import settings
+from finops_api.models.ingest_job import IngestJob
+from finops_api.services.ingest_service import acquire_ingest_lock, build_ingest_job, execute_ingest_job, job_heartbeat
+from finops_api.services.tenant_service import TenantService
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+FAILED = "failed"
+QUEUE_SOURCE = "queue"
+
+
+def _stale_before() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(minutes=settings.ingest_running_stale_minutes)
+
+
+def _pending_clause():
+    # Job running sem heartbeat ha mais de INGEST_RUNNING_STALE_MINUTES (mesmo corte do find_running_job)
+    # e de um worker que morreu.
+    return or_(
+        IngestJob.status == QUEUED,
+        and_(IngestJob.status == RUNNING, job_heartbeat() >= _stale_before()),
+    )
+
+
+@dataclass
+class IngestFreshness:
+    status: str
+    last_success_at: datetime | None
+    pending_jobs: int
+
+
+class IngestQueueService:
+    """Fila de ingestao sobre a tabela ingest_job (status queued -> running -> success/failed)."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def enqueue(self, provider: str, start: date, end: date, tenant_key: str | None = None) -> IngestJob:
+        provider_name = provider.lower().strip()
+        tenant = TenantService(self.db).resolve_tenant(provider_name, tenant_key)
+        if tenant is None:
+            raise ValueError(f"tenant não resolvido para {provider_name}")
+
+        # Dedup: um job ainda pendente cuja janela cobre a pedida ja atende a requisicao.
+        # O advisory lock evita que dois requests simultaneos enfileirem o mesmo job.
+        acquire_ingest_lock(self.db, provider_name, tenant.tenant_id)
+        existing = self.db.execute(
+            select(IngestJob)
+            .where(IngestJob.tenant_id == tenant.tenant_id)
+            .where(IngestJob.cloud == provider_name)
+            .where(_pending_clause())
+            .where(IngestJob.source_window_start <= start)
+            .where(IngestJob.source_window_end >= end)
+            .order_by(IngestJob.created_at.asc())
+            .limit(1)
+        ).scalar_one_or_none()
+        if existing is not None:
+            self.db.commit()
+            return existing
+
+        ingest_job = build_ingest_job(tenant, provider_name, start, end, status=QUEUED, source=QUEUE_SOURCE)
+        self.db.add(ingest_job)
+        self.db.commit()
+        logger.info("Ingest enfileirado para %s/%s: %s..%s", provider_name, tenant.tenant_key, start, end)
+        return ingest_job
+
+    def enqueue_range(self, cloud: str, start: date, end: date, tenant_key: str | None = None) -> list[IngestJob]:
+        providers = ["aws", "azure", "oci"] if cloud == "all" else [cloud]
+        tenant_service = TenantService(self.db)
+        jobs: list[IngestJob] = []
+        for provider in providers:
+            requested_tenant_key = tenant_key if provider == cloud else None
+            if requested_tenant_key:
+                tenant_keys: list[str | None] = [requested_tenant_key]
+            else:
+                tenant_keys = [config.tenant_key for config in tenant_service.get_runtime_configs(provider)] or [None]
+            for current_tenant_key in tenant_keys:
+                jobs.append(self.enqueue(provider, start, end, tenant_key=current_tenant_key))
+        return jobs
+
+    def fail_stale_running(self) -> int:
+        """Marca como failed os jobs running alem do corte (worker morto no meio): saem do dedup e da contagem."""
+        now = datetime.now(timezone.utc)
+        result = self.db.execute(
+            update(IngestJob)
+            .where(IngestJob.status == RUNNING)
+            .where(job_heartbeat() < _stale_before())
+            .values(
+                {
+                    IngestJob.status: FAILED,
+                    IngestJob.finished_at: now,
+                    IngestJob.error_message: "job running sem conclusao alem do limite (worker interrompido)",
+                }
+            )
+        )
+        if result.rowcount:
+            logger.warning("Ingest jobs running abandonados marcados como failed: %s", result.rowcount)
+        return int(result.rowcount or 0)
+
+    def claim_next(self) -> IngestJob | None:
+        self.fail_stale_running()
+        # SKIP LOCKED permite varios workers consumindo a fila sem pegar o mesmo job.
+        ingest_job = self.db.execute(
+            select(IngestJob)
+            .where(IngestJob.status == QUEUED)
+            .order_by(IngestJob.created_at.asc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        if ingest_job is None:
+            self.db.commit()
+            return None
+        ingest_job.status = RUNNING
+        ingest_job.started_at = datetime.now(timezone.utc)
+        ingest_job.heartbeat_at = ingest_job.started_at
+        self.db.commit()
+        return ingest_job
+
+    def run_next(self, session_factory: Callable[[], Session] | None = None) -> IngestJob | None:
+        ingest_job = self.claim_next()
+        if ingest_job is None:
+            return None
+        try:
+            execute_ingest_job(self.db, ingest_job, session_factory=session_factory)
+        except Exception as exc:  # noqa: BLE001
+            # O status failed ja foi gravado pelo execute_ingest_job; o worker segue para o proximo.
+            logger.warning("Ingest job %s falhou: %s", ingest_job.job_id, exc)
+        return ingest_job
+
+    def get_job(self, job_id: UUID) -> IngestJob | None:
+        return self.db.get(IngestJob, job_id)
+
+    def pending_jobs(self, cloud: str, tenant_id: UUID | None = None) -> list[IngestJob]:
+        stmt = (
+            select(IngestJob)
+            .where(IngestJob.cloud.in_(self._providers(cloud)))
+            .where(_pending_clause())
+            .order_by(IngestJob.created_at.asc())
+        )
+        if tenant_id is not None:
+            stmt = stmt.where(IngestJob.tenant_id == tenant_id)
+        return list(self.db.execute(stmt).scalars().all())
+
+    def freshness(self, cloud: str, tenant_id: UUID | None = None) -> IngestFreshness:
+        stmt = select(
+            func.max(IngestJob.finished_at).filter(IngestJob.status == "success").label("last_success_at"),
+            func.count().filter(_pending_clause()).label("pending_jobs"),
+        ).where(IngestJob.cloud.in_(self._providers(cloud)))
+        if tenant_id is not None:
+            stmt = stmt.where(IngestJob.tenant_id == tenant_id)
+        row = self.db.execute(stmt).one()
+        pending = int(row.pending_jobs or 0)
+        return IngestFreshness(
+            status="refreshing" if pending else "fresh",
+            last_success_at=row.last_success_at,
+            pending_jobs=pending,
+        )
+
+    @staticmethod
+    def _providers(cloud: str) -> list[str]:
+        return ["aws", "azure", "oci"] if cloud == "all" else [cloud]
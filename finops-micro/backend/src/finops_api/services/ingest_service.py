@@ -1,28 +1,34 @@
 from __future__ import annotations
 
 import logging
-from collections.abc import Iterable
-from dataclasses import asdict, dataclass
-from datetime import date, datetime, timezone
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any
+from uuid import UUID, uuid4
 
-from sqlalchemy import delete, func, select, update
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from finops_api.core.config import settings
+from finops_api.core.result_cache import invalidate_cached_results
+from finops_api.core.single_flight import SingleFlight
+from finops_api.db.session import SessionLocal
 from finops_api.models.dim_tenant import DimTenant
-from finops_api.models.dim_region import DimRegion
-from finops_api.models.dim_scope import DimScope
-from finops_api.models.dim_service import DimService
-from finops_api.models.fact_cost_daily import FactCostDaily
 from finops_api.models.fact_ingest_audit import FactIngestAudit
 from finops_api.models.ingest_job import IngestJob
 from finops_api.providers.aws.cli_client import AwsCliClient, AwsCliSettings
 from finops_api.providers.azure.cli_client import AzureCliClient, AzureCliSettings
 from finops_api.providers.common.types import CanonicalCostRow
 from finops_api.providers.oci.cli_client import OciCliClient, OciCliSettings
+from finops_api.repositories.cost_rollup_repo import CostRollupRepository
+from finops_api.repositories.coverage_repo import CoverageRepository
+from finops_api.repositories.dimension_repo import DimensionRepository
+from finops_api.repositories.fact_cost_bulk_repo import FactCostBulkRepository
 from finops_api.services.tenant_service import TenantRuntimeConfig, TenantService
 
 logger = logging.getLogger(__name__)
@@ -36,6 +42,32 @@ class IngestResult:
     rows_written: int
     rows_inserted: int = 0
     rows_updated: int = 0
+    rows_deleted: int = 0
+    legacy_currency_clean: bool | None = None
+    # Dias (ISO) que a limpeza de moeda legada confirmou; a janela do job pode ser maior.
+    legacy_currency_clean_start: str | None = None
+    legacy_currency_clean_end: str | None = None
+
+
+@dataclass
+class PersistStats:
+    rows_received: int = 0
+    rows_written: int = 0
+    rows_inserted: int = 0
+    rows_updated: int = 0
+    rows_deleted: int = 0
+    # Ultimo dia recebido por source_ref: limita a cobertura ao que o provider realmente entregou.
+    last_day_by_source: dict[str, date] = field(default_factory=dict)
+    # Fatias (cloud -> [primeiro dia, ultimo dia]) recebidas, reagregadas na rollup.
+    touched: dict[str, list[date]] = field(default_factory=dict)
+
+
+LEGACY_CURRENCY_CLOUDS = {"azure", "oci"}
+# Providers que entregam linhas em ordem crescente de dia por source_ref (ResultsByTime da AWS,
+# itens ordenados no parser da OCI, janelas de AZURE_QUERY_WINDOW_DAYS ordenadas no cliente Azure).
+DATE_ORDERED_PROVIDERS = {"aws", "azure", "oci"}
+
+CoalesceKey = tuple[str, date, str, str, str, str, str]
 
 
 class IngestService:
@@ -47,45 +79,115 @@ class IngestService:
         tenant_service = TenantService(self.db)
         tenant = tenant_service.resolve_tenant(provider, tenant_key)
         runtime_config = tenant_service.runtime_config_for(provider, tenant.tenant_key if tenant else tenant_key)
+        if provider not in {"aws", "azure", "oci"}:
+            raise ValueError(f"provider inválido: {provider}")
+        if tenant is None:
+            raise ValueError(f"tenant não resolvido para {provider}")
+
+        # Os fetchers devolvem iteradores: as linhas sao consumidas pagina a pagina pelo _persist.
         if provider == "aws":
             rows = self._fetch_aws(start, end, runtime_config)
         elif provider == "azure":
             rows = self._fetch_azure(start, end, runtime_config)
-        elif provider == "oci":
-            rows = self._fetch_oci(start, end, runtime_config)
         else:
-            raise ValueError(f"provider inválido: {provider}")
-
-        if tenant is None:
-            raise ValueError(f"tenant não resolvido para {provider}")
+            rows = self._fetch_oci(start, end, runtime_config)
 
-        written, rows_inserted, rows_updated = self._persist(rows, tenant)
+        legacy_currency_clean: bool | None = None
+        clean_window: tuple[date, date] | None = None
+        cleanup_legacy_currency = False
+        if provider in LEGACY_CURRENCY_CLOUDS:
+            # Linha legada e historica: hoje nunca tem o que limpar e nao entra na verificacao.
+            checked_end = min(end, date.today() - timedelta(days=1))
+            if checked_end >= start and self._legacy_currency_window_clean(tenant, provider, start, checked_end):
+                legacy_currency_clean = True
+                clean_window = (start, checked_end)
+            cleanup_legacy_currency = not legacy_currency_clean
+
+        stats = self._persist(
+            rows,
+            tenant,
+            cleanup_legacy_currency=cleanup_legacy_currency,
+            date_ordered=provider in DATE_ORDERED_PROVIDERS,
+        )
+        self._mark_coverage(tenant, provider, start, end, stats.last_day_by_source)
+        if cleanup_legacy_currency:
+            # O DELETE compara cada dia recebido com o staging: a passada limpa exatamente
+            # [primeiro, ultimo] dia recebido, tenha removido linhas ou nao. Os dias vao para
+            # ingest_job.details_json e as proximas execucoes dentro deles pulam o DELETE.
+            received = stats.touched.get(provider)
+            legacy_currency_clean = received is not None
+            clean_window = (received[0], received[1]) if received is not None else None
         return IngestResult(
             provider=provider,
             tenant_key=tenant.tenant_key,
-            rows_received=len(rows),
-            rows_written=written,
-            rows_inserted=rows_inserted,
-            rows_updated=rows_updated,
+            rows_received=stats.rows_received,
+            rows_written=stats.rows_written,
+            rows_inserted=stats.rows_inserted,
+            rows_updated=stats.rows_updated,
+            rows_deleted=stats.rows_deleted,
+            legacy_currency_clean=legacy_currency_clean,
+            legacy_currency_clean_start=clean_window[0].isoformat() if clean_window else None,
+            legacy_currency_clean_end=clean_window[1].isoformat() if clean_window else None,
         )
 
-    def _fetch_aws(self, start: date, end: date, runtime_config: TenantRuntimeConfig | None) -> list[CanonicalCostRow]:
+    def _mark_coverage(
+        self,
+        tenant: DimTenant,
+        provider: str,
+        start: date,
+        end: date,
+        last_day_by_source: dict[str, date],
+    ) -> None:
+        # Roda apos o commit da fact: se o processo cair aqui, a janela so volta a ser ingerida.
+        # Cada source_ref fica coberto ate o ultimo dia que chegou (resposta vazia ou cortada nao vira
+        # cobertura) e nunca inclui hoje, ainda em apuracao no provider.
+        final_end = min(end, date.today() - timedelta(days=1))
+        coverage = CoverageRepository(self.db)
+        marked = False
+        for source_ref in coverage.source_refs_for(provider):
+            last_day = last_day_by_source.get(source_ref)
+            if last_day is None or min(final_end, last_day) < start:
+                continue
+            coverage.add(tenant.tenant_id, provider, start, min(final_end, last_day), source_refs=[source_ref])
+            marked = True
+        if marked:
+            self.db.commit()
+
+    def _legacy_currency_window_clean(self, tenant: DimTenant, cloud: str, start: date, end: date) -> bool:
+        # Vale a faixa de dias que a limpeza confirmou, nao a janela pedida ao provider.
+        # Datas ISO comparam em ordem cronologica como texto.
+        details = IngestJob.details_json
+        stmt = (
+            select(IngestJob.job_id)
+            .where(IngestJob.tenant_id == tenant.tenant_id)
+            .where(IngestJob.cloud == cloud)
+            .where(IngestJob.status == "success")
+            .where(details["legacy_currency_clean"].as_boolean().is_(True))
+            .where(details["legacy_currency_clean_start"].as_string() <= start.isoformat())
+            .where(details["legacy_currency_clean_end"].as_string() >= end.isoformat())
+            .limit(1)
+        )
+        return self.db.execute(stmt).scalar_one_or_none() is not None
+
+    def _fetch_aws(self, start: date, end: date, runtime_config: TenantRuntimeConfig | None) -> Iterator[CanonicalCostRow]:
         provider_settings = AwsCliSettings(
             cli_path=settings.aws_cli_path,
             profile=(runtime_config.profile if runtime_config else settings.aws_profile) or None,
+            max_workers=settings.aws_cli_max_workers,
         )
-        return AwsCliClient(provider_settings).fetch_daily_costs(start, end)
+        return AwsCliClient(provider_settings).iter_daily_costs(start, end)
 
-    def _fetch_azure(self, start: date, end: date, runtime_config: TenantRuntimeConfig | None) -> list[CanonicalCostRow]:
+    def _fetch_azure(self, start: date, end: date, runtime_config: TenantRuntimeConfig | None) -> Iterator[CanonicalCostRow]:
         azure_mg = str((runtime_config.metadata.get("management_group_id") if runtime_config else None) or settings.azure_management_group_id or "")
         provider_settings = AzureCliSettings(
             management_group_id=azure_mg,
             api_version=settings.azure_api_version,
             cli_path=settings.azure_cli_path,
+            window_days=settings.azure_query_window_days,
         )
-        return AzureCliClient(provider_settings).fetch_daily_costs(start, end)
+        return AzureCliClient(provider_settings).iter_daily_costs(start, end)
 
-    def _fetch_oci(self, start: date, end: date, runtime_config: TenantRuntimeConfig | None) -> list[CanonicalCostRow]:
+    def _fetch_oci(self, start: date, end: date, runtime_config: TenantRuntimeConfig | None) -> Iterator[CanonicalCostRow]:
         oci_tenant = str((runtime_config.metadata.get("tenant_id") if runtime_config else None) or settings.oci_tenant_id or "")
         provider_settings = OciCliSettings(
             tenant_id=oci_tenant,
@@ -94,242 +196,193 @@ class IngestService:
             region=settings.oci_region,
             compartment_depth=settings.oci_compartment_depth,
         )
-        return OciCliClient(provider_settings).fetch_daily_costs(start, end)
-
-    def _persist(self, rows: Iterable[CanonicalCostRow], tenant: DimTenant) -> tuple[int, int, int]:
-        written = 0
-        rows_inserted = 0
-        rows_updated = 0
-        scope_cache: dict[tuple[str, str, str], str] = {}
-        service_cache: dict[tuple[str, str], str] = {}
-        region_cache: dict[tuple[str, str], str] = {}
-
-        normalized_rows = self._coalesce_rows(rows)
-        for row in normalized_rows:
-            self._cleanup_legacy_currency_mismatch(row, tenant)
-            scope_id = self._get_or_create_scope(row, tenant, scope_cache)
-            service_id = self._get_or_create_service(row, service_cache)
-            region_id = self._get_or_create_region(row, region_cache)
-
-            values = dict(
-                usage_date=row.usage_date,
-                cloud=row.cloud,
-                tenant_id=tenant.tenant_id,
-                scope_id=scope_id,
-                service_id=service_id,
-                region_id=region_id,
-                scope_key=row.scope_key,
-                service_key=row.service_key,
-                region_key=row.region_key,
-                currency_code=row.currency_code.upper(),
-                amount=self._to_decimal(row.amount),
-                amount_brl=self._to_decimal(row.amount_brl) if row.amount_brl is not None else None,
-                source_ref=row.source_ref,
-                source_record_id=None,
-                tags={},
-                metadata_json=row.metadata_json,
-            )
-
-            # O schema alvo usa índice único com expressões (COALESCE), não constraint nomeada.
-            # Então usamos insert DO NOTHING e, em caso de conflito, fazemos UPDATE manual pela chave natural.
-            insert_stmt = insert(FactCostDaily).values(**values).on_conflict_do_nothing()
-            result = self.db.execute(insert_stmt)
-            if int(result.rowcount or 0) == 0:
-                update_stmt = (
-                    update(FactCostDaily)
-                    .where(FactCostDaily.usage_date == row.usage_date)
-                    .where(FactCostDaily.cloud == row.cloud)
-                    .where(FactCostDaily.tenant_id == tenant.tenant_id)
-                    .where(FactCostDaily.scope_key == row.scope_key)
-                    .where(FactCostDaily.service_key == row.service_key)
-                    .where(func.coalesce(FactCostDaily.region_key, "") == (row.region_key or ""))
-                    .where(func.coalesce(FactCostDaily.resource_id, "") == "")
-                    .where(FactCostDaily.currency_code == row.currency_code.upper())
-                    .where(func.coalesce(FactCostDaily.charge_type, "") == "")
-                    .where(func.coalesce(FactCostDaily.pricing_model, "") == "")
-                    .values(
-                        tenant_id=tenant.tenant_id,
-                        scope_id=scope_id,
-                        service_id=service_id,
-                        region_id=region_id,
-                        amount=self._to_decimal(row.amount),
-                        amount_brl=self._to_decimal(row.amount_brl) if row.amount_brl is not None else None,
-                        metadata_json=row.metadata_json,
-                        updated_at=datetime.now(timezone.utc),
+        return OciCliClient(provider_settings).iter_daily_costs(start, end)
+
+    def _persist(
+        self,
+        rows: Iterable[CanonicalCostRow],
+        tenant: DimTenant,
+        cleanup_legacy_currency: bool = False,
+        date_ordered: bool = True,
+    ) -> PersistStats:
+        stats = PersistStats()
+        # Dimensoes em sessao propria, commitada a cada chunk: os locks de dim_scope/dim_service/dim_region
+        # duram so o INSERT, nao a ingestao inteira, e shards paralelos do tenant nao se bloqueiam nelas.
+        dimension_db = Session(bind=self.db.get_bind())
+        dimensions = DimensionRepository(dimension_db)
+        bulk = FactCostBulkRepository(self.db)
+        batch_size = settings.ingest_bulk_batch_size
+        # Sem garantia de ordem por dia nao ha como fechar chunks antes do fim: coalesce tudo em um so.
+        chunk_size = batch_size if date_ordered else None
+        touched = stats.touched
+
+        def counted(source: Iterable[CanonicalCostRow]) -> Iterator[CanonicalCostRow]:
+            for row in source:
+                stats.rows_received += 1
+                if row.usage_date > stats.last_day_by_source.get(row.source_ref, date.min):
+                    stats.last_day_by_source[row.source_ref] = row.usage_date
+                bounds = touched.setdefault(row.cloud, [row.usage_date, row.usage_date])
+                if row.usage_date < bounds[0]:
+                    bounds[0] = row.usage_date
+                elif row.usage_date > bounds[1]:
+                    bounds[1] = row.usage_date
+                yield row
+
+        # Memoria limitada a ~chunk_size linhas coalescidas: cada chunk resolve dimensoes e
+        # faz o upsert set-based; o commit da fact continua unico no final da ingestao.
+        with dimension_db:
+            for chunk in self._iter_coalesced_chunks(counted(rows), chunk_size):
+                dimension_ids = dimensions.resolve(chunk, tenant.tenant_id, tenant.cloud)
+                dimension_db.commit()
+                staged = [
+                    self._fact_values(
+                        row,
+                        tenant,
+                        scope_id=dimension_ids.scopes[row.scope_key],
+                        service_id=dimension_ids.services[(row.cloud, row.service_key)],
+                        region_id=dimension_ids.regions[(row.cloud, row.region_key)],
                     )
+                    for row in chunk
+                ]
+                result = bulk.upsert(
+                    staged,
+                    batch_size=batch_size,
+                    cleanup_legacy_currency=cleanup_legacy_currency,
                 )
-                self.db.execute(update_stmt)
-                rows_updated += 1
-            else:
-                rows_inserted += 1
-            written += 1
-
+                stats.rows_written += len(chunk)
+                stats.rows_inserted += result.rows_inserted
+                stats.rows_updated += result.rows_updated
+                stats.rows_deleted += result.rows_deleted
+
+        # Mesma transacao da fact: quem le a rollup nunca ve uma fatia diferente da fact commitada.
+        # A manutencao independe de COST_ROLLUP_ENABLED para a rollup estar pronta quando religada.
+        rollup = CostRollupRepository(self.db)
+        for cloud, (first_day, last_day) in touched.items():
+            rollup.refresh(tenant.tenant_id, cloud, first_day, last_day)
         self.db.commit()
-        return written, rows_inserted, rows_updated
+        # Apos o commit: resultados cacheados que leram essas fatias deixam de valer. Scope renomeado
+        # muda o nome em todos os dias ja agregados, entao invalida o tenant/cloud inteiro.
+        for cloud, (first_day, last_day) in touched.items():
+            if dimensions.scopes_renamed:
+                invalidate_cached_results(tenant.tenant_id, cloud)
+            else:
+                invalidate_cached_results(tenant.tenant_id, cloud, first_day, last_day)
+        return stats
+
+    def _fact_values(
+        self,
+        row: CanonicalCostRow,
+        tenant: DimTenant,
+        scope_id: UUID,
+        service_id: UUID,
+        region_id: UUID,
+    ) -> dict[str, Any]:
+        # Chaves com o nome fisico das colunas (cost_date/currency/source/raw) da tabela de staging.
+        return {
+            "fact_id": uuid4(),
+            "cost_date": row.usage_date,
+            "cloud": row.cloud,
+            "tenant_id": tenant.tenant_id,
+            "scope_id": scope_id,
+            "service_id": service_id,
+            "region_id": region_id,
+            "scope_key": row.scope_key,
+            "service_key": row.service_key,
+            "region_key": row.region_key,
+            "currency": row.currency_code.upper(),
+            "amount": self._to_decimal(row.amount),
+            "amount_brl": self._to_decimal(row.amount_brl) if row.amount_brl is not None else None,
+            "source": row.source_ref,
+            "source_record_id": None,
+            "tags": {},
+            "raw": row.metadata_json,
+        }
 
     def _coalesce_rows(self, rows: Iterable[CanonicalCostRow]) -> list[CanonicalCostRow]:
-        aggregated: dict[tuple[str, date, str, str, str, str, str], CanonicalCostRow] = {}
-
+        aggregated: dict[CoalesceKey, CanonicalCostRow] = {}
         for row in rows:
-            key = (
-                row.cloud,
-                row.usage_date,
-                row.scope_key,
-                row.service_key,
-                row.region_key,
-                row.currency_code.upper(),
-                row.source_ref,
-            )
-            existing = aggregated.get(key)
-            if existing is None:
-                aggregated[key] = row
-                continue
-
-            aggregated[key] = CanonicalCostRow(
-                cloud=row.cloud,
-                usage_date=row.usage_date,
-                scope_key=row.scope_key,
-                scope_name=row.scope_name,
-                service_key=row.service_key,
-                service_name=row.service_name,
-                region_key=row.region_key,
-                region_name=row.region_name,
-                currency_code=row.currency_code.upper(),
-                amount=self._to_decimal(existing.amount) + self._to_decimal(row.amount),
-                amount_brl=self._sum_nullable_decimals(existing.amount_brl, row.amount_brl),
-                source_ref=row.source_ref,
-                metadata_json=self._merge_metadata(existing.metadata_json, row.metadata_json),
-            )
-
+            self._coalesce_into(aggregated, row)
         return list(aggregated.values())
 
-    def _cleanup_legacy_currency_mismatch(self, row: CanonicalCostRow, tenant: DimTenant) -> None:
-        # Corrige legado: alguns registros Azure/OCI foram persistidos como USD
-        # mesmo com valor já em BRL, inflando KPIs por conversão duplicada.
-        if row.cloud not in {"azure", "oci"}:
-            return
-        if str(row.currency_code or "").upper() != "BRL":
+    def _iter_coalesced_chunks(
+        self,
+        rows: Iterable[CanonicalCostRow],
+        chunk_size: int | None,
+    ) -> Iterator[list[CanonicalCostRow]]:
+        """Coalesce em streaming, liberando chunks de dias ja fechados.
+
+        Os providers entregam as linhas em ordem crescente de usage_date por source_ref;
+        quando o buffer atinge chunk_size, as chaves com data anterior a maior data ja vista
+        do mesmo source_ref nao recebem mais linhas e podem ser gravadas. Com chunk_size
+        None todas as linhas sao coalescidas em um unico chunk.
+        """
+        if chunk_size is None:
+            rows = list(rows)
+            if rows:
+                yield self._coalesce_rows(rows)
             return
+        chunk_size = max(int(chunk_size), 1)
+        aggregated: dict[CoalesceKey, CanonicalCostRow] = {}
+        watermarks: dict[str, date] = {}
+        flushed_until: dict[str, date] = {}
+        # So varre o buffer quando alguma watermark avancou desde a ultima varredura.
+        watermark_advanced = False
 
-        stmt = (
-            delete(FactCostDaily)
-            .where(FactCostDaily.usage_date == row.usage_date)
-            .where(FactCostDaily.cloud == row.cloud)
-            .where(FactCostDaily.tenant_id == tenant.tenant_id)
-            .where(FactCostDaily.scope_key == row.scope_key)
-            .where(FactCostDaily.service_key == row.service_key)
-            .where(func.coalesce(FactCostDaily.region_key, "") == (row.region_key or ""))
-            .where(func.coalesce(FactCostDaily.resource_id, "") == "")
-            .where(func.coalesce(FactCostDaily.charge_type, "") == "")
-            .where(func.coalesce(FactCostDaily.pricing_model, "") == "")
-            .where(FactCostDaily.source_ref == row.source_ref)
-            .where(FactCostDaily.currency_code == "USD")
+        for row in rows:
+            flushed = flushed_until.get(row.source_ref)
+            if flushed is not None and row.usage_date <= flushed:
+                raise RuntimeError(
+                    f"linha fora de ordem em {row.source_ref}: {row.usage_date} ja foi gravado (ate {flushed})"
+                )
+            self._coalesce_into(aggregated, row)
+            watermark = watermarks.get(row.source_ref)
+            if watermark is None or row.usage_date > watermark:
+                watermarks[row.source_ref] = row.usage_date
+                watermark_advanced = True
+
+            if len(aggregated) < chunk_size or not watermark_advanced:
+                continue
+            watermark_advanced = False
+            closed = [key for key in aggregated if key[1] < watermarks[key[6]]]
+            if not closed:
+                continue
+            yield [aggregated.pop(key) for key in closed]
+            for source_ref, watermark in watermarks.items():
+                flushed_until[source_ref] = watermark - timedelta(days=1)
+
+        if aggregated:
+            yield list(aggregated.values())
+
+    def _coalesce_into(self, aggregated: dict[CoalesceKey, CanonicalCostRow], row: CanonicalCostRow) -> None:
+        key = (
+            row.cloud,
+            row.usage_date,
+            row.scope_key,
+            row.service_key,
+            row.region_key,
+            row.currency_code.upper(),
+            row.source_ref,
         )
-        self.db.execute(stmt)
-
-    def _get_or_create_scope(self, row: CanonicalCostRow, tenant: DimTenant, cache: dict[tuple[str, str, str], str]) -> str:
-        key = (row.cloud, str(tenant.tenant_id), row.scope_key)
-        cached = cache.get(key)
-        if cached:
-            return cached
-
-        existing = self.db.execute(
-            select(DimScope.scope_id).where(
-                DimScope.cloud == row.cloud,
-                DimScope.tenant_id == tenant.tenant_id,
-                DimScope.scope_key == row.scope_key,
-            )
-        ).scalar_one_or_none()
-        if existing:
-            self.db.execute(
-                update(DimScope)
-                .where(DimScope.scope_id == existing)
-                .values(scope_name=row.scope_name, metadata_json={"origin": "cli_ingest"})
-            )
-            cache[key] = str(existing)
-            return str(existing)
+        existing = aggregated.get(key)
+        if existing is None:
+            aggregated[key] = row
+            return
 
-        stmt = insert(DimScope).values(
-            tenant_id=tenant.tenant_id,
+        aggregated[key] = CanonicalCostRow(
             cloud=row.cloud,
+            usage_date=row.usage_date,
             scope_key=row.scope_key,
             scope_name=row.scope_name,
-            metadata_json={"origin": "cli_ingest"},
-        ).on_conflict_do_update(
-            index_elements=[DimScope.tenant_id, DimScope.scope_key],
-            set_={
-                DimScope.scope_name: row.scope_name,
-                DimScope.metadata_json: {"origin": "cli_ingest"},
-            },
-        )
-        self.db.execute(stmt)
-        scope_id = self.db.execute(
-            select(DimScope.scope_id).where(
-                DimScope.cloud == row.cloud,
-                DimScope.tenant_id == tenant.tenant_id,
-                DimScope.scope_key == row.scope_key,
-            )
-        ).scalar_one()
-        cache[key] = str(scope_id)
-        return str(scope_id)
-
-    def _get_or_create_service(self, row: CanonicalCostRow, cache: dict[tuple[str, str], str]) -> str:
-        key = (row.cloud, row.service_key)
-        cached = cache.get(key)
-        if cached:
-            return cached
-
-        existing = self.db.execute(
-            select(DimService.service_id).where(
-                DimService.cloud == row.cloud,
-                DimService.service_key == row.service_key,
-            )
-        ).scalar_one_or_none()
-        if existing:
-            cache[key] = str(existing)
-            return str(existing)
-
-        stmt = insert(DimService).values(
-            cloud=row.cloud,
             service_key=row.service_key,
             service_name=row.service_name,
-            metadata_json={"origin": "cli_ingest"},
-        ).on_conflict_do_nothing(index_elements=[DimService.cloud, DimService.service_key])
-        self.db.execute(stmt)
-        service_id = self.db.execute(
-            select(DimService.service_id).where(
-                DimService.cloud == row.cloud,
-                DimService.service_key == row.service_key,
-            )
-        ).scalar_one()
-        cache[key] = str(service_id)
-        return str(service_id)
-
-    def _get_or_create_region(self, row: CanonicalCostRow, cache: dict[tuple[str, str], str]) -> str:
-        key = (row.cloud, row.region_key)
-        cached = cache.get(key)
-        if cached:
-            return cached
-
-        existing = self.db.execute(
-            select(DimRegion.region_id).where(DimRegion.cloud == row.cloud, DimRegion.region_key == row.region_key)
-        ).scalar_one_or_none()
-        if existing:
-            cache[key] = str(existing)
-            return str(existing)
-
-        stmt = insert(DimRegion).values(
-            cloud=row.cloud,
             region_key=row.region_key,
             region_name=row.region_name,
-            metadata_json={"origin": "cli_ingest"},
-        ).on_conflict_do_nothing(index_elements=[DimRegion.cloud, DimRegion.region_key])
-        self.db.execute(stmt)
-        region_id = self.db.execute(
-            select(DimRegion.region_id).where(DimRegion.cloud == row.cloud, DimRegion.region_key == row.region_key)
-        ).scalar_one()
-        cache[key] = str(region_id)
-        return str(region_id)
+            currency_code=row.currency_code.upper(),
+            amount=self._to_decimal(existing.amount) + self._to_decimal(row.amount),
+            amount_brl=self._sum_nullable_decimals(existing.amount_brl, row.amount_brl),
+            source_ref=row.source_ref,
+            metadata_json=self._merge_metadata(existing.metadata_json, row.metadata_json),
+        )
 
     @staticmethod
     def _to_decimal(value: Decimal | None) -> Decimal:
@@ -383,46 +436,251 @@ class IngestService:
         return set()
 
 
-def run_ingest_job(db: Session, provider: str, start: date, end: date, tenant_key: str | None = None) -> dict:
+def shard_window(start: date, end: date, months: int) -> list[tuple[date, date]]:
+    """Divide [start, end] em shards alinhados ao calendario com ate `months` meses cada."""
+    if months <= 0 or start > end:
+        return [(start, end)]
+    shards: list[tuple[date, date]] = []
+    shard_start = start
+    while shard_start <= end:
+        month_index = shard_start.year * 12 + shard_start.month - 1 + months
+        next_start = date(month_index // 12, month_index % 12 + 1, 1)
+        shard_end = min(next_start - timedelta(days=1), end)
+        shards.append((shard_start, shard_end))
+        shard_start = shard_end + timedelta(days=1)
+    return shards
+
+
+def run_ingest_job(
+    db: Session,
+    provider: str,
+    start: date,
+    end: date,
+    tenant_key: str | None = None,
+    session_factory: Callable[[], Session] | None = None,
+) -> dict:
     provider_name = provider.lower().strip()
     tenant = TenantService(db).resolve_tenant(provider_name, tenant_key)
     if tenant is None:
         raise ValueError(f"tenant não resolvido para {provider_name}")
-    started = datetime.now(timezone.utc)
-    ingest_job = IngestJob(
+    # Single-flight em dois niveis: chamadas iguais no mesmo processo compartilham o resultado;
+    # entre processos, um job running cobrindo a janela e aguardado em vez de duplicado.
+    return _in_process_ingests.do(
+        (provider_name, tenant.tenant_id, start, end),
+        lambda: _run_or_join_ingest_job(db, tenant, provider_name, start, end, session_factory),
+    )
+
+
+_in_process_ingests: SingleFlight[dict] = SingleFlight()
+
+
+def sync_aws_account_names(db: Session) -> int:
+    """Aplica AWS_ACCOUNT_NAMES_JSON em dim_scope/rollups e commita; devolve quantos scopes mudaram."""
+    changed = DimensionRepository(db).sync_scope_names("aws", settings.aws_account_names)
+    db.commit()
+    if changed:
+        invalidate_cached_results(cloud="aws")
+    return changed
+
+
+def acquire_ingest_lock(db: Session, cloud: str, tenant_id: UUID) -> None:
+    """Advisory lock de transacao por (cloud, tenant): serializa o "procura job ativo -> cria job"."""
+    db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"ingest_job:{cloud}:{tenant_id}"))))
+
+
+def job_heartbeat():
+    """Ultimo sinal de vida de um job running: heartbeat gravado a cada shard, ou o inicio antes do primeiro."""
+    return func.coalesce(IngestJob.heartbeat_at, IngestJob.started_at)
+
+
+def find_running_job(db: Session, cloud: str, tenant_id: UUID, start: date, end: date) -> IngestJob | None:
+    stale_before = datetime.now(timezone.utc) - timedelta(minutes=settings.ingest_running_stale_minutes)
+    return db.execute(
+        select(IngestJob)
+        .where(IngestJob.tenant_id == tenant_id)
+        .where(IngestJob.cloud == cloud)
+        .where(IngestJob.status == "running")
+        .where(job_heartbeat() >= stale_before)
+        .where(IngestJob.source_window_start <= start)
+        .where(IngestJob.source_window_end >= end)
+        .order_by(IngestJob.started_at.asc())
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+def _run_or_join_ingest_job(
+    db: Session,
+    tenant: DimTenant,
+    provider: str,
+    start: date,
+    end: date,
+    session_factory: Callable[[], Session] | None,
+) -> dict:
+    acquire_ingest_lock(db, provider, tenant.tenant_id)
+    running = find_running_job(db, provider, tenant.tenant_id, start, end)
+    if running is not None:
+        running_id = running.job_id
+        # Libera o advisory lock antes de esperar o job do outro processo.
+        db.commit()
+        logger.info("Ingest %s/%s %s..%s ja em andamento (job %s); aguardando.", provider, tenant.tenant_key, start, end, running_id)
+        return wait_for_ingest_job(db, running_id)
+
+    ingest_job = build_ingest_job(tenant, provider, start, end, status="running")
+    db.add(ingest_job)
+    db.commit()
+    return _run_job_shards(db, ingest_job, tenant, session_factory)
+
+
+def wait_for_ingest_job(db: Session, job_id: UUID, timeout: float | None = None, poll_seconds: float = 1.0) -> dict:
+    deadline = time.monotonic() + (settings.ingest_single_flight_wait_seconds if timeout is None else timeout)
+    while True:
+        row = db.execute(
+            select(IngestJob.status, IngestJob.details_json, IngestJob.error_message).where(IngestJob.job_id == job_id)
+        ).one_or_none()
+        db.rollback()
+        if row is None:
+            raise RuntimeError(f"ingest job {job_id} não encontrado")
+        if row.status == "success":
+            details = row.details_json or {}
+            return {key: details.get(key) for key in IngestResult.__dataclass_fields__}
+        if row.status == "failed":
+            raise RuntimeError(f"ingest concorrente {job_id} falhou: {row.error_message}")
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"ingest {job_id} ainda em andamento; tente novamente mais tarde")
+        time.sleep(poll_seconds)
+
+
+def build_ingest_job(
+    tenant: DimTenant,
+    provider: str,
+    start: date,
+    end: date,
+    status: str,
+    source: str = "provider_cli",
+) -> IngestJob:
+    shards = [
+        {"start": shard_start.isoformat(), "end": shard_end.isoformat(), "status": "pending", "attempts": 0}
+        for shard_start, shard_end in shard_window(start, end, settings.ingest_shard_months)
+    ]
+    return IngestJob(
         tenant_id=tenant.tenant_id,
-        cloud=provider_name,
-        status="running",
-        started_at=started,
-        source="provider_cli",
+        cloud=provider,
+        status=status,
+        started_at=datetime.now(timezone.utc),
+        source=source,
         source_window_start=start,
         source_window_end=end,
-        details_json={"start": start.isoformat(), "end": end.isoformat(), "tenant_key": tenant.tenant_key},
+        details_json={"start": start.isoformat(), "end": end.isoformat(), "tenant_key": tenant.tenant_key, "shards": shards},
     )
-    db.add(ingest_job)
+
+
+def execute_ingest_job(db: Session, ingest_job: IngestJob, session_factory: Callable[[], Session] | None = None) -> dict:
+    """Executa um ingest_job ja persistido (ex.: retirado da fila) com o status em running."""
+    tenant = db.get(DimTenant, ingest_job.tenant_id)
+    if tenant is None:
+        raise ValueError(f"tenant não encontrado para o job {ingest_job.job_id}")
+    return _run_job_shards(db, ingest_job, tenant, session_factory)
+
+
+def resume_ingest_job(db: Session, job_id: UUID, session_factory: Callable[[], Session] | None = None) -> dict:
+    """Reprocessa apenas os shards que nao terminaram com sucesso em um job anterior."""
+    ingest_job = db.get(IngestJob, job_id)
+    if ingest_job is None:
+        raise ValueError(f"ingest job não encontrado: {job_id}")
+    tenant = db.get(DimTenant, ingest_job.tenant_id)
+    if tenant is None:
+        raise ValueError(f"tenant não encontrado para o job {job_id}")
+    details = dict(ingest_job.details_json or {})
+    if not details.get("shards"):
+        # Jobs anteriores ao sharding: a janela inteira vira um unico shard.
+        details["shards"] = [
+            {
+                "start": ingest_job.source_window_start.isoformat(),
+                "end": ingest_job.source_window_end.isoformat(),
+                "status": "pending",
+                "attempts": 0,
+            }
+        ]
+    ingest_job.status = "running"
+    ingest_job.heartbeat_at = datetime.now(timezone.utc)
+    ingest_job.finished_at = None
+    ingest_job.error_message = None
+    ingest_job.details_json = details
     db.commit()
+    return _run_job_shards(db, ingest_job, tenant, session_factory)
+
+
+def _run_job_shards(
+    db: Session,
+    ingest_job: IngestJob,
+    tenant: DimTenant,
+    session_factory: Callable[[], Session] | None,
+) -> dict:
+    provider_name = ingest_job.cloud
+    shards = [dict(shard) for shard in (ingest_job.details_json or {}).get("shards", [])]
+    pending = [idx for idx, shard in enumerate(shards) if shard.get("status") != "success"]
+    run_totals = IngestResult(provider=provider_name, tenant_key=tenant.tenant_key, rows_received=0, rows_written=0)
+
+    def record(idx: int, shard_result: IngestResult | None, attempts: int, error: Exception | None) -> None:
+        shard = shards[idx]
+        shard["attempts"] = int(shard.get("attempts") or 0) + attempts
+        if error is None and shard_result is not None:
+            shard.update({key: value for key, value in asdict(shard_result).items() if key not in {"provider", "tenant_key"}})
+            shard["status"] = "success"
+            shard.pop("error", None)
+            for key in ("rows_received", "rows_written", "rows_inserted", "rows_updated", "rows_deleted"):
+                setattr(run_totals, key, getattr(run_totals, key) + getattr(shard_result, key))
+        else:
+            shard["status"] = "failed"
+            shard["error"] = str(error)
+        # Progresso gravado a cada shard: um job interrompido mostra exatamente o que ja foi commitado.
+        # O heartbeat mantem um job longo (backfill em varios shards) fora do corte de job abandonado.
+        ingest_job.details_json = {**(ingest_job.details_json or {}), "shards": [dict(item) for item in shards]}
+        ingest_job.heartbeat_at = datetime.now(timezone.utc)
+        db.commit()
 
-    service = IngestService(db)
     try:
-        result = service.ingest_provider(provider_name, start, end, tenant_key=tenant.tenant_key)
+        if len(pending) == 1 and session_factory is None:
+            # Janela de um shard so: roda na propria sessao, como antes do sharding.
+            idx = pending[0]
+            record(idx, *_ingest_shard(lambda: nullcontext(db), provider_name, tenant.tenant_key, shards[idx]))
+        elif pending:
+            factory = session_factory or SessionLocal
+            workers = max(1, min(settings.ingest_shard_workers, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"ingest-{provider_name}") as pool:
+                futures = {
+                    pool.submit(_ingest_shard, factory, provider_name, tenant.tenant_key, shards[idx]): idx
+                    for idx in pending
+                }
+                for future in as_completed(futures):
+                    record(futures[future], *future.result())
+
+        failed = [shard for shard in shards if shard.get("status") != "success"]
+        if failed:
+            raise RuntimeError(
+                "shards com falha: "
+                + "; ".join(f"{shard['start']}..{shard['end']}: {shard.get('error')}" for shard in failed)
+            )
+
+        totals = _sum_shard_results(provider_name, tenant.tenant_key, shards)
         ingest_job.status = "success"
         ingest_job.finished_at = datetime.now(timezone.utc)
         ingest_job.details_json = {
             **(ingest_job.details_json or {}),
-            **asdict(result),
+            **asdict(totals),
         }
         db.add(
             FactIngestAudit(
                 job_id=ingest_job.job_id,
                 tenant_id=tenant.tenant_id,
                 cloud=provider_name,
-                rows_inserted=result.rows_inserted,
-                rows_updated=result.rows_updated,
-                rows_deleted=0,
+                rows_inserted=run_totals.rows_inserted,
+                rows_updated=run_totals.rows_updated,
+                rows_deleted=run_totals.rows_deleted,
             )
         )
         db.commit()
-        return asdict(result)
+        return asdict(totals)
     except Exception as exc:  # noqa: BLE001
         # Limpa transacao quebrada (flush/execute anterior) antes de persistir status de erro.
         db.rollback()
@@ -439,3 +697,71 @@ def run_ingest_job(db: Session, provider: str, start: date, end: date, tenant_ke
             db.rollback()
             logger.exception("Falha ao persistir status de erro do ingest job %s", ingest_job.job_id)
         raise
+
+
+def _ingest_shard(
+    session_factory: Callable[[], Any],
+    provider: str,
+    tenant_key: str,
+    shard: dict[str, Any],
+) -> tuple[IngestResult | None, int, Exception | None]:
+    """Ingere um shard com retentativas; cada tentativa commita (ou descarta) apenas o proprio shard."""
+    start = date.fromisoformat(shard["start"])
+    end = date.fromisoformat(shard["end"])
+    max_attempts = max(settings.ingest_shard_retries, 0) + 1
+    last_error: Exception | None = None
+    for attempt in range(1, max_attempts + 1):
+        with session_factory() as shard_db:
+            try:
+                return IngestService(shard_db).ingest_provider(provider, start, end, tenant_key=tenant_key), attempt, None
+            except Exception as exc:  # noqa: BLE001
+                shard_db.rollback()
+                last_error = exc
+                logger.warning(
+                    "Shard %s..%s de %s/%s falhou (tentativa %s/%s): %s",
+                    shard["start"],
+                    shard["end"],
+                    provider,
+                    tenant_key,
+                    attempt,
+                    max_attempts,
+                    exc,
+                )
+    return None, max_attempts, last_error
+
+
+def _sum_shard_results(provider: str, tenant_key: str, shards: list[dict[str, Any]]) -> IngestResult:
+    totals = IngestResult(provider=provider, tenant_key=tenant_key, rows_received=0, rows_written=0)
+    clean_flags: list[bool] = []
+    clean_windows: list[tuple[date, date]] = []
+    for shard in shards:
+        for key in ("rows_received", "rows_written", "rows_inserted", "rows_updated", "rows_deleted"):
+            setattr(totals, key, getattr(totals, key) + int(shard.get(key) or 0))
+        if shard.get("legacy_currency_clean") is not None:
+            clean_flags.append(bool(shard["legacy_currency_clean"]))
+        if shard.get("legacy_currency_clean") and shard.get("legacy_currency_clean_start"):
+            clean_windows.append(
+                (date.fromisoformat(shard["legacy_currency_clean_start"]), date.fromisoformat(shard["legacy_currency_clean_end"]))
+            )
+    # O job so e marcado limpo quando todos os shards confirmaram e as faixas limpas emendam
+    # numa so: um buraco entre shards (dias sem linhas) nao foi verificado.
+    clean_window = _contiguous_window(clean_windows)
+    if clean_flags and all(clean_flags) and clean_window is not None:
+        totals.legacy_currency_clean = True
+        totals.legacy_currency_clean_start = clean_window[0].isoformat()
+        totals.legacy_currency_clean_end = clean_window[1].isoformat()
+    elif clean_flags:
+        totals.legacy_currency_clean = False
+    return totals
+
+
+def _contiguous_window(windows: list[tuple[date, date]]) -> tuple[date, date] | None:
+    if not windows:
+        return None
+    ordered = sorted(windows)
+    first, last = ordered[0]
+    for window_start, window_end in ordered[1:]:
+        if window_start > last + timedelta(days=1):
+            return None
+        last = max(last, window_end)
+    return first, last
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import date
+
+from finops_api.repositories.fact_cost_repo import QueryFilters, WindowTotals
+from finops_api.services.analytics_service import AnalyticsService
+
+
+class FakeFactRepo:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def window_totals(self, filters: QueryFilters) -> WindowTotals:
+        self.calls.append("window_totals")
+        return WindowTotals(
+            current=70.0,
+            previous=50.0,
+            month_to_date=300.0,
+            year_to_date=1200.0,
+            daily=[{"date": date(2026, 3, 16), "total": 30.0}, {"date": date(2026, 3, 17), "total": 40.0}],
+        )
+
+    def infer_brl_per_usd(self, filters: QueryFilters) -> float | None:
+        self.calls.append("infer_brl_per_usd")
+        return 5.5
+
+
+class FakeTargets:
+    def monthly_target(self, cloud: str, month_date: date, currency: str) -> float:
+        return 1000.0
+
+    def yearly_target(self, cloud: str, year: int, currency: str) -> float:
+        return 12000.0
+
+
+def test_summary_v2_reads_every_window_from_window_totals() -> None:
+    repo = FakeFactRepo()
+    service = AnalyticsService(repo, targets=FakeTargets())  # type: ignore[arg-type]
+
+    summary = service.summary_v2(QueryFilters(cloud="aws", start=date(2026, 3, 16), end=date(2026, 3, 17)))
+
+    assert repo.calls == ["window_totals", "infer_brl_per_usd"]
+    assert summary.totalWeek == 70.0
+    assert summary.deltaWeek == 40.0
+    assert summary.avgDaily == 35.0
+    assert summary.peakDay.date == date(2026, 3, 17)
+    assert summary.monthTotal == 300.0
+    assert summary.yearTotal == 1200.0
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from finops_api.core.config import settings
+from finops_api.repositories.coverage_repo import DateRange
+from finops_api.services.auto_ingest_service import AutoIngestService
+
+
+class FakeSession:
+    def __init__(self, recent_job_id=None) -> None:
+        self.recent_job_id = recent_job_id
+        self.statements: list[str] = []
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt))
+        return SimpleNamespace(scalar_one_or_none=lambda: self.recent_job_id)
+
+
+def test_plan_ranges_adds_restatement_tail_to_missing_days(monkeypatch) -> None:
+    today = date.today()
+    start = today - timedelta(days=60)
+    monkeypatch.setattr(settings, "ingest_restatement_lookback_days", 3)
+    service = AutoIngestService(FakeSession())  # type: ignore[arg-type]
+    gap = DateRange(start + timedelta(days=10), start + timedelta(days=12))
+    monkeypatch.setattr(service, "missing_ranges", lambda *args, **kwargs: [gap, DateRange(today, today)])
+
+    ranges = service.plan_ranges("aws", start, today, tenant_id=uuid4())
+
+    assert ranges == [gap, DateRange(today - timedelta(days=3), today)]
+    assert "ingest_job.finished_at >=" in service.db.statements[0]
+
+
+def test_plan_ranges_skips_tail_refreshed_recently(monkeypatch) -> None:
+    today = date.today()
+    monkeypatch.setattr(settings, "ingest_restatement_lookback_days", 3)
+    service = AutoIngestService(FakeSession(recent_job_id=uuid4()))  # type: ignore[arg-type]
+    monkeypatch.setattr(service, "missing_ranges", lambda *args, **kwargs: [])
+
+    assert service.plan_ranges("oci", today - timedelta(days=30), today, tenant_id=uuid4()) == []
+
+    monkeypatch.setattr(settings, "ingest_restatement_lookback_days", 0)
+    assert service.restatement_range("oci", today - timedelta(days=30), today, tenant_id=uuid4()) is None
+
+
+def test_plan_ranges_leaves_today_to_restatement_tail(monkeypatch) -> None:
+    today = date.today()
+    monkeypatch.setattr(settings, "ingest_restatement_lookback_days", 3)
+    service = AutoIngestService(FakeSession(recent_job_id=uuid4()))  # type: ignore[arg-type]
+    requested: list[tuple[date, date]] = []
+
+    def missing_ranges(provider, start, end, tenant_id=None):  # noqa: ANN001, ARG001
+        requested.append((start, end))
+        return []
+
+    monkeypatch.setattr(service, "missing_ranges", missing_ranges)
+
+    # Cauda atualizada ha pouco: hoje (nunca coberto) nao dispara nova ingestao.
+    assert service.plan_ranges("aws", today - timedelta(days=30), today, tenant_id=uuid4()) == []
+    assert requested == [(today - timedelta(days=30), today - timedelta(days=1))]
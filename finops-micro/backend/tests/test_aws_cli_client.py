@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import json
+import stat
+import sys
 from datetime import date
 from decimal import Decimal
+from pathlib import Path
 
 from finops_api.providers.aws.cli_client import AwsCliClient, AwsCliSettings
 
@@ -35,3 +39,124 @@ def test_parse_account_results_resolves_aws_account_name() -> None:
     assert rows[0].scope_key == "595949041525"
     assert rows[0].scope_name == "Algar Telecom"
     assert rows[0].amount == Decimal("123.45")
+
+
+
+# Respostas gravadas do `aws ce get-cost-and-usage`, indexadas por (group-by, next-page-token).
+RECORDED_PAGES = {
+    "SERVICE:": {
+        "GroupDefinitions": [{"Type": "DIMENSION", "Key": "SERVICE"}],
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": "2026-03-01", "End": "2026-03-02"},
+                "Groups": [{"Keys": ["Amazon EC2"], "Metrics": {"UnblendedCost": {"Amount": "1.5", "Unit": "USD"}}}],
+            }
+        ],
+        "NextPageToken": "svc-2",
+    },
+    "SERVICE:svc-2": {
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": "2026-03-02", "End": "2026-03-03"},
+                "Groups": [{"Keys": ["Amazon S3"], "Metrics": {"UnblendedCost": {"Amount": "2", "Unit": "USD"}}}],
+            }
+        ],
+    },
+    "LINKED_ACCOUNT:": {
+        "GroupDefinitions": [{"Type": "DIMENSION", "Key": "LINKED_ACCOUNT"}],
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": "2026-03-01", "End": "2026-03-02"},
+                "Groups": [{"Keys": ["595949041525"], "Metrics": {"UnblendedCost": {"Amount": "3", "Unit": "USD"}}}],
+            }
+        ],
+        "NextPageToken": "acc-2",
+    },
+    "LINKED_ACCOUNT:acc-2": {
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": "2026-03-02", "End": "2026-03-03"},
+                "Groups": [{"Keys": ["595949041525"], "Metrics": {"UnblendedCost": {"Amount": "4", "Unit": "USD"}}}],
+            }
+        ],
+    },
+}
+
+FAKE_AWS_CLI = """\
+import json
+import sys
+import time
+from pathlib import Path
+
+base = Path(sys.argv[0]).parent
+args = sys.argv[1:]
+group = args[args.index("--group-by") + 1].split("Key=")[1]
+token = args[args.index("--next-page-token") + 1] if "--next-page-token" in args else ""
+log = base / "calls.log"
+with log.open("a") as handle:
+    handle.write(f"start {group}:{token} {time.monotonic()}\\n")
+time.sleep(float((base / "delay").read_text()))
+with log.open("a") as handle:
+    handle.write(f"end {group}:{token} {time.monotonic()}\\n")
+print(json.dumps(json.loads((base / "pages.json").read_text())[f"{group}:{token}"]))
+"""
+
+
+def _fake_cli(tmp_path: Path, delay: float = 0.0) -> str:
+    (tmp_path / "pages.json").write_text(json.dumps(RECORDED_PAGES))
+    (tmp_path / "delay").write_text(str(delay))
+    script = tmp_path / "aws"
+    script.write_text(f"#!{sys.executable}\n{FAKE_AWS_CLI}")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+def _calls(tmp_path: Path) -> list[tuple[str, str, float]]:
+    entries = []
+    for line in (tmp_path / "calls.log").read_text().splitlines():
+        event, key, moment = line.split(" ")
+        entries.append((event, key, float(moment)))
+    return entries
+
+
+def test_iter_daily_costs_replays_all_pages_keeping_day_order_per_stream(tmp_path: Path) -> None:
+    client = AwsCliClient(
+        AwsCliSettings(cli_path=_fake_cli(tmp_path), account_names={"595949041525": "Algar Telecom"}, max_workers=2)
+    )
+
+    rows = client.fetch_daily_costs(date(2026, 3, 1), date(2026, 3, 2))
+
+    by_source: dict[str, list[tuple[date, Decimal]]] = {}
+    for row in rows:
+        by_source.setdefault(row.source_ref, []).append((row.usage_date, row.amount))
+    assert by_source["aws_ce_service_cli"] == [(date(2026, 3, 1), Decimal("1.5")), (date(2026, 3, 2), Decimal("2"))]
+    assert by_source["aws_ce_account_cli"] == [(date(2026, 3, 1), Decimal("3")), (date(2026, 3, 2), Decimal("4"))]
+    assert {row.scope_name for row in rows if row.source_ref == "aws_ce_account_cli"} == {"Algar Telecom"}
+
+
+def test_iter_daily_costs_runs_group_by_streams_concurrently(tmp_path: Path) -> None:
+    client = AwsCliClient(AwsCliSettings(cli_path=_fake_cli(tmp_path, delay=0.3), account_names={}, max_workers=2))
+
+    client.fetch_daily_costs(date(2026, 3, 1), date(2026, 3, 2))
+
+    calls = _calls(tmp_path)
+    starts = {key: moment for event, key, moment in calls if event == "start"}
+    ends = {key: moment for event, key, moment in calls if event == "end"}
+    assert len(starts) == 4
+    # As duas primeiras paginas (SERVICE e LINKED_ACCOUNT) ficam em voo ao mesmo tempo.
+    assert starts["LINKED_ACCOUNT:"] < ends["SERVICE:"]
+    assert starts["SERVICE:"] < ends["LINKED_ACCOUNT:"]
+
+
+def test_iter_daily_costs_respects_single_worker_limit(tmp_path: Path) -> None:
+    client = AwsCliClient(AwsCliSettings(cli_path=_fake_cli(tmp_path, delay=0.05), account_names={}, max_workers=1))
+
+    rows = client.fetch_daily_costs(date(2026, 3, 1), date(2026, 3, 2))
+
+    calls = _calls(tmp_path)
+    in_flight = peak = 0
+    for event, _, _ in sorted(calls, key=lambda entry: entry[2]):
+        in_flight += 1 if event == "start" else -1
+        peak = max(peak, in_flight)
+    assert peak == 1
+    assert len(rows) == 4
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from datetime import date
+
+from finops_api.providers.azure.cli_client import AzureCliClient, AzureCliSettings
+
+
+def _page(days: list[str], next_link: str | None = None) -> dict:
+    return {
+        "properties": {
+            "columns": [{"name": name} for name in ("PreTaxCost", "UsageDate", "SubscriptionName", "ServiceName", "ResourceLocation")],
+            "rows": [[1.5, day, "Assinatura", "Storage", "brazilsouth"] for day in days],
+            "currency": "BRL",
+            "nextLink": next_link,
+        }
+    }
+
+
+def test_iter_daily_costs_queries_windows_and_yields_days_in_order(monkeypatch) -> None:
+    windows: list[tuple[str, str]] = []
+    # Paginas da Azure sem ordem por dia dentro da janela.
+    pages = {
+        ("2026-03-01", None): _page(["20260303", "20260301"], next_link="page-2"),
+        ("2026-03-01", "page-2"): _page(["20260302", "20260301"]),
+        ("2026-03-04", None): _page(["20260305", "20260304"]),
+    }
+
+    def fake_run_query(self, uri, payload):  # noqa: ANN001
+        period = payload["timePeriod"]
+        if uri == self.endpoint:
+            windows.append((period["from"], period["to"]))
+        return pages[(period["from"], None if uri == self.endpoint else uri)]
+
+    monkeypatch.setattr(AzureCliClient, "_run_query", fake_run_query)
+    client = AzureCliClient(AzureCliSettings(management_group_id="mg", window_days=3))
+
+    rows = list(client.iter_daily_costs(date(2026, 3, 1), date(2026, 3, 5)))
+
+    assert windows == [("2026-03-01", "2026-03-03"), ("2026-03-04", "2026-03-05")]
+    assert [row.usage_date.day for row in rows] == [1, 1, 2, 3, 4, 5]
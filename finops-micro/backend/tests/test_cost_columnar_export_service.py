@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+
+from finops_api.repositories.fact_cost_export_repo import EXPORT_FIELDS  # noqa: E402
+from finops_api.repositories.fact_cost_repo import QueryFilters  # noqa: E402
+from finops_api.services.cost_columnar_export_service import (  # noqa: E402
+    export_schema,
+    record_batch,
+    stream_arrow,
+    write_parquet_dataset,
+)
+
+ExportRow = namedtuple("ExportRow", EXPORT_FIELDS)
+
+
+class FakeTextResult:
+    def __init__(self, rows: list[ExportRow], size: int) -> None:
+        self.rows = rows
+        self.size = size
+
+    def partitions(self):
+        for idx in range(0, len(self.rows), self.size):
+            yield self.rows[idx : idx + self.size]
+
+
+class FakeTextSession:
+    """Uma pagina por execute, com as linhas no formato `as_text` (UUID, numeric e JSONB como texto)."""
+
+    def __init__(self, pages: list[list[ExportRow]]) -> None:
+        self.pages = list(pages)
+        self.statements: list[str] = []
+
+    def execute(self, stmt, params=None, execution_options=None):
+        self.statements.append(str(stmt))
+        page = self.pages.pop(0) if self.pages else []
+        return FakeTextResult(page, (execution_options or {}).get("yield_per", 1))
+
+
+TENANT_A = str(UUID(int=100))
+TENANT_B = str(UUID(int=200))
+
+
+def _row(day: date, cloud: str = "aws", amount: str = "1.500000", idx: int = 1, tenant: str = TENANT_A) -> ExportRow:
+    values = {name: None for name in EXPORT_FIELDS}
+    values.update(
+        {
+            "fact_id": str(UUID(int=idx)),
+            "cost_date": day,
+            "cloud": cloud,
+            "tenant_id": tenant,
+            "service_name": "Amazon EC2",
+            "currency": "USD",
+            "amount": amount,
+            "tags": '{"env": "prod"}',
+            "metadata": '{"sku": "BoxUsage"}',
+        }
+    )
+    return ExportRow(**values)
+
+
+def _factory(session):
+    @contextmanager
+    def factory():
+        yield session
+
+    return factory
+
+
+def _filters(cloud: str = "aws") -> QueryFilters:
+    return QueryFilters(cloud=cloud, start=date(2026, 1, 1), end=date(2026, 2, 28), currency="USD")
+
+
+def test_record_batch_transposes_cursor_rows_and_casts_decimals() -> None:
+    schema = export_schema()
+
+    batch = record_batch([_row(date(2026, 1, 1), amount="0.123456"), _row(date(2026, 1, 2), idx=2)], schema)
+
+    assert batch.num_rows == 2
+    assert batch.schema == schema
+    assert batch.column("amount").type == pa.decimal128(18, 6)
+    assert batch.column("amount").to_pylist() == [Decimal("0.123456"), Decimal("1.500000")]
+    assert batch.column("cost_date").to_pylist() == [date(2026, 1, 1), date(2026, 1, 2)]
+    assert batch.column("amount_brl").null_count == 2
+
+
+def test_stream_arrow_writes_one_batch_per_fetch_and_reads_back() -> None:
+    rows = [_row(date(2026, 1, day), idx=day) for day in range(1, 6)]
+    session = FakeTextSession([rows])
+
+    chunks = list(stream_arrow(_filters(), session_factory=_factory(session)))
+
+    reader = pa.ipc.open_stream(b"".join(chunks))
+    batches = list(reader)
+    table = pa.Table.from_batches(batches)
+    assert table.num_rows == 5
+    assert table.column("fact_id").to_pylist()[0] == str(UUID(int=1))
+    assert table.column("tags").to_pylist()[0] == '{"env": "prod"}'
+    # Colunas de texto vem convertidas pelo Postgres, nao pelo Python.
+    assert "CAST(fact_cost_daily.raw AS TEXT)" in session.statements[0]
+    assert "CAST(fact_cost_daily.amount AS TEXT)" in session.statements[0]
+
+
+def test_write_parquet_dataset_partitions_by_cloud_and_month(tmp_path) -> None:
+    rows = [
+        _row(date(2026, 1, 30), cloud="aws", idx=1),
+        _row(date(2026, 1, 31), cloud="oci", idx=2),
+        _row(date(2026, 2, 1), cloud="aws", idx=3),
+    ]
+
+    report = write_parquet_dataset(_filters("all"), tmp_path, session_factory=_factory(FakeTextSession([rows])))
+
+    assert report.rows == 3
+    assert report.bytes_written > 0
+    written = sorted(path.relative_to(tmp_path).as_posix() for path in tmp_path.rglob("*.parquet"))
+    assert written == [
+        f"tenant_id={TENANT_A}/cloud=aws/month=2026-01/part-0.parquet",
+        f"tenant_id={TENANT_A}/cloud=aws/month=2026-02/part-0.parquet",
+        f"tenant_id={TENANT_A}/cloud=oci/month=2026-01/part-0.parquet",
+    ]
+    table = ds.dataset(tmp_path, format="parquet", partitioning="hive").to_table()
+    assert sorted(table.column("fact_id").to_pylist()) == [str(UUID(int=idx)) for idx in (1, 2, 3)]
+
+
+def test_write_parquet_dataset_replaces_only_touched_partitions(tmp_path) -> None:
+    first = [_row(date(2026, 1, 10), idx=1), _row(date(2026, 2, 10), idx=2)]
+    write_parquet_dataset(_filters(), tmp_path, session_factory=_factory(FakeTextSession([first])))
+
+    again = [_row(date(2026, 1, 10), amount="9.000000", idx=1)]
+    write_parquet_dataset(_filters(), tmp_path, session_factory=_factory(FakeTextSession([again])))
+
+    table = ds.dataset(tmp_path, format="parquet", partitioning="hive").to_table()
+    amounts = dict(zip(table.column("fact_id").to_pylist(), table.column("amount").to_pylist()))
+    assert amounts == {str(UUID(int=1)): Decimal("9.000000"), str(UUID(int=2)): Decimal("1.500000")}
+
+
+def test_write_parquet_dataset_keeps_other_tenants_partitions(tmp_path) -> None:
+    write_parquet_dataset(_filters(), tmp_path, session_factory=_factory(FakeTextSession([[_row(date(2026, 1, 10), idx=1)]])))
+
+    other = [_row(date(2026, 1, 10), idx=2, tenant=TENANT_B)]
+    write_parquet_dataset(_filters(), tmp_path, session_factory=_factory(FakeTextSession([other])))
+
+    table = ds.dataset(tmp_path, format="parquet", partitioning="hive").to_table()
+    assert sorted(table.column("fact_id").to_pylist()) == [str(UUID(int=1)), str(UUID(int=2))]
+
+
+def test_write_parquet_dataset_rejects_partial_reexport(tmp_path) -> None:
+    march = [_row(date(2026, 3, day), idx=day) for day in range(1, 31)]
+    full = QueryFilters(cloud="aws", start=date(2026, 3, 1), end=date(2026, 3, 31), currency="USD")
+    write_parquet_dataset(full, tmp_path, session_factory=_factory(FakeTextSession([march])))
+
+    partial = QueryFilters(cloud="aws", start=date(2026, 3, 10), end=date(2026, 3, 12), currency="USD")
+    session = FakeTextSession([march[9:12]])
+    with pytest.raises(ValueError):
+        write_parquet_dataset(partial, tmp_path, session_factory=_factory(session))
+    with pytest.raises(ValueError):
+        write_parquet_dataset(
+            QueryFilters(cloud="aws", start=full.start, end=full.end, currency="USD", services=["Amazon EC2"]),
+            tmp_path,
+            session_factory=_factory(session),
+        )
+
+    assert session.statements == []
+    assert ds.dataset(tmp_path, format="parquet", partitioning="hive").to_table().num_rows == 30
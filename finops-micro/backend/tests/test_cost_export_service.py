@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+import pytest
+
+from finops_api.repositories.fact_cost_export_repo import EXPORT_FIELDS, ExportCursor, FactCostExportRepository
+from finops_api.repositories.fact_cost_repo import QueryFilters
+from finops_api.services.cost_export_service import iter_csv, iter_ndjson, stream_export
+
+
+class FakeRow:
+    def __init__(self, mapping: dict) -> None:
+        self._mapping = mapping
+
+    def __getattr__(self, name: str):
+        return self._mapping[name]
+
+
+class FakePageResult:
+    def __init__(self, rows: list[FakeRow], size: int) -> None:
+        self.rows = rows
+        self.size = size
+
+    def partitions(self):
+        for idx in range(0, len(self.rows), self.size):
+            yield self.rows[idx : idx + self.size]
+
+
+class FakePagedSession:
+    """Devolve uma pagina pronta por execute e guarda os statements/opcoes recebidos."""
+
+    def __init__(self, pages: list[list[dict]]) -> None:
+        self.pages = list(pages)
+        self.statements = []
+        self.execution_options: list[dict] = []
+
+    def execute(self, stmt, params=None, execution_options=None):
+        self.statements.append(stmt)
+        self.execution_options.append(execution_options or {})
+        page = self.pages.pop(0) if self.pages else []
+        return FakePageResult([FakeRow(row) for row in page], (execution_options or {}).get("yield_per", 1))
+
+
+def _row(day: int, amount: str = "1.50", **extra) -> dict:
+    row = {field: None for field in EXPORT_FIELDS}
+    row.update(
+        {
+            "fact_id": UUID(int=day),
+            "cost_date": date(2026, 1, day),
+            "cloud": "aws",
+            "service_name": "Amazon EC2",
+            "currency": "USD",
+            "amount": Decimal(amount),
+            "tags": {"env": "prod"},
+            "metadata": {"raw": True},
+        }
+    )
+    row.update(extra)
+    return row
+
+
+def _filters() -> QueryFilters:
+    return QueryFilters(cloud="aws", start=date(2026, 1, 1), end=date(2026, 1, 31), currency="USD", tenant_id=uuid4())
+
+
+def test_iter_rows_walks_keyset_pages_until_short_page() -> None:
+    session = FakePagedSession([[_row(1), _row(2)], [_row(3), _row(4)], [_row(5)]])
+    repo = FactCostExportRepository(session, page_size=2, fetch_size=10)
+
+    rows = list(repo.iter_rows(_filters()))
+
+    assert [row["cost_date"].day for row in rows] == [1, 2, 3, 4, 5]
+    assert len(session.statements) == 3
+    # fetch_size nunca passa do tamanho da pagina.
+    assert session.execution_options == [{"yield_per": 2}] * 3
+
+    first_sql = str(session.statements[0])
+    assert "ORDER BY fact_cost_daily.cost_date, fact_cost_daily.fact_id" in first_sql
+    assert "(fact_cost_daily.cost_date, fact_cost_daily.fact_id) >" not in first_sql
+
+    second = session.statements[1].compile()
+    assert "(fact_cost_daily.cost_date, fact_cost_daily.fact_id) > (" in str(second)
+    assert date(2026, 1, 2) in second.params.values()
+    assert UUID(int=2) in second.params.values()
+
+
+def test_iter_rows_stops_after_exact_last_page() -> None:
+    session = FakePagedSession([[_row(1), _row(2)], []])
+
+    rows = list(FactCostExportRepository(session, page_size=2).iter_rows(_filters()))
+
+    assert len(rows) == 2
+    assert len(session.statements) == 2
+
+
+def test_iter_rows_resumes_after_cursor_and_keeps_filters() -> None:
+    session = FakePagedSession([[_row(8)]])
+    filters = _filters()
+    filters.services = ["Amazon EC2"]
+    after = ExportCursor(cost_date=date(2026, 1, 7), fact_id=UUID(int=7))
+
+    list(FactCostExportRepository(session, page_size=10).iter_rows(filters, after=after))
+
+    compiled = session.statements[0].compile()
+    sql = str(compiled)
+    assert "fact_cost_daily.cost_date >= " in sql
+    assert "fact_cost_daily.tenant_id = " in sql
+    assert "(fact_cost_daily.cost_date, fact_cost_daily.fact_id) > (" in sql
+    assert UUID(int=7) in compiled.params.values()
+    # Exportacao crua: todas as sources, sem o recorte por source dos agregados.
+    assert "fact_cost_daily.source IN" not in sql
+
+
+def test_export_cursor_roundtrip_and_invalid_value() -> None:
+    cursor = ExportCursor(cost_date=date(2026, 1, 7), fact_id=uuid4())
+
+    assert ExportCursor.decode(cursor.encode()) == cursor
+    with pytest.raises(ValueError):
+        ExportCursor.decode("2026-01-07")
+    with pytest.raises(ValueError):
+        ExportCursor.decode("ontem,nao-e-uuid")
+
+
+def test_iter_ndjson_keeps_decimal_precision_and_chunks_rows() -> None:
+    chunks = list(iter_ndjson([_row(1, "0.123456789012"), _row(2), _row(3)], chunk_rows=2))
+
+    assert len(chunks) == 2
+    lines = "".join(chunks).splitlines()
+    first = json.loads(lines[0])
+    assert first["amount"] == "0.123456789012"
+    assert first["cost_date"] == "2026-01-01"
+    assert first["fact_id"] == str(UUID(int=1))
+    assert first["tags"] == {"env": "prod"}
+    assert len(lines) == 3
+
+
+def test_iter_csv_writes_header_once_and_json_columns() -> None:
+    chunks = list(iter_csv([_row(1), _row(2), _row(3)], chunk_rows=2))
+
+    assert len(chunks) == 2
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == list(EXPORT_FIELDS)
+    assert len(rows) == 4
+    record = dict(zip(rows[0], rows[1]))
+    assert record["amount"] == "1.50"
+    assert record["tenant_id"] == ""
+    assert json.loads(record["tags"]) == {"env": "prod"}
+
+
+def test_stream_export_uses_own_session_and_rejects_unknown_format() -> None:
+    session = FakePagedSession([[_row(1)]])
+    closed: list[bool] = []
+
+    @contextmanager
+    def factory():
+        yield session
+        closed.append(True)
+
+    with pytest.raises(ValueError):
+        stream_export(_filters(), "xlsx", session_factory=factory)
+
+    body = "".join(stream_export(_filters(), "ndjson", session_factory=factory))
+
+    assert json.loads(body)["service_name"] == "Amazon EC2"
+    assert closed == [True]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from datetime import date
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from finops_api.repositories.cost_rollup_repo import CostRollupRepository, month_ceil, month_floor
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(rowcount=7)
+
+
+def test_refresh_replaces_only_the_tenant_cloud_slice() -> None:
+    session = FakeSession()
+
+    written = CostRollupRepository(session).refresh(uuid4(), "aws", date(2026, 3, 1), date(2026, 3, 18))  # type: ignore[arg-type]
+
+    assert written == 7
+    lock, delete_stmt, insert_stmt, delete_months, insert_months = session.statements
+    assert "pg_advisory_xact_lock" in lock
+    assert delete_stmt.startswith("DELETE FROM agg_cost_daily_rollup")
+    assert "agg_cost_daily_rollup.cloud = %(cloud_1)s" in delete_stmt
+    assert "agg_cost_daily_rollup.cost_date BETWEEN" in delete_stmt
+    assert insert_stmt.startswith("INSERT INTO agg_cost_daily_rollup")
+    assert "FILTER (WHERE fact_cost_daily.amount_brl IS NULL AND fact_cost_daily.currency = " in insert_stmt
+    assert "GROUP BY fact_cost_daily.tenant_id, fact_cost_daily.cloud, fact_cost_daily.cost_date" in insert_stmt
+    # A rollup mensal recalcula o mes inteiro a partir da diaria.
+    assert delete_months.startswith("DELETE FROM agg_cost_monthly_rollup")
+    assert insert_months.startswith("INSERT INTO agg_cost_monthly_rollup")
+    assert "FROM agg_cost_daily_rollup" in insert_months
+
+
+def test_month_bounds() -> None:
+    assert month_floor(date(2026, 2, 17)) == date(2026, 2, 1)
+    assert month_ceil(date(2026, 2, 17)) == date(2026, 2, 28)
+    assert month_ceil(date(2028, 2, 1)) == date(2028, 2, 29)
+    assert month_ceil(date(2026, 12, 31)) == date(2026, 12, 31)
+
+
+def test_refresh_ignores_empty_window() -> None:
+    session = FakeSession()
+
+    assert CostRollupRepository(session).refresh(uuid4(), "oci", date(2026, 3, 2), date(2026, 3, 1)) == 0  # type: ignore[arg-type]
+    assert session.statements == []
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from datetime import date
+from types import SimpleNamespace
+from uuid import uuid4
+
+from finops_api.repositories.coverage_repo import CoverageRepository, DateRange, merge_ranges, subtract_ranges
+
+
+class FakeResult:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+        self.statements: list[str] = []
+        self.added: list = []
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt))
+        if str(stmt).startswith("DELETE") or "pg_advisory_xact_lock" in str(stmt):
+            return FakeResult([])
+        return FakeResult(self.rows)
+
+    def add(self, obj) -> None:
+        self.added.append(obj)
+
+
+def _range(start: str, end: str) -> DateRange:
+    return DateRange(date.fromisoformat(start), date.fromisoformat(end))
+
+
+def test_merge_ranges_joins_overlapping_and_adjacent_days() -> None:
+    merged = merge_ranges(
+        [
+            _range("2026-03-10", "2026-03-15"),
+            _range("2026-01-01", "2026-01-31"),
+            _range("2026-02-01", "2026-02-10"),
+            _range("2026-03-12", "2026-03-20"),
+        ]
+    )
+
+    assert merged == [_range("2026-01-01", "2026-02-10"), _range("2026-03-10", "2026-03-20")]
+
+
+def test_subtract_ranges_reports_gaps_in_the_middle_and_edges() -> None:
+    covered = [_range("2026-01-05", "2026-01-10"), _range("2026-01-15", "2026-01-20")]
+
+    missing = subtract_ranges(_range("2026-01-01", "2026-01-31"), covered)
+
+    assert missing == [
+        _range("2026-01-01", "2026-01-04"),
+        _range("2026-01-11", "2026-01-14"),
+        _range("2026-01-21", "2026-01-31"),
+    ]
+    assert subtract_ranges(_range("2026-01-06", "2026-01-09"), covered) == []
+
+
+def test_missing_ranges_reads_intervals_for_source_ref() -> None:
+    session = FakeSession(rows=[SimpleNamespace(start_date=date(2026, 1, 1), end_date=date(2026, 3, 17))])
+
+    missing = CoverageRepository(session).missing_ranges(  # type: ignore[arg-type]
+        "aws",
+        date(2026, 1, 1),
+        date(2026, 3, 18),
+        tenant_id=uuid4(),
+        source_ref="aws_ce_account_cli",
+    )
+
+    assert missing == [_range("2026-03-18", "2026-03-18")]
+    assert len(session.statements) == 1
+    assert "ingest_coverage.source_ref IN" in session.statements[0]
+
+
+def test_add_replaces_touching_intervals_with_their_union() -> None:
+    session = FakeSession(
+        rows=[
+            SimpleNamespace(coverage_id=uuid4(), start_date=date(2026, 1, 1), end_date=date(2026, 1, 31)),
+            SimpleNamespace(coverage_id=uuid4(), start_date=date(2026, 3, 1), end_date=date(2026, 3, 31)),
+        ]
+    )
+
+    CoverageRepository(session).add(uuid4(), "oci", date(2026, 2, 1), date(2026, 2, 28))  # type: ignore[arg-type]
+
+    assert [(item.start_date, item.end_date) for item in session.added] == [(date(2026, 1, 1), date(2026, 3, 31))]
+    assert any(stmt.startswith("DELETE FROM ingest_coverage") for stmt in session.statements)
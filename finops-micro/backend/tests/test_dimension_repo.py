@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+
+from finops_api.core.config import Settings, settings
+from finops_api.providers.common.types import CanonicalCostRow
+from finops_api.repositories.dimension_repo import DimensionRepository
+
+
+class FakeResult:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, scopes, services, regions) -> None:
+        self.scopes = scopes
+        self.services = services
+        self.regions = regions
+        self.statements: list[str] = []
+
+    def execute(self, stmt):
+        sql = str(stmt)
+        self.statements.append(sql)
+        if sql.startswith("INSERT"):
+            return FakeResult([])
+        if "FROM dim_scope" in sql:
+            return FakeResult(self.scopes)
+        if "FROM dim_service" in sql:
+            return FakeResult(self.services)
+        return FakeResult(self.regions)
+
+
+def _row(scope_name: str) -> CanonicalCostRow:
+    return CanonicalCostRow(
+        cloud="aws",
+        usage_date=date(2026, 3, 1),
+        scope_key="595949041525",
+        scope_name=scope_name,
+        service_key="Amazon EC2",
+        service_name="Amazon EC2",
+        region_key="global",
+        region_name="Global",
+        currency_code="USD",
+        amount=Decimal("1"),
+    )
+
+
+def _session(scope_name: str) -> FakeSession:
+    return FakeSession(
+        scopes=[SimpleNamespace(scope_key="595949041525", scope_id=uuid4(), scope_name=scope_name)],
+        services=[("aws", "Amazon EC2", uuid4())],
+        regions=[("aws", "global", uuid4())],
+    )
+
+
+def test_resolve_reads_existing_dimensions_without_writes() -> None:
+    session = _session("Algar Telecom")
+
+    ids = DimensionRepository(session).resolve([_row("Algar Telecom")] * 3, tenant_id=uuid4(), cloud="aws")  # type: ignore[arg-type]
+
+    assert len(session.statements) == 3
+    assert not any(stmt.startswith("INSERT") for stmt in session.statements)
+    assert set(ids.scopes) == {"595949041525"}
+    assert set(ids.services) == {("aws", "Amazon EC2")}
+    assert set(ids.regions) == {("aws", "global")}
+
+
+def test_resolve_upserts_scope_only_when_name_changes() -> None:
+    session = _session("595949041525")
+
+    DimensionRepository(session).resolve([_row("Algar Telecom")], tenant_id=uuid4(), cloud="aws")  # type: ignore[arg-type]
+
+    inserts = [stmt for stmt in session.statements if stmt.startswith("INSERT")]
+    assert len(inserts) == 1
+    assert "INSERT INTO dim_scope" in inserts[0]
+    assert "ON CONFLICT (tenant_id, scope_key) DO UPDATE" in inserts[0]
+    assert "RETURNING" in inserts[0]
+
+
+class FakeInsertSession(FakeSession):
+    """Guarda os parametros de cada INSERT para conferir a ordem das chaves."""
+
+    def __init__(self) -> None:
+        super().__init__(scopes=[], services=[], regions=[])
+        self.inserted: list[list] = []
+
+    def execute(self, stmt):
+        if str(stmt).startswith("INSERT"):
+            params = stmt.compile().params
+            self.inserted.append([value for name, value in params.items() if name.rsplit("_m", 1)[0].endswith("_key")])
+        return super().execute(stmt)
+
+
+def test_resolve_inserts_new_keys_in_sorted_order() -> None:
+    session = FakeInsertSession()
+    rows = [replace(_row("Conta"), scope_key=key, service_key=f"svc-{key}") for key in ("c", "a", "b")]
+
+    DimensionRepository(session).resolve(rows, tenant_id=uuid4(), cloud="azure")  # type: ignore[arg-type]
+
+    # Shards paralelos inserem as mesmas chaves novas sempre na mesma ordem: sem deadlock no indice unico.
+    assert session.inserted[0] == ["a", "b", "c"]
+    assert session.inserted[1] == ["svc-a", "svc-b", "svc-c"]
+
+
+def test_upsert_scopes_renames_already_aggregated_rollup_rows_of_the_tenant() -> None:
+    session = _session("Nome antigo")
+    tenant_id = uuid4()
+    repo = DimensionRepository(session)
+
+    repo.upsert_scopes(tenant_id, "azure", {"595949041525": "Nome novo"})  # type: ignore[arg-type]
+
+    updates = [stmt for stmt in session.statements if stmt.startswith("UPDATE")]
+    assert [stmt.split()[1] for stmt in updates] == ["agg_cost_daily_rollup", "agg_cost_monthly_rollup"]
+    assert all("tenant_id = :tenant_id_1" in stmt and "IS DISTINCT FROM" in stmt for stmt in updates)
+    assert repo.scopes_renamed == 1
+
+    # Scope novo (sem nome anterior) nao mexe nas rollups.
+    session = FakeSession(scopes=[], services=[], regions=[])
+    DimensionRepository(session).upsert_scopes(tenant_id, "azure", {"novo": "Conta nova"})  # type: ignore[arg-type]
+    assert not any(stmt.startswith("UPDATE") for stmt in session.statements)
+
+
+def test_resolve_applies_configured_aws_account_name(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "aws_account_names", {"595949041525": "Algar Telecom"})
+    session = _session("Algar Telecom")
+
+    # O provider mandou o id cru; o nome configurado ja esta gravado, entao nao ha escrita.
+    DimensionRepository(session).resolve([_row("595949041525")], tenant_id=uuid4(), cloud="aws")  # type: ignore[arg-type]
+
+    assert not any(stmt.startswith("INSERT") for stmt in session.statements)
+
+
+def test_account_names_setting_is_decoded_at_load_and_rejects_invalid_json(monkeypatch) -> None:
+    monkeypatch.setenv("AWS_ACCOUNT_NAMES_JSON", '{" 595949041525 ": " Algar Telecom ", " ": "sem id"}')
+    assert Settings().aws_account_names == {"595949041525": "Algar Telecom"}
+
+    monkeypatch.setenv("AWS_ACCOUNT_NAMES_JSON", "")
+    assert Settings().aws_account_names == {}
+
+    # JSON invalido falha na carga das settings (subida), nao no meio de uma ingestao.
+    monkeypatch.setenv("AWS_ACCOUNT_NAMES_JSON", '{"595949041525": ')
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+class FakeUpdateSession:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt))
+        return SimpleNamespace(rowcount=2)
+
+
+def test_sync_scope_names_updates_dim_scope_and_rollups_only_when_name_differs() -> None:
+    session = FakeUpdateSession()
+
+    changed = DimensionRepository(session).sync_scope_names("aws", {"595949041525": "Algar Telecom", "1": "Conta 1"})  # type: ignore[arg-type]
+
+    assert changed == 2
+    assert [stmt.split()[1] for stmt in session.statements] == ["dim_scope", "agg_cost_daily_rollup", "agg_cost_monthly_rollup"]
+    assert all("FROM (VALUES" in stmt and "IS DISTINCT FROM account_names.scope_name" in stmt for stmt in session.statements)
+
+    assert DimensionRepository(session).sync_scope_names("aws", {}) == 0  # type: ignore[arg-type]
+    assert len(session.statements) == 3
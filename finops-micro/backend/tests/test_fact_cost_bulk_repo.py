@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from uuid import uuid4
+
+from finops_api.repositories.fact_cost_bulk_repo import FactCostBulkRepository
+
+
+class FakeResult:
+    def __init__(self, row=None, rowcount: int = 0) -> None:
+        self.row = row
+        self.rowcount = rowcount
+
+    def one(self):
+        return self.row
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self.staged_batches: list[int] = []
+
+    def execute(self, stmt, params=None):
+        self.statements.append(str(stmt))
+        if params is not None:
+            self.staged_batches.append(len(params))
+        if "rows_inserted" in str(stmt):
+            inserted = self.staged_batches[-1] - 1
+            return FakeResult(type("Row", (), {"rows_inserted": inserted, "rows_updated": 1})())
+        if str(stmt).startswith("DELETE"):
+            return FakeResult(rowcount=2)
+        return FakeResult()
+
+
+def _values(count: int, currency: str = "USD") -> list[dict]:
+    tenant_id = uuid4()
+    return [
+        {
+            "fact_id": uuid4(),
+            "cost_date": date(2026, 1, 1 + idx),
+            "cloud": "aws",
+            "tenant_id": tenant_id,
+            "scope_id": uuid4(),
+            "service_id": uuid4(),
+            "region_id": uuid4(),
+            "scope_key": "__ALL__",
+            "service_key": f"svc-{idx}",
+            "region_key": "global",
+            "currency": currency,
+            "amount": Decimal("1"),
+            "amount_brl": None,
+            "source": "aws_ce_service_cli",
+            "source_record_id": None,
+            "tags": {},
+            "raw": {},
+        }
+        for idx in range(count)
+    ]
+
+
+def test_upsert_uses_constant_statements_per_batch() -> None:
+    session = FakeSession()
+
+    result = FactCostBulkRepository(session).upsert(_values(10), batch_size=4)  # type: ignore[arg-type]
+
+    assert session.staged_batches == [4, 4, 2]
+    # 1 CREATE TEMP + (TRUNCATE, stage insert, merge) por lote.
+    assert len(session.statements) == 1 + 3 * 3
+    assert result.rows_inserted == 3 + 3 + 1
+    assert result.rows_updated == 3
+
+
+def test_upsert_merge_matches_natural_key_within_tenant() -> None:
+    session = FakeSession()
+
+    FactCostBulkRepository(session).upsert(_values(2))  # type: ignore[arg-type]
+
+    merge_sql = session.statements[-1]
+    assert "ON CONFLICT DO NOTHING" in merge_sql
+    assert "fact_cost_daily.tenant_id = tmp_fact_cost_daily_stage.tenant_id" in merge_sql
+    assert "coalesce(fact_cost_daily.region_key" in merge_sql
+
+
+def test_upsert_skips_empty_batches() -> None:
+    session = FakeSession()
+
+    result = FactCostBulkRepository(session).upsert([])  # type: ignore[arg-type]
+
+    assert session.statements == []
+    assert (result.rows_inserted, result.rows_updated) == (0, 0)
+
+
+def test_upsert_cleans_legacy_currency_with_one_delete_per_window() -> None:
+    session = FakeSession()
+
+    result = FactCostBulkRepository(session).upsert(  # type: ignore[arg-type]
+        _values(5, currency="BRL"),
+        cleanup_legacy_currency=True,
+    )
+
+    deletes = [stmt for stmt in session.statements if stmt.startswith("DELETE")]
+    assert len(deletes) == 1
+    assert "fact_cost_daily.currency = :currency_1" in deletes[0]
+    assert "fact_cost_daily.cost_date BETWEEN" in deletes[0]
+    assert "tmp_fact_cost_daily_stage" in deletes[0]
+    assert result.rows_deleted == 2
+
+
+def test_upsert_skips_legacy_cleanup_for_usd_batches() -> None:
+    session = FakeSession()
+
+    result = FactCostBulkRepository(session).upsert(_values(3), cleanup_legacy_currency=True)  # type: ignore[arg-type]
+
+    assert not any(stmt.startswith("DELETE") for stmt in session.statements)
+    assert result.rows_deleted == 0
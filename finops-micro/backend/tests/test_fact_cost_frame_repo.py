@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from finops_api.core.config import settings  # noqa: E402
+from finops_api.repositories.fact_cost_frame_repo import FactCostFrameRepository, _Conversion  # noqa: E402
+from finops_api.repositories.fact_cost_repo import QueryFilters  # noqa: E402
+
+
+class FakeRates:
+    def __init__(self, rate: float | None) -> None:
+        self.rate = rate
+
+    def brl_per_usd(self, db, as_of: date) -> float | None:
+        return self.rate
+
+
+class FakeSliceSession:
+    """Responde a leitura da fatia com as linhas (dia, nome) do periodo pedido nos parametros."""
+
+    def __init__(self, rows: list[tuple]) -> None:
+        self.rows = rows
+        self.statements: list[str] = []
+
+    def execute(self, stmt):
+        compiled = stmt.compile()
+        self.statements.append(str(compiled))
+        dates = [value for value in compiled.params.values() if isinstance(value, date)]
+        start, end = min(dates), max(dates)
+        rows = [row for row in self.rows if start <= row[0] <= end]
+        return SimpleNamespace(
+            all=lambda: [
+                SimpleNamespace(usage_date=day, name=name, amount=amount, amount_brl=brl, usd=usd, other=other)
+                for day, name, amount, brl, usd, other in rows
+            ],
+            one=lambda: tuple(sum(row[idx] for row in rows) for idx in range(2, 6)),
+        )
+
+
+def _micros(value: str) -> int:
+    return int(Decimal(value) * 1_000_000)
+
+
+# (dia, servico, amount, amount_brl, USD sem BRL, demais sem BRL), em micro-unidades.
+ROWS = [
+    (date(2026, 1, 5), "Amazon S3", _micros("0.5"), 0, _micros("0.5"), 0),
+    (date(2026, 1, 31), "Amazon EC2", _micros("4"), 0, _micros("4"), 0),
+    (date(2026, 2, 1), "Amazon EC2", _micros("10.5"), _micros("20"), _micros("6.5"), 0),
+    (date(2026, 2, 1), "Amazon S3", _micros("3"), 0, _micros("3"), 0),
+    (date(2026, 2, 2), "Amazon EC2", _micros("2"), 0, _micros("2"), 0),
+    (date(2026, 2, 2), "Amazon RDS", _micros("1.25"), 0, _micros("1"), _micros("0.25")),
+]
+
+
+def _filters(currency: str = "USD") -> QueryFilters:
+    return QueryFilters(cloud="aws", start=date(2026, 2, 1), end=date(2026, 2, 2), currency=currency)
+
+
+@pytest.fixture(autouse=True)
+def _as_of_mode(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "fx_conversion_mode", "as_of")
+    monkeypatch.setattr(settings, "cost_rollup_enabled", True)
+
+
+def test_conversion_matches_numeric_sum_with_float_rate_literal() -> None:
+    rate = 5.123456789012345
+    conversion = _Conversion.from_rate(rate)
+    sums = np.array([[0, _micros("20"), _micros("6.5"), _micros("0.25")]], dtype=np.int64)
+
+    expected = Decimal("20") + Decimal("6.5") * Decimal(repr(rate)) + Decimal("0.25")
+    assert conversion.total(sums) == float(expected)
+    assert _Conversion(usd=True).total(np.array([[_micros("1.1"), 0, 0, 0]], dtype=np.int64)) == 1.1
+
+
+def test_conversion_is_vectorised_in_int64_and_exact_past_it() -> None:
+    sums = np.array([[0, _micros("20"), _micros("6.5"), _micros("0.25")], [0, 0, _micros("1000"), 0]], dtype=np.int64)
+
+    for rate in (5.12345678, 5.123456789012345):
+        conversion = _Conversion.from_rate(rate)
+        expected = [(brl + other) * conversion.scale + usd * conversion.mantissa for _, brl, usd, other in sums.tolist()]
+        # 8 casas cabem em int64; o repr com 16 digitos estoura e cai na aritmetica com int do Python.
+        assert conversion.numerators(sums) == expected
+        assert conversion.total(sums) == sum(expected) / (1_000_000 * conversion.scale)
+
+
+def test_frame_is_loaded_once_and_extended_only_by_missing_days() -> None:
+    session = FakeSliceSession(ROWS)
+    repo = FactCostFrameRepository(session)
+    filters = _filters()
+
+    assert repo.total(filters) == 16.75
+    assert repo.timeseries(filters) == [{"date": date(2026, 2, 1), "total": 13.5}, {"date": date(2026, 2, 2), "total": 3.25}]
+    assert len(session.statements) == 1
+    assert "FROM agg_cost_daily_rollup" in session.statements[0]
+    assert "agg_cost_daily_rollup.source = " in session.statements[0]
+
+    # window_totals estende a fatia so pelo periodo anterior; o resto do ano vem somado numa consulta.
+    totals = repo.window_totals(filters)
+    assert len(session.statements) == 3
+    assert "GROUP BY" not in session.statements[2]
+    assert (totals.current, totals.previous, totals.month_to_date, totals.year_to_date) == (16.75, 4.0, 16.75, 21.25)
+
+
+def test_brl_uses_amount_brl_and_rate_for_usd_without_brl() -> None:
+    repo = FactCostFrameRepository(FakeSliceSession(ROWS), fx_rates=FakeRates(5.0))
+
+    assert repo.timeseries(_filters("BRL")) == [
+        {"date": date(2026, 2, 1), "total": 20 + 6.5 * 5 + 3 * 5},
+        {"date": date(2026, 2, 2), "total": 2 * 5 + 1 * 5 + 0.25},
+    ]
+
+
+def test_rankings_fold_others_like_sql_path() -> None:
+    repo = FactCostFrameRepository(FakeSliceSession(ROWS))
+
+    ranked = repo.top_services_ranked(_filters(), limit=2)
+    assert [item["serviceName"] for item in ranked] == ["Amazon EC2", "Others"]
+    assert ranked[0]["delta"] == 8.5
+    assert ranked[1]["total"] == 4.25
+
+    daily = repo.daily_with_service_breakdown(_filters(), top_n=2)
+    assert [(item["date"], list(item["byService"])) for item in daily] == [
+        (date(2026, 2, 1), ["Amazon EC2", "Others"]),
+        (date(2026, 2, 2), ["Amazon EC2", "Others"]),
+    ]
+
+    trend = repo.cost_explorer_trend(_filters(), "service", selected_item="Amazon S3")
+    assert [(item["date"], item["selected"], item["others"]) for item in trend] == [
+        (date(2026, 2, 1), 3.0, 10.5),
+        (date(2026, 2, 2), 0.0, 3.25),
+    ]
+
+
+def test_daily_fx_mode_stays_on_sql_path(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "fx_conversion_mode", "daily")
+    session = FakeSliceSession(ROWS)
+    session.execute = lambda stmt: SimpleNamespace(scalar_one=lambda: 7)
+
+    assert FactCostFrameRepository(session).total(_filters("BRL")) == 7.0
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import date
+from types import SimpleNamespace
 
+from finops_api.core.config import settings
 from finops_api.repositories.fact_cost_repo import FactCostRepository, QueryFilters
 
 
@@ -38,3 +41,220 @@ def test_infer_brl_per_usd_limits_inference_to_usd_rows() -> None:
 
     assert rate is None
     assert any("fact_cost_daily.currency = :currency_1" in stmt for stmt in session.statements)
+
+
+class FakeScalarSession:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt))
+        return type("Result", (), {"scalar_one": lambda self: 0})()
+
+
+def test_total_reads_rollup_and_falls_back_to_fact_when_disabled(monkeypatch) -> None:
+    filters = QueryFilters(cloud="aws", start=date(2026, 2, 3), end=date(2026, 2, 20), currency="USD", services=["Amazon EC2"])
+
+    monkeypatch.setattr(settings, "cost_rollup_enabled", True)
+    session = FakeScalarSession()
+    FactCostRepository(session).total(filters)
+    assert "FROM agg_cost_daily_rollup" in session.statements[0]
+    assert "fact_cost_daily" not in session.statements[0]
+    assert "agg_cost_daily_rollup.service_name IN" in session.statements[0]
+
+    monkeypatch.setattr(settings, "cost_rollup_enabled", False)
+    session = FakeScalarSession()
+    FactCostRepository(session).total(filters)
+    assert "FROM fact_cost_daily LEFT OUTER JOIN dim_service" in session.statements[0]
+
+
+def test_total_is_memoized_per_repository_with_normalized_filters(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "cost_rollup_enabled", True)
+    session = FakeScalarSession()
+    repo = FactCostRepository(session)
+    base = QueryFilters(cloud="aws", start=date(2026, 2, 3), end=date(2026, 2, 20), currency="USD")
+
+    repo.total(replace(base, services=["Amazon S3", "Amazon EC2"]))
+    repo.total(filters=replace(base, currency="usd", services=["Amazon EC2", "Amazon S3"], tenant_key="default"))
+    repo.total(replace(base, services=["Amazon EC2"]))
+
+    assert len(session.statements) == 2
+    stats = repo.memo.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 2, 2)
+
+    # Outra instancia (outra requisicao) nao compartilha o memo.
+    FactCostRepository(session).total(replace(base, services=["Amazon EC2"]))
+    assert len(session.statements) == 3
+
+
+def test_total_sums_closed_months_from_monthly_rollup_plus_daily_tail(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "cost_rollup_enabled", True)
+    session = FakeScalarSession()
+
+    FactCostRepository(session).total(
+        QueryFilters(cloud="oci", start=date(2026, 1, 1), end=date(2026, 3, 18), currency="USD")
+    )
+
+    assert len(session.statements) == 1
+    statement = session.statements[0]
+    assert "UNION ALL" in statement
+    assert "FROM agg_cost_monthly_rollup" in statement
+    assert "agg_cost_monthly_rollup.month_start BETWEEN" in statement
+    assert "FROM agg_cost_daily_rollup" in statement
+    assert FactCostRepository._closed_months(date(2026, 1, 1), date(2026, 3, 18)) == (date(2026, 1, 1), date(2026, 2, 1))
+    assert FactCostRepository._closed_months(date(2026, 1, 15), date(2026, 2, 27)) is None
+    assert FactCostRepository._closed_months(date(2026, 1, 15), date(2026, 3, 31)) == (date(2026, 2, 1), date(2026, 3, 1))
+
+
+def test_total_daily_fx_mode_converts_per_day_instead_of_monthly_rollup(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "cost_rollup_enabled", True)
+    monkeypatch.setattr(settings, "fx_conversion_mode", "daily")
+    filters = QueryFilters(cloud="aws", start=date(2026, 1, 1), end=date(2026, 3, 31), currency="BRL")
+
+    session = FakeScalarSession()
+    FactCostRepository(session).total(filters)
+    sql = session.statements[0]
+    assert len(session.statements) == 1
+    assert "agg_cost_monthly_rollup" not in sql
+    assert "generate_series" in sql and "LATERAL" in sql
+    # Agrega os componentes por dia e so depois junta a serie de cotacoes.
+    assert "GROUP BY agg_cost_daily_rollup.cost_date" in sql
+    assert "by_day.usd * fx_daily.brl_per_usd" in sql
+    assert "ON by_day.usage_date = fx_daily.rate_date" in sql
+
+    # USD nao converte: nada de serie de cotacoes.
+    session = FakeScalarSession()
+    FactCostRepository(session).total(replace(filters, currency="USD", start=date(2026, 3, 2)))
+    assert "fx_daily" not in session.statements[0]
+
+
+class FakeRowsSession:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+        self.statements: list[str] = []
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt))
+        return type("Result", (), {"all": lambda _self: self.rows})()
+
+
+def test_window_totals_runs_one_grouping_sets_query(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "cost_rollup_enabled", True)
+    row = lambda day, is_total, current, previous=None, mtd=None, ytd=None: SimpleNamespace(  # noqa: E731
+        usage_date=day, is_total=is_total, current=current, previous=previous, month_to_date=mtd, year_to_date=ytd
+    )
+    session = FakeRowsSession(
+        [
+            row(date(2026, 3, 17), 0, 20.0),
+            row(date(2026, 3, 16), 0, 10.0),
+            row(date(2026, 2, 1), 0, None),
+            row(None, 1, 30.0, 25.0, 90.0, 400.0),
+        ]
+    )
+
+    windows = FactCostRepository(session).window_totals(
+        QueryFilters(cloud="aws", start=date(2026, 3, 16), end=date(2026, 3, 17), currency="USD")
+    )
+
+    assert (windows.current, windows.previous, windows.month_to_date, windows.year_to_date) == (30.0, 25.0, 90.0, 400.0)
+    assert windows.daily == [{"date": date(2026, 3, 16), "total": 10.0}, {"date": date(2026, 3, 17), "total": 20.0}]
+    assert len(session.statements) == 1
+    statement = session.statements[0]
+    assert "GROUP BY GROUPING SETS" in statement
+    assert statement.count("FILTER (WHERE") == 4
+    # Jan e Fev fechados vem da rollup mensal; o resto da diaria.
+    assert "FROM agg_cost_monthly_rollup" in statement
+    assert "FROM agg_cost_daily_rollup" in statement
+
+
+def test_top_services_ranked_returns_deltas_and_others_from_one_query(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "cost_rollup_enabled", True)
+    session = FakeRowsSession(
+        [
+            SimpleNamespace(name="Amazon EC2", total=60.0, previous=40.0, period_total=100.0, position=1),
+            SimpleNamespace(name="Others", total=40.0, previous=50.0, period_total=100.0, position=2),
+        ]
+    )
+
+    items = FactCostRepository(session).top_services_ranked(
+        QueryFilters(cloud="aws", start=date(2026, 3, 1), end=date(2026, 3, 7), currency="USD"),
+        limit=2,
+    )
+
+    assert items == [
+        {"serviceName": "Amazon EC2", "total": 60.0, "sharePct": 60.0, "delta": 20.0, "deltaPct": 50.0},
+        {"serviceName": "Others", "total": 40.0, "sharePct": 40.0, "delta": -10.0, "deltaPct": -20.0},
+    ]
+    assert len(session.statements) == 1
+    statement = session.statements[0]
+    assert "row_number() OVER" in statement
+    assert statement.count("FILTER (WHERE agg_cost_daily_rollup.cost_date BETWEEN") == 2
+
+
+def test_account_queries_group_by_synced_scope_name_without_case(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "cost_rollup_enabled", False)
+    session = FakeRowsSession([])
+
+    FactCostRepository(session).top_scopes(
+        QueryFilters(cloud="aws", start=date(2026, 3, 1), end=date(2026, 3, 7), currency="USD", accounts=["Algar Telecom"]),
+        limit=5,
+    )
+
+    statement = session.statements[0]
+    assert "CASE" not in statement
+    assert "coalesce(dim_scope.scope_name, fact_cost_daily.scope_key) IN" in statement
+    assert "GROUP BY coalesce(dim_scope.scope_key, fact_cost_daily.scope_key), coalesce(dim_scope.scope_name, fact_cost_daily.scope_key)" in statement
+
+
+def test_daily_with_service_breakdown_buckets_others_in_one_query(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "cost_rollup_enabled", True)
+    session = FakeRowsSession(
+        [
+            SimpleNamespace(date=date(2026, 3, 1), service="Amazon EC2", total=10.0),
+            SimpleNamespace(date=date(2026, 3, 1), service="Others", total=5.0),
+            SimpleNamespace(date=date(2026, 3, 2), service="Others", total=2.5),
+        ]
+    )
+
+    days = FactCostRepository(session).daily_with_service_breakdown(
+        QueryFilters(cloud="aws", start=date(2026, 3, 1), end=date(2026, 3, 2), currency="USD"),
+        top_n=2,
+    )
+
+    assert days == [
+        {"date": date(2026, 3, 1), "total": 15.0, "byService": {"Amazon EC2": 10.0, "Others": 5.0}},
+        {"date": date(2026, 3, 2), "total": 2.5, "byService": {"Others": 2.5}},
+    ]
+    assert len(session.statements) == 1
+    statement = session.statements[0]
+    assert "sum(per_day.total) OVER (PARTITION BY per_day.service_name)" in statement
+    assert "dense_rank() OVER" in statement
+    assert "GROUP BY bucketed.usage_date, bucketed.service" in statement
+
+
+def test_cost_explorer_trend_splits_selected_and_others_in_one_query(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "cost_rollup_enabled", True)
+    filters = QueryFilters(cloud="aws", start=date(2026, 3, 1), end=date(2026, 3, 2), currency="USD")
+    rows = [
+        SimpleNamespace(date=date(2026, 3, 1), total=15.0, selected=10.0, others=5.0),
+        SimpleNamespace(date=date(2026, 3, 2), total=2.5, selected=0, others=2.5),
+    ]
+
+    session = FakeRowsSession(rows)
+    trend = FactCostRepository(session).cost_explorer_trend(filters, group_by="service", selected_item=None, limit=5)
+
+    assert trend == [
+        {"date": date(2026, 3, 1), "total": 15.0, "selected": 10.0, "others": 5.0},
+        {"date": date(2026, 3, 2), "total": 2.5, "selected": 0.0, "others": 2.5},
+    ]
+    # Sem item selecionado o top sai do ranking no mesmo statement (sem breakdown nem totais a parte).
+    assert len(session.statements) == 1
+    assert "dense_rank() OVER (ORDER BY with_totals.name_total DESC, with_totals.name)" in session.statements[0]
+    assert "FILTER (WHERE flagged.selected)" in session.statements[0]
+    assert "GROUP BY flagged.usage_date" in session.statements[0]
+
+    session = FakeRowsSession(rows)
+    FactCostRepository(session).cost_explorer_trend(filters, group_by="account", selected_item="Algar Telecom")
+    assert len(session.statements) == 1
+    assert "dense_rank" not in session.statements[0]
+    assert "per_name.name = " in session.statements[0]
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date
+from types import SimpleNamespace
+
+from finops_api.core.config import settings
+from finops_api.repositories.fact_cost_repo import FactCostRepository
+from finops_api.repositories.fx_rate_table import FxRateTable
+
+
+class FakeRatesSession:
+    def __init__(self, rows: list[tuple[date, str, str, float]]) -> None:
+        self.rows = rows
+        self.statements: list[str] = []
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt))
+        rows = [SimpleNamespace(rate_date=d, from_currency=f, to_currency=t, rate=r) for d, f, t, r in self.rows]
+        return SimpleNamespace(all=lambda: rows)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_as_of_lookup_loads_once_and_prefers_direct_pair(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "fx_rate_table_refresh_seconds", 300)
+    session = FakeRatesSession(
+        [
+            (date(2026, 1, 10), "BRL", "USD", 0.2),
+            (date(2026, 1, 5), "USD", "BRL", 5.1),
+            (date(2026, 1, 12), "USD", "BRL", 0),
+            (date(2026, 1, 12), "BRL", "USD", 0.25),
+            (date(2026, 1, 15), "usd", "brl", 5.3),
+            (date(2026, 1, 15), "BRL", "USD", 0.5),
+        ]
+    )
+    table = FxRateTable()
+
+    assert table.brl_per_usd(session, date(2026, 1, 4)) is None
+    assert table.brl_per_usd(session, date(2026, 1, 9)) == 5.1
+    assert table.brl_per_usd(session, date(2026, 1, 10)) == 5.0
+    assert table.brl_per_usd(session, date(2026, 1, 13)) == 4.0
+    assert table.brl_per_usd(session, date(2026, 3, 1)) == 5.3
+    assert table.exact_brl_per_usd(session, date(2026, 1, 11)) is None
+    assert len(session.statements) == 1
+    assert "dim_currency_rate.from_currency = :from_currency_1" in session.statements[0]
+
+
+def test_record_updates_loaded_table_incrementally_and_refresh_reloads(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "fx_rate_table_refresh_seconds", 60)
+    clock = FakeClock()
+    session = FakeRatesSession([(date(2026, 1, 5), "USD", "BRL", 5.1)])
+    table = FxRateTable(clock=clock)
+    table.record(date(2026, 1, 1), "USD", "BRL", 9.9)  # ainda nao carregada: ignorada
+    assert table.brl_per_usd(session, date(2026, 1, 2)) is None
+
+    table.record(date(2026, 1, 8), "USD", "BRL", 5.4)
+    table.record(date(2026, 1, 6), "BRL", "USD", 0.2)
+    table.record(date(2026, 1, 6), "EUR", "BRL", 6.0)
+    assert table.brl_per_usd(session, date(2026, 1, 7)) == 5.0
+    assert table.brl_per_usd(session, date(2026, 2, 1)) == 5.4
+    assert len(session.statements) == 1
+
+    clock.now = 61
+    assert table.brl_per_usd(session, date(2026, 2, 1)) == 5.1
+    assert len(session.statements) == 2
+
+
+def test_fact_repo_resolves_rate_from_table_with_settings_fallback(monkeypatch) -> None:
+    table = FxRateTable.from_rates([(date(2026, 1, 5), "USD", "BRL", 5.2)])
+    repo = FactCostRepository(FakeRatesSession([]), fx_rates=table)  # type: ignore[arg-type]
+    monkeypatch.setattr(settings, "usd_rate_fallback", 5.9)
+    monkeypatch.setattr(settings, "fx_rate_table_refresh_seconds", 0)
+
+    assert repo._resolve_brl_per_usd(date(2026, 1, 31)) == 5.2
+    assert repo._resolve_brl_per_usd(date(2026, 1, 1)) == 5.9
+    assert repo.db.statements == []
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date
+
+from finops_api.core.config import settings
+from finops_api.jobs import ingest_cli
+from finops_api.jobs.ingest_cli import PairReport, expand_pairs, run_pairs
+
+
+def test_expand_pairs_fans_out_configured_tenants(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "aws_tenants", "prod,dev")
+    monkeypatch.setattr(settings, "oci_tenants", "DEFAULT")
+    monkeypatch.setattr(settings, "tenant_configs_json", "{}")
+
+    assert expand_pairs(["aws", "oci"]) == [("aws", "prod"), ("aws", "dev"), ("oci", "DEFAULT")]
+
+
+def test_expand_pairs_falls_back_to_single_tenant_when_provider_has_none_configured(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "aws_tenants", "")
+    monkeypatch.setattr(settings, "aws_profile", None)
+    monkeypatch.setattr(settings, "oci_tenants", "DEFAULT")
+    monkeypatch.setattr(settings, "tenant_configs_json", "{}")
+
+    # Sem AWS_TENANTS/AWS_PROFILE o par continua na lista: resolve_tenant escolhe o tenant ativo.
+    assert expand_pairs(["aws", "oci"]) == [("aws", None), ("oci", "DEFAULT")]
+
+
+def test_run_pairs_overlaps_pairs_and_keeps_order(monkeypatch) -> None:
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_ingest_pair(provider: str, tenant_key: str, start: date, end: date, incremental: bool = False) -> PairReport:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return PairReport(provider=provider, tenant_key=tenant_key, rows_written=10, elapsed=0.05)
+
+    monkeypatch.setattr(ingest_cli, "ingest_pair", fake_ingest_pair)
+    pairs = [("aws", "prod"), ("aws", "dev"), ("azure", "default"), ("oci", "DEFAULT")]
+
+    reports = run_pairs(pairs, date(2026, 1, 1), date(2026, 1, 31), parallel=4)
+
+    assert [(report.provider, report.tenant_key) for report in reports] == pairs
+    assert peak > 1
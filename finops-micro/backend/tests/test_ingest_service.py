@@ -1,10 +1,25 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
 
+from finops_api.models.dim_tenant import DimTenant
+from finops_api.models.fact_ingest_audit import FactIngestAudit
+from finops_api.models.ingest_job import IngestJob
 from finops_api.providers.common.types import CanonicalCostRow
-from finops_api.services.ingest_service import IngestService
+from finops_api.services import ingest_service
+from finops_api.services.ingest_service import (
+    IngestResult,
+    IngestService,
+    PersistStats,
+    _sum_shard_results,
+    resume_ingest_job,
+    run_ingest_job,
+    shard_window,
+)
+from finops_api.services.tenant_service import TenantService
 
 
 def test_coalesce_rows_sums_duplicate_natural_keys_and_preserves_skus() -> None:
@@ -92,3 +107,288 @@ def test_coalesce_rows_keeps_distinct_services_separate() -> None:
     coalesced = service._coalesce_rows(rows)  # noqa: SLF001
 
     assert len(coalesced) == 2
+
+
+def _aws_row(day: int, service: str, amount: str, source_ref: str = "aws_ce_service_cli") -> CanonicalCostRow:
+    return CanonicalCostRow(
+        cloud="aws",
+        usage_date=date(2026, 3, day),
+        scope_key="__ALL__",
+        scope_name="__ALL__",
+        service_key=service,
+        service_name=service,
+        region_key="global",
+        region_name="Global",
+        currency_code="USD",
+        amount=Decimal(amount),
+        source_ref=source_ref,
+    )
+
+
+def test_iter_coalesced_chunks_keeps_open_day_in_buffer_across_chunk_boundary() -> None:
+    service = IngestService(db=None)  # type: ignore[arg-type]
+
+    rows = [
+        _aws_row(1, "EC2", "1"),
+        _aws_row(1, "S3", "2"),
+        _aws_row(2, "EC2", "3"),
+        _aws_row(2, "EC2", "4"),
+        _aws_row(3, "EC2", "5"),
+        _aws_row(1, "EC2", "10", source_ref="aws_ce_account_cli"),
+    ]
+
+    chunks = list(service._iter_coalesced_chunks(rows, chunk_size=2))  # noqa: SLF001
+
+    assert [len(chunk) for chunk in chunks] == [2, 1, 2]
+    flattened = {(row.source_ref, row.usage_date.day, row.service_key): row.amount for chunk in chunks for row in chunk}
+    assert flattened[("aws_ce_service_cli", 2, "EC2")] == Decimal("7")
+    assert flattened[("aws_ce_account_cli", 1, "EC2")] == Decimal("10")
+    assert len(flattened) == 5
+
+
+def test_iter_coalesced_chunks_rejects_rows_for_already_written_days() -> None:
+    service = IngestService(db=None)  # type: ignore[arg-type]
+
+    rows = [_aws_row(1, "EC2", "1"), _aws_row(2, "EC2", "1"), _aws_row(1, "S3", "1")]
+
+    try:
+        list(service._iter_coalesced_chunks(rows, chunk_size=1))  # noqa: SLF001
+    except RuntimeError as exc:
+        assert "fora de ordem" in str(exc)
+    else:
+        raise AssertionError("linha fora de ordem deveria falhar")
+
+
+def test_shard_window_splits_on_calendar_months() -> None:
+    assert shard_window(date(2026, 1, 15), date(2026, 3, 10), months=1) == [
+        (date(2026, 1, 15), date(2026, 1, 31)),
+        (date(2026, 2, 1), date(2026, 2, 28)),
+        (date(2026, 3, 1), date(2026, 3, 10)),
+    ]
+    assert shard_window(date(2025, 11, 1), date(2026, 2, 5), months=2) == [
+        (date(2025, 11, 1), date(2025, 12, 31)),
+        (date(2026, 1, 1), date(2026, 2, 5)),
+    ]
+    assert shard_window(date(2026, 1, 1), date(2026, 12, 31), months=0) == [(date(2026, 1, 1), date(2026, 12, 31))]
+
+
+class FakeJobSession:
+    def __init__(self) -> None:
+        self.objects: dict = {}
+        self.audits: list[FactIngestAudit] = []
+        self.commits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def add(self, obj) -> None:
+        if isinstance(obj, IngestJob):
+            obj.job_id = obj.job_id or uuid4()
+            self.objects[(IngestJob, obj.job_id)] = obj
+        elif isinstance(obj, FactIngestAudit):
+            self.audits.append(obj)
+
+    def get(self, model, key):
+        return self.objects.get((model, key))
+
+    def execute(self, stmt):
+        # Advisory lock e busca de job running concorrente: nenhum job em andamento.
+        return SimpleNamespace(scalar_one_or_none=lambda: None)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        return None
+
+
+def _sharded_job(monkeypatch, failures: dict[date, int]):
+    tenant = DimTenant(tenant_id=uuid4(), cloud="aws", tenant_key="default", tenant_name="AWS")
+    calls: list[date] = []
+
+    def fake_ingest_provider(self, provider, start, end, tenant_key=None):  # noqa: ANN001
+        calls.append(start)
+        if failures.get(start, 0) > 0:
+            failures[start] -= 1
+            raise RuntimeError(f"CLI indisponivel em {start}")
+        days = (end - start).days + 1
+        return IngestResult(provider, tenant_key, rows_received=days, rows_written=days, rows_inserted=days)
+
+    monkeypatch.setattr(IngestService, "ingest_provider", fake_ingest_provider)
+    monkeypatch.setattr(TenantService, "resolve_tenant", lambda self, provider, key=None: tenant)  # noqa: ARG005
+    monkeypatch.setattr(ingest_service.settings, "ingest_shard_months", 1)
+    monkeypatch.setattr(ingest_service.settings, "ingest_shard_retries", 1)
+    return tenant, calls
+
+
+def test_run_ingest_job_commits_each_shard_and_retries_failures(monkeypatch) -> None:
+    _, calls = _sharded_job(monkeypatch, failures={date(2026, 2, 1): 1})
+    db = FakeJobSession()
+
+    result = run_ingest_job(db, "aws", date(2026, 1, 1), date(2026, 3, 31), session_factory=FakeJobSession)  # type: ignore[arg-type]
+
+    job = next(iter(db.objects.values()))
+    shards = job.details_json["shards"]
+    assert job.status == "success"
+    assert [shard["status"] for shard in shards] == ["success", "success", "success"]
+    assert [shard["attempts"] for shard in shards] == [1, 2, 1]
+    assert calls.count(date(2026, 2, 1)) == 2
+    assert result["rows_written"] == 31 + 28 + 31
+    assert db.audits[0].rows_inserted == 31 + 28 + 31
+
+
+def test_run_ingest_job_heartbeats_after_each_shard(monkeypatch) -> None:
+    _sharded_job(monkeypatch, failures={})
+    db = FakeJobSession()
+    heartbeats: list = []
+    commit = db.commit
+
+    def tracking_commit() -> None:
+        job = next(iter(db.objects.values()), None)
+        if job is not None and job.details_json.get("shards"):
+            heartbeats.append(job.heartbeat_at)
+        commit()
+
+    db.commit = tracking_commit  # type: ignore[method-assign]
+    run_ingest_job(db, "aws", date(2026, 1, 1), date(2026, 3, 31), session_factory=FakeJobSession)  # type: ignore[arg-type]
+
+    job = next(iter(db.objects.values()))
+    # started_at fica no inicio; o heartbeat avanca a cada shard gravado e e o que o corte de job abandonado le.
+    shard_heartbeats = [beat for beat in heartbeats if beat is not None]
+    assert len(shard_heartbeats) >= 3
+    assert shard_heartbeats == sorted(shard_heartbeats)
+    assert job.heartbeat_at >= job.started_at
+
+
+def test_resume_ingest_job_reruns_only_failed_shards(monkeypatch) -> None:
+    tenant, calls = _sharded_job(monkeypatch, failures={date(2026, 2, 1): 2})
+    db = FakeJobSession()
+    db.objects[(DimTenant, tenant.tenant_id)] = tenant
+
+    try:
+        run_ingest_job(db, "aws", date(2026, 1, 1), date(2026, 3, 31), session_factory=FakeJobSession)  # type: ignore[arg-type]
+    except RuntimeError as exc:
+        assert "2026-02-01..2026-02-28" in str(exc)
+    else:
+        raise AssertionError("shard com falha deveria falhar o job")
+
+    job = next(obj for obj in db.objects.values() if isinstance(obj, IngestJob))
+    assert job.status == "failed"
+    assert [shard["status"] for shard in job.details_json["shards"]] == ["success", "failed", "success"]
+
+    calls.clear()
+    result = resume_ingest_job(db, job.job_id, session_factory=FakeJobSession)  # type: ignore[arg-type]
+
+    assert calls == [date(2026, 2, 1)]
+    assert job.status == "success"
+    assert result["rows_written"] == 31 + 28 + 31
+    assert db.audits[-1].rows_inserted == 28
+
+
+class FakeCommitSession:
+    def __init__(self) -> None:
+        self.commits = 0
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+def test_mark_coverage_stops_at_last_received_day_per_source_and_before_today(monkeypatch) -> None:
+    added: list[tuple] = []
+    monkeypatch.setattr(
+        ingest_service.CoverageRepository,
+        "add",
+        lambda self, tenant_id, cloud, start, end, source_refs=None: added.append((start, end, tuple(source_refs))),
+    )
+    tenant = DimTenant(tenant_id=uuid4(), cloud="aws", tenant_key="default", tenant_name="AWS")
+    session = FakeCommitSession()
+    today = date.today()
+    start = today - timedelta(days=10)
+
+    IngestService(session)._mark_coverage(  # type: ignore[arg-type]
+        tenant,
+        "aws",
+        start,
+        today,
+        {"aws_ce_service_cli": today, "aws_ce_account_cli": today - timedelta(days=4)},
+    )
+
+    assert added == [
+        (start, today - timedelta(days=1), ("aws_ce_service_cli",)),
+        (start, today - timedelta(days=4), ("aws_ce_account_cli",)),
+    ]
+    assert session.commits == 1
+
+    # Resposta vazia: nada vira cobertura.
+    added.clear()
+    IngestService(session)._mark_coverage(tenant, "oci", start, today, {})  # type: ignore[arg-type]
+    assert added == []
+    assert session.commits == 1
+
+
+def _legacy_cleanup_pass(monkeypatch, already_clean: bool, stats: PersistStats) -> tuple[IngestResult, list[tuple]]:
+    tenant = DimTenant(tenant_id=uuid4(), cloud="azure", tenant_key="default", tenant_name="Azure")
+    checks: list[tuple] = []
+    cleanups: list[bool] = []
+
+    def fake_window_clean(self, tenant, cloud, start, end):  # noqa: ANN001
+        checks.append((start, end))
+        return already_clean
+
+    def fake_persist(self, rows, tenant, cleanup_legacy_currency=False, date_ordered=True):  # noqa: ANN001
+        cleanups.append(cleanup_legacy_currency)
+        return stats
+
+    monkeypatch.setattr(TenantService, "resolve_tenant", lambda self, provider, key=None: tenant)  # noqa: ARG005
+    monkeypatch.setattr(TenantService, "runtime_config_for", lambda self, cloud, key: None)  # noqa: ARG005
+    monkeypatch.setattr(IngestService, "_fetch_azure", lambda self, start, end, config: iter(()))  # noqa: ARG005
+    monkeypatch.setattr(IngestService, "_legacy_currency_window_clean", fake_window_clean)
+    monkeypatch.setattr(IngestService, "_persist", fake_persist)
+    monkeypatch.setattr(IngestService, "_mark_coverage", lambda self, *args: None)  # noqa: ARG005
+
+    start = date.today() - timedelta(days=30)
+    result = IngestService(SimpleNamespace()).ingest_provider("azure", start, date.today())  # type: ignore[arg-type]
+    assert cleanups == [not already_clean]
+    return result, checks
+
+
+def test_legacy_cleanup_marks_only_received_days_clean_even_after_deleting(monkeypatch) -> None:
+    first_day = date.today() - timedelta(days=20)
+    last_day = date.today() - timedelta(days=2)
+    stats = PersistStats(rows_received=10, rows_deleted=4, touched={"azure": [first_day, last_day]})
+
+    result, checks = _legacy_cleanup_pass(monkeypatch, already_clean=False, stats=stats)
+
+    # A verificacao ignora hoje; a passada que removeu linhas ainda assim confirma os dias que cobriu.
+    assert checks == [(date.today() - timedelta(days=30), date.today() - timedelta(days=1))]
+    assert result.legacy_currency_clean is True
+    assert (result.legacy_currency_clean_start, result.legacy_currency_clean_end) == (first_day.isoformat(), last_day.isoformat())
+
+    # Janela ja confirmada: sem DELETE, registra a faixa verificada.
+    result, checks = _legacy_cleanup_pass(monkeypatch, already_clean=True, stats=PersistStats())
+    assert result.legacy_currency_clean is True
+    assert (result.legacy_currency_clean_start, result.legacy_currency_clean_end) == (
+        checks[0][0].isoformat(),
+        checks[0][1].isoformat(),
+    )
+
+    # Nenhuma linha recebida: nada foi comparado, entao nada fica limpo.
+    result, _ = _legacy_cleanup_pass(monkeypatch, already_clean=False, stats=PersistStats())
+    assert result.legacy_currency_clean is False
+    assert result.legacy_currency_clean_start is None
+
+
+def test_sum_shard_results_keeps_clean_window_only_when_shard_ranges_connect() -> None:
+    def shard(start: str, end: str) -> dict:
+        return {"legacy_currency_clean": True, "legacy_currency_clean_start": start, "legacy_currency_clean_end": end}
+
+    totals = _sum_shard_results("azure", "default", [shard("2026-01-01", "2026-01-31"), shard("2026-02-01", "2026-02-20")])
+    assert totals.legacy_currency_clean is True
+    assert (totals.legacy_currency_clean_start, totals.legacy_currency_clean_end) == ("2026-01-01", "2026-02-20")
+
+    totals = _sum_shard_results("azure", "default", [shard("2026-01-01", "2026-01-25"), shard("2026-02-01", "2026-02-20")])
+    assert totals.legacy_currency_clean is False
+    assert totals.legacy_currency_clean_start is None
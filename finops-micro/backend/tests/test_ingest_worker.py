@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import threading
+
+from finops_api.jobs import ingest_worker
+
+
+def test_run_worker_syncs_account_names_once_before_polling(monkeypatch) -> None:
+    calls: list[str] = []
+    monkeypatch.setattr(ingest_worker.settings, "aws_account_names_sync_on_startup", True)
+    monkeypatch.setattr(ingest_worker, "sync_aws_account_names", lambda session: calls.append("sync") or 0)
+    monkeypatch.setattr(ingest_worker, "drain_queue", lambda: calls.append("drain") or 0)
+
+    stop_event = threading.Event()
+    monkeypatch.setattr(stop_event, "wait", lambda timeout: stop_event.set())
+    ingest_worker.run_worker(stop_event, poll_seconds=0)
+
+    assert calls == ["sync", "drain"]
+
+
+def test_account_names_sync_failure_does_not_stop_worker(monkeypatch) -> None:
+    def broken(session):  # noqa: ANN001
+        raise RuntimeError("banco indisponivel")
+
+    monkeypatch.setattr(ingest_worker.settings, "aws_account_names_sync_on_startup", True)
+    monkeypatch.setattr(ingest_worker, "sync_aws_account_names", broken)
+
+    ingest_worker.sync_account_names_on_startup()
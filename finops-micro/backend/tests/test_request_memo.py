@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from finops_api.core.request_memo import RequestMemo, memo_key, memoized
+
+
+@dataclass
+class Window:
+    start: int
+    end: int
+    tags: list[str] | None = None
+
+
+class Counter:
+    def __init__(self, memo: RequestMemo | None) -> None:
+        self.memo = memo
+        self.calls = 0
+
+    @memoized
+    def compute(self, window: Window, limit: int = 5, group: str = "service") -> int:
+        self.calls += 1
+        return window.end - window.start + limit
+
+
+def test_memoized_collapses_positional_keyword_and_default_arguments() -> None:
+    counter = Counter(RequestMemo())
+
+    assert counter.compute(Window(1, 3)) == 7
+    assert counter.compute(Window(1, 3), 5) == 7
+    assert counter.compute(window=Window(1, 3), group="service") == 7
+    assert counter.compute(Window(1, 3), limit=6) == 8
+
+    assert counter.calls == 2
+    stats = counter.memo.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (2, 2, 2)
+
+
+def test_memoized_runs_directly_without_memo() -> None:
+    counter = Counter(None)
+    counter.compute(Window(1, 3))
+    counter.compute(Window(1, 3))
+    assert counter.calls == 2
+
+
+def test_memo_key_makes_unhashable_arguments_hashable() -> None:
+    key = memo_key(Window(1, 2, tags=["b", "a"]))
+    assert key == ("Window", 1, 2, ("b", "a"))
+    assert hash(memo_key({"x": [1, 2], "y": {3}})) == hash((("x", (1, 2)), ("y", (3,))))
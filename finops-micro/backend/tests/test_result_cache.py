@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from datetime import date
+from uuid import uuid4
+
+from finops_api.core import result_cache
+from finops_api.core.result_cache import (
+    CacheScope,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResultCache,
+    cached_result,
+    invalidate_cached_results,
+)
+from finops_api.repositories.fact_cost_repo import QueryFilters
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeService:
+    def __init__(self, cache: ResultCache | None) -> None:
+        self.result_cache = cache
+        self.calls = 0
+
+    @cached_result("top")
+    def top(self, filters: QueryFilters, limit: int = 5) -> list[dict]:
+        self.calls += 1
+        return [{"total": float(self.calls)}]
+
+
+def test_memory_backend_expires_by_ttl_and_evicts_least_recently_used() -> None:
+    clock = FakeClock()
+    backend = MemoryCacheBackend(max_entries=2, clock=clock)
+    scope = CacheScope(cloud="aws", start=date(2026, 2, 1), end=date(2026, 2, 28))
+
+    backend.set("a", 1, scope, ttl_seconds=10)
+    backend.set("b", 2, scope, ttl_seconds=10)
+    assert backend.get("a") == 1  # "b" passa a ser o menos usado
+    backend.set("c", 3, scope, ttl_seconds=10)
+    assert backend.get("b") is result_cache._MISSING
+    assert len(backend) == 2
+
+    clock.now = 11
+    assert backend.get("a") is result_cache._MISSING
+
+
+def test_scope_overlap_treats_missing_tenant_and_all_cloud_as_wildcards() -> None:
+    tenant_a, tenant_b = uuid4(), uuid4()
+    entry = CacheScope(tenant_id=tenant_a, cloud="aws", start=date(2026, 1, 1), end=date(2026, 2, 10))
+
+    assert entry.overlaps(CacheScope(tenant_id=tenant_a, cloud="aws", start=date(2026, 2, 10), end=date(2026, 2, 12)))
+    assert entry.overlaps(CacheScope(start=date(2026, 2, 1)))
+    assert not entry.overlaps(CacheScope(tenant_id=tenant_b, cloud="aws"))
+    assert not entry.overlaps(CacheScope(cloud="oci"))
+    assert not entry.overlaps(CacheScope(tenant_id=tenant_a, cloud="aws", start=date(2026, 2, 11)))
+    assert CacheScope(cloud="all", start=date(2026, 2, 1), end=date(2026, 2, 7)).overlaps(
+        CacheScope(tenant_id=tenant_b, cloud="azure", start=date(2026, 2, 7), end=date(2026, 2, 7))
+    )
+
+
+def test_cached_result_keys_by_normalized_filters_and_invalidates_touched_range(monkeypatch) -> None:
+    cache = ResultCache(MemoryCacheBackend(), ttl_seconds=60)
+    monkeypatch.setattr(result_cache, "_result_cache", cache)
+    monkeypatch.setattr(result_cache, "_result_cache_configured", True)
+    tenant_id = uuid4()
+    filters = QueryFilters(
+        cloud="aws",
+        start=date(2026, 2, 1),
+        end=date(2026, 2, 7),
+        tenant_id=tenant_id,
+        services=["Amazon S3", "Amazon EC2"],
+    )
+    service = FakeService(cache)
+
+    first = service.top(filters)
+    assert service.top(QueryFilters(**{**filters.__dict__, "services": ["Amazon EC2", "Amazon S3"]}), limit=5) == first
+    assert service.calls == 1 and (cache.hits, cache.misses) == (1, 1)
+
+    # Ingest de outro tenant / outro cloud / dias fora do escopo lido nao derruba a entrada.
+    assert invalidate_cached_results(uuid4(), "aws", date(2026, 2, 1), date(2026, 2, 7)) == 0
+    assert invalidate_cached_results(tenant_id, "oci", date(2026, 2, 1), date(2026, 2, 7)) == 0
+    assert invalidate_cached_results(tenant_id, "aws", date(2026, 2, 8), date(2026, 2, 9)) == 0
+    service.top(filters)
+    assert service.calls == 1
+
+    assert invalidate_cached_results(tenant_id, "aws", date(2026, 2, 6), date(2026, 2, 9)) == 1
+    assert service.top(filters) == [{"total": 2.0}]
+
+    # Cotacao nova: vale para todo resultado com fim >= rate_date.
+    assert invalidate_cached_results(start=date(2026, 2, 7)) == 1
+    service.top(filters)
+    assert service.calls == 3
+
+    uncached = FakeService(None)
+    uncached.top(filters)
+    uncached.top(filters)
+    assert uncached.calls == 2
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.ttls: dict[str, int] = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.ttls[key] = ex
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def delete(self, key):
+        removed = int(key in self.values or key in self.hashes)
+        self.values.pop(key, None)
+        self.hashes.pop(key, None)
+        return removed
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    def hgetall(self, name):
+        return {key.encode(): value.encode() for key, value in self.hashes.get(name, {}).items()}
+
+    def hdel(self, name, key):
+        self.hashes.get(name, {}).pop(key, None)
+
+
+def test_redis_backend_round_trips_values_and_prunes_index_on_invalidate() -> None:
+    client = FakeRedis()
+    backend = RedisCacheBackend(client=client)
+    tenant_id = uuid4()
+    backend.set("k1", [{"total": 1.5}], CacheScope(tenant_id=tenant_id, cloud="aws", end=date(2026, 2, 7)), 30)
+    backend.set("k2", {"x": 1}, CacheScope(cloud="oci", end=date(2026, 2, 7)), 30)
+    backend.set("k3", 3, CacheScope(cloud="oci", end=date(2026, 2, 7)), 30)
+    client.values.pop("finops:result:k3")  # expirou no Redis
+
+    assert backend.get("k1") == [{"total": 1.5}]
+    assert client.ttls["finops:result:k1"] == 30
+    assert backend.invalidate(CacheScope(tenant_id=tenant_id, cloud="aws", start=date(2026, 2, 1))) == 1
+    assert backend.get("k1") is result_cache._MISSING
+    assert backend.get("k2") == {"x": 1}
+    assert set(client.hashes[backend.index_key]) == {"k2"}
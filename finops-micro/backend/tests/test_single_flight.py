@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from finops_api.core.single_flight import SingleFlight
+
+
+def test_concurrent_callers_with_same_key_share_one_execution() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    calls = 0
+    started = threading.Event()
+
+    def slow_ingest() -> int:
+        nonlocal calls
+        calls += 1
+        started.set()
+        time.sleep(0.1)
+        return 42
+
+    results: list[int] = []
+
+    def caller() -> None:
+        results.append(flight.do(("aws", "tenant", "2026-03"), slow_ingest))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=caller) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert calls == 1
+    assert results == [42, 42, 42, 42]
+    assert not flight.in_flight(("aws", "tenant", "2026-03"))
+
+
+def test_followers_receive_leader_exception_and_key_is_released() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    started = threading.Event()
+    errors: list[str] = []
+
+    def failing() -> int:
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("CLI indisponivel")
+
+    def caller() -> None:
+        try:
+            flight.do("key", failing)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=caller)
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert errors == ["CLI indisponivel", "CLI indisponivel"]
+    assert flight.do("key", lambda: 7) == 7